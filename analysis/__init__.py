@@ -0,0 +1,48 @@
+# Entry points of the analysis package, imported on first use so that
+# `import analysis` stays cheap: ta, TensorFlow, sklearn, aiohttp and VADER
+# are only loaded by the module that actually needs them.
+#
+#   from analysis import run_technical_analysis   # loads technical_analysis + ta
+
+import importlib
+
+_ENTRY_POINTS = {
+    # technical analysis
+    "add_indicators": "analysis.technical_analysis",
+    "generate_signals": "analysis.technical_analysis",
+    "analyze_symbols": "analysis.technical_analysis",
+    "analyze_timeframes": "analysis.technical_analysis",
+    "run_technical_analysis": "analysis.technical_analysis",
+    "StreamingIndicators": "analysis.streaming_indicators",
+    "refresh_signals": "analysis.streaming_indicators",
+    "resample_ohlcv": "analysis.resampling",
+    "ResampleCache": "analysis.resampling",
+    "BacktestData": "analysis.backtest",
+    "backtest": "analysis.backtest",
+    "run_backtest": "analysis.backtest",
+    "sweep": "analysis.backtest",
+    # on-chain + sentiment
+    "OnChainAnalysis": "analysis.onchain_analysis",
+    "sentiment_analyzer": "analysis.onchain_analysis",
+    "CoinGeckoClient": "analysis.coingecko_client",
+    "fetch_onchain_fields": "analysis.coingecko_client",
+    # LSTM
+    "train_coin": "analysis.lstm_price_prediction",
+    "train_many": "analysis.lstm_price_prediction",
+    "ForecastService": "analysis.forecast_service",
+}
+
+__all__ = sorted(_ENTRY_POINTS)
+
+
+def __getattr__(name):
+    module = _ENTRY_POINTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_ENTRY_POINTS))
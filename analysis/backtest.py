@@ -0,0 +1,335 @@
+import argparse
+import itertools
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from analysis.indicator_kernels import COL, WORK_ROWS, _ewm, compute_indicators, output_block
+from market.coins_dataset import load_coins
+
+# Vectorized backtest of the generate_signals() rules over every symbol at
+# once. All symbols are concatenated into flat arrays grouped by symbol
+# (`starts` marks the first row of each group), signals become int8 codes
+# (BUY=1, SELL=-1, HOLD=0) and positions, returns, equity and drawdown are
+# computed with cumulative ufuncs that are reset at the group boundaries.
+#
+#   python -m analysis.backtest --csv data/processed/all_coins.csv --sweep --workers 4
+
+SIGNAL_CODES = {"HOLD": 0, "BUY": 1, "SELL": -1}
+
+# исти прагови како generate_signals
+RSI_BUY = 30
+RSI_SELL = 70
+EMA_WINDOW = 20
+
+SWEEP_GRID = {
+    "rsi_buy": (20, 25, 30, 35, 40),
+    "rsi_sell": (60, 65, 70, 75, 80),
+    "ema_window": (10, 20, 50),
+}
+
+SUMMARY_COLUMNS = [
+    "bars", "total_return", "buy_hold_return", "max_drawdown",
+    "trades", "hit_rate", "turnover", "exposure",
+]
+
+Backtest = namedtuple("Backtest", "summary position returns equity drawdown")
+
+
+# -------- DATA -------- #
+
+class BacktestData:
+    """
+    close + the indicator arrays the signal rules need, for every symbol,
+    concatenated and grouped by symbol. EMA arrays are cached per window,
+    so a sweep computes each window once.
+    """
+
+    def __init__(self, symbols, lengths, close, rsi, macd, macd_signal, ema_20=None):
+        self.symbols = list(symbols)
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+        self.starts = np.r_[0, np.cumsum(self.lengths)[:-1]].astype(np.int64)
+        self.group = np.repeat(np.arange(len(self.symbols)), self.lengths)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.rsi = np.asarray(rsi, dtype=np.float64)
+        self.macd = np.asarray(macd, dtype=np.float64)
+        self.macd_signal = np.asarray(macd_signal, dtype=np.float64)
+        self._ema = {}
+        if ema_20 is not None:
+            self._ema[20] = np.asarray(ema_20, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.close)
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        From a coins frame. Reuses RSI/MACD/MACD_signal/EMA_20 when the frame
+        already went through add_indicators, otherwise computes them with the
+        NumPy kernels.
+        """
+        df = df.sort_values(["symbol", "time"], kind="stable")
+        symbols, lengths = np.unique(df["symbol"].to_numpy(), return_counts=True)
+        if {"RSI", "MACD", "MACD_signal", "EMA_20"} <= set(df.columns):
+            return cls(
+                symbols, lengths, df["close"].to_numpy(),
+                df["RSI"].to_numpy(), df["MACD"].to_numpy(),
+                df["MACD_signal"].to_numpy(), df["EMA_20"].to_numpy(),
+            )
+        return cls._compute(symbols, lengths, {
+            col: df[col].to_numpy(dtype=np.float64) for col in ("high", "low", "close", "volume")
+        })
+
+    @classmethod
+    def from_store(cls, store):
+        """From an OHLCVStore, whose columns are already grouped by symbol."""
+        symbols = [s for s in store.index if store.index[s][1] > store.index[s][0]]
+        bounds = np.array([store.index[s] for s in symbols], dtype=np.int64).reshape(-1, 2)
+        positions = np.concatenate([np.arange(start, end) for start, end in bounds]) if len(bounds) else []
+        columns = {
+            col: np.asarray(store.columns[col], dtype=np.float64)[positions]
+            for col in ("high", "low", "close", "volume")
+        }
+        return cls._compute(symbols, bounds[:, 1] - bounds[:, 0], columns)
+
+    @classmethod
+    def _compute(cls, symbols, lengths, columns):
+        block = output_block(len(columns["close"]))
+        work = np.empty((WORK_ROWS, int(np.max(lengths, initial=0))), dtype=np.float64)
+        start = 0
+        for n in lengths:
+            end = start + n
+            compute_indicators(
+                columns["high"][start:end], columns["low"][start:end],
+                columns["close"][start:end], columns["volume"][start:end],
+                out=block[start:end], work=work,
+            )
+            start = end
+        return cls(
+            symbols, lengths, columns["close"],
+            block[:, COL["RSI"]], block[:, COL["MACD"]],
+            block[:, COL["MACD_signal"]], block[:, COL["EMA_20"]],
+        )
+
+    def ema(self, window):
+        """EMA of close per symbol, NaN for the first window - 1 rows (like ta)."""
+        cached = self._ema.get(window)
+        if cached is None:
+            cached = np.full(len(self.close), np.nan)
+            scratch = np.empty(int(self.lengths.max(initial=0)))
+            for start, n in zip(self.starts, self.lengths):
+                _ewm(self.close[start:start + n], 2.0 / (window + 1), scratch[:n])
+                cached[start + window - 1:start + n] = scratch[window - 1:n]
+            self._ema[window] = cached
+        return cached
+
+
+# -------- SIGNALS -------- #
+
+def signal_codes(signal):
+    """BUY/SELL/HOLD strings (generate_signals output) as int8 codes."""
+    signal = np.asarray(signal)
+    return (signal == "BUY").astype(np.int8) - (signal == "SELL").astype(np.int8)
+
+
+def signals(data, rsi_buy=RSI_BUY, rsi_sell=RSI_SELL, ema_window=EMA_WINDOW):
+    """The generate_signals() rules as int8 codes; NaN warm-up rows stay HOLD."""
+    ema = data.ema(ema_window)
+    trend = data.macd - data.macd_signal
+    buy = (data.rsi < rsi_buy) & (data.close > ema) & (trend > 0)
+    sell = (data.rsi > rsi_sell) & (data.close < ema) & (trend < 0)
+    return buy.astype(np.int8) - sell.astype(np.int8)
+
+
+def positions(codes, starts, short=False):
+    """
+    Position after each bar: BUY goes long, SELL goes flat (short with
+    short=True), HOLD keeps the previous position. Every symbol starts flat.
+    """
+    codes = np.asarray(codes, dtype=np.int8)
+    target = codes if short else np.maximum(codes, 0).astype(np.int8)
+
+    event = codes != 0
+    event[starts] = True
+
+    # последниот настан до секој ред, без излез од групата (почетокот е секогаш настан)
+    last_event = np.maximum.accumulate(np.where(event, np.arange(len(codes)), 0))
+    return target[last_event]
+
+
+# -------- BACKTEST -------- #
+
+def _group_max_accumulate(x, group):
+    """np.maximum.accumulate that restarts at every group, via a per-group offset."""
+    if not len(x):
+        return x
+    span = float(x.max() - x.min()) + 1.0
+    offset = group * span
+    return np.maximum.accumulate(x + offset) - offset
+
+
+def backtest(data, codes, cost=0.0, short=False):
+    """
+    Trades `codes` on data.close: a position taken on a bar's close earns the
+    next bar's return, `cost` is charged per unit of position change.
+    Returns a Backtest with a per-symbol summary and the per-row arrays.
+    """
+    starts, group = data.starts, data.group
+    n = len(data)
+
+    pos = positions(codes, starts, short)
+    prev = np.empty(n, dtype=np.int8)
+    if n:
+        prev[1:] = pos[:-1]
+        prev[starts] = 0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = np.zeros(n)
+        ret[1:] = data.close[1:] / data.close[:-1] - 1.0
+        ret[starts] = 0.0
+        ret[~np.isfinite(ret)] = 0.0
+
+        turn = np.abs(pos.astype(np.int16) - prev)
+        strat = prev * ret - cost * turn
+
+        # log-equity по група, за cumsum да се ресетира на почетокот на секој symbol
+        log_ret = np.log1p(np.maximum(strat, -1.0 + 1e-12))
+        log_eq = np.cumsum(log_ret)
+        if n:
+            log_eq -= (log_eq[starts] - log_ret[starts])[group]
+        equity = np.exp(log_eq)
+        # врвот е најмалку почетниот капитал (log 0), и пред трошокот на првата свеќа
+        peak = np.maximum(_group_max_accumulate(log_eq, group), 0.0)
+        drawdown = np.exp(log_eq - peak) - 1.0
+
+    # трговија: секој влез во нова позиција (од flat или при промена на страна)
+    entry = (pos != 0) & (pos != prev)
+    trade_id = np.cumsum(entry) - 1
+    held = prev != 0
+    held_trade = np.empty(n, dtype=np.int64)
+    if n:
+        held_trade[1:] = trade_id[:-1]
+    trade_ret = np.bincount(held_trade[held], weights=log_ret[held], minlength=int(entry.sum()))
+    trade_symbol = group[entry]
+    trades = np.bincount(trade_symbol, minlength=len(starts))
+    wins = np.bincount(trade_symbol, weights=trade_ret > 0, minlength=len(starts))
+
+    if n:
+        last = starts + data.lengths - 1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            buy_hold = data.close[last] / data.close[starts] - 1.0
+            hit_rate = np.where(trades > 0, wins / np.maximum(trades, 1), np.nan)
+        summary = pd.DataFrame({
+            "bars": data.lengths,
+            "total_return": equity[last] - 1.0,
+            "buy_hold_return": buy_hold,
+            "max_drawdown": np.minimum.reduceat(drawdown, starts),
+            "trades": trades,
+            "hit_rate": hit_rate,
+            "turnover": np.add.reduceat(turn, starts) / data.lengths,
+            "exposure": np.add.reduceat(pos != 0, starts) / data.lengths,
+        }, index=pd.Index(data.symbols, name="symbol"))
+    else:
+        summary = pd.DataFrame(columns=SUMMARY_COLUMNS, index=pd.Index([], name="symbol"))
+
+    return Backtest(summary, pos, strat, equity, drawdown)
+
+
+def run_backtest(df, cost=0.0, short=False):
+    """Backtest of the `signal` column of an analyze_symbols() frame."""
+    data = BacktestData.from_frame(df)
+    ordered = df.sort_values(["symbol", "time"], kind="stable")
+    if "signal" in ordered.columns:
+        codes = signal_codes(ordered["signal"].to_numpy())
+    else:
+        codes = signals(data)
+    return backtest(data, codes, cost=cost, short=short)
+
+
+# -------- PARAMETER SWEEPS -------- #
+
+_sweep_data = None
+
+
+def _init_sweep(data):
+    global _sweep_data
+    _sweep_data = data
+
+
+def _sweep_one(params, cost, short):
+    rsi_buy, rsi_sell, ema_window = params
+    result = backtest(
+        _sweep_data, signals(_sweep_data, rsi_buy, rsi_sell, ema_window), cost=cost, short=short
+    )
+    s = result.summary
+    trades = s["trades"].sum()
+    return {
+        "rsi_buy": rsi_buy,
+        "rsi_sell": rsi_sell,
+        "ema_window": ema_window,
+        "mean_return": s["total_return"].mean(),
+        "median_return": s["total_return"].median(),
+        "mean_max_drawdown": s["max_drawdown"].mean(),
+        "trades": int(trades),
+        "hit_rate": (s["hit_rate"].fillna(0) * s["trades"]).sum() / trades if trades else np.nan,
+        "turnover": s["turnover"].mean(),
+    }
+
+
+def sweep(data, grid=None, cost=0.0, short=False, workers=1):
+    """
+    Backtests every combination of rsi_buy x rsi_sell x ema_window in grid
+    (missing keys use the generate_signals defaults). The EMA arrays are
+    computed once up front, so with workers > 1 every worker receives the
+    finished arrays once (pool initializer) and only builds signals.
+    """
+    grid = {**{k: (v,) for k, v in
+               {"rsi_buy": RSI_BUY, "rsi_sell": RSI_SELL, "ema_window": EMA_WINDOW}.items()},
+            **(grid or {})}
+    combos = list(itertools.product(grid["rsi_buy"], grid["rsi_sell"], grid["ema_window"]))
+    for window in grid["ema_window"]:
+        data.ema(window)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1:
+        _init_sweep(data)
+        rows = [_sweep_one(params, cost, short) for params in combos]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_sweep, initargs=(data,)
+        ) as pool:
+            rows = list(pool.map(
+                _sweep_one, combos, [cost] * len(combos), [short] * len(combos),
+                chunksize=max(1, len(combos) // (workers * 4)),
+            ))
+
+    return pd.DataFrame(rows).sort_values("mean_return", ascending=False, ignore_index=True)
+
+
+# -------- RUN STANDALONE -------- #
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the technical analysis signals")
+    parser.add_argument("--csv", default="data/processed/all_coins.csv")
+    parser.add_argument("--cost", type=float, default=0.0, help="cost per unit of position change")
+    parser.add_argument("--short", action="store_true", help="SELL opens a short instead of going flat")
+    parser.add_argument("--sweep", action="store_true", help="sweep SWEEP_GRID")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    data = BacktestData.from_frame(load_coins(csv_path=args.csv))
+
+    if args.sweep:
+        print(sweep(data, SWEEP_GRID, cost=args.cost, short=args.short, workers=args.workers).head(20))
+    else:
+        result = backtest(data, signals(data), cost=args.cost, short=args.short)
+        print(result.summary.sort_values("total_return", ascending=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+from urllib.parse import urlencode
+
+import aiohttp
+
+# COINGECKO_API може да се насочи кон локален stub сервер за тестови
+COINGECKO_API = os.environ.get("COINGECKO_API", "https://api.coingecko.com/api/v3")
+CACHE_DIR = os.path.join(".cache", "coingecko")
+
+MARKETS_BATCH = 250          # максимум ids по /coins/markets повик
+DEFAULT_TTL = 300
+TVL_TTL = 3600
+COMMUNITY_TTL = 3600         # community_data се менува споро
+
+log = logging.getLogger(__name__)
+
+_MISS = object()
+
+
+class CoinGeckoError(Exception):
+    def __init__(self, status, path):
+        super().__init__(f"CoinGecko {path} failed with status {status}")
+        self.status = status
+        self.path = path
+
+
+# -------- CACHE -------- #
+
+class TTLCache:
+    """
+    In-memory TTL cache with an optional on-disk layer (one JSON file per
+    key), so /defi/tvl and friends survive between runs.
+    """
+
+    def __init__(self, path=CACHE_DIR, ttl=DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._mem = {}
+        if path:
+            os.makedirs(path, exist_ok=True)
+
+    def _file(self, key):
+        return os.path.join(self.path, hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+    def get(self, key, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+
+        entry = self._mem.get(key)
+        if entry is None and self.path:
+            try:
+                with open(self._file(key)) as f:
+                    stored = json.load(f)
+                entry = (stored["stored_at"], stored["value"])
+                self._mem[key] = entry
+            except (OSError, ValueError, KeyError):
+                entry = None
+
+        if entry is not None and now - entry[0] < ttl:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return _MISS
+
+    def set(self, key, value):
+        stored_at = time.time()
+        self._mem[key] = (stored_at, value)
+        if self.path:
+            target = self._file(key)
+            tmp = f"{target}.{os.getpid()}"
+            with open(tmp, "w") as f:
+                json.dump({"stored_at": stored_at, "key": key, "value": value}, f)
+            os.replace(tmp, target)
+
+
+# -------- CLIENT -------- #
+
+class CoinGeckoClient:
+    """
+    asyncio client with bounded concurrency. 429 and 5xx responses are
+    retried with exponential backoff (Retry-After is honoured and pauses
+    every in-flight request, not just the one that got limited).
+
+        async with CoinGeckoClient() as client:
+            fields = await client.onchain_fields(["BTC", "ETH"])
+    """
+
+    def __init__(self, base_url=COINGECKO_API, concurrency=4, max_retries=4,
+                 backoff=1.0, timeout=10, cache=None):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache = cache if cache is not None else TTLCache()
+
+        self._concurrency = concurrency
+        self._semaphore = None
+        self._session = None
+        self._cooldown_until = 0.0
+        self._tvl = None
+
+    async def __aenter__(self):
+        self._semaphore = asyncio.Semaphore(self._concurrency)
+        self._session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+
+    async def _wait_cooldown(self):
+        delay = self._cooldown_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _retry_delay(self, attempt, retry_after=None):
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff * 2 ** attempt + random.uniform(0, self.backoff)
+
+    async def get_json(self, path, params=None, ttl=None):
+        key = path + ("?" + urlencode(sorted(params.items())) if params else "")
+        cached = self.cache.get(key, ttl)
+        if cached is not _MISS:
+            return cached
+
+        status = None
+        for attempt in range(self.max_retries + 1):
+            await self._wait_cooldown()
+            async with self._semaphore:
+                try:
+                    async with self._session.get(self.base_url + path, params=params) as resp:
+                        status = resp.status
+                        if status == 200:
+                            data = await resp.json(content_type=None)
+                            self.cache.set(key, data)
+                            return data
+                        if status != 429 and status < 500:
+                            raise CoinGeckoError(status, path)
+                        delay = self._retry_delay(attempt, resp.headers.get("Retry-After"))
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    status = type(e).__name__
+                    delay = self._retry_delay(attempt)
+
+            if attempt == self.max_retries:
+                break
+            if status == 429:
+                self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+            log.warning("CoinGecko %s -> %s, retry %d in %.1fs",
+                        path, status, attempt + 1, delay)
+            await asyncio.sleep(delay)
+
+        raise CoinGeckoError(status, path)
+
+    # -------- endpoints -------- #
+
+    async def markets(self, ids):
+        """{id: market entry}, fetched MARKETS_BATCH ids per request."""
+        ids = sorted(set(ids))
+        batches = [ids[i:i + MARKETS_BATCH] for i in range(0, len(ids), MARKETS_BATCH)]
+        pages = await asyncio.gather(*[
+            self.get_json("/coins/markets", {
+                "vs_currency": "usd",
+                "ids": ",".join(batch),
+                "per_page": MARKETS_BATCH,
+            })
+            for batch in batches
+        ])
+        return {entry["id"]: entry for page in pages for entry in page or []}
+
+    async def coin(self, coin_id):
+        return await self.get_json(f"/coins/{coin_id}", {
+            "localization": "false",
+            "tickers": "false",
+            "market_data": "false",
+            "developer_data": "false",
+        }, ttl=COMMUNITY_TTL)
+
+    async def defi_tvl(self):
+        """{id: tvl}; the full list is downloaded once per client (and TVL_TTL on disk)."""
+        if self._tvl is None:
+            data = await self.get_json("/defi/tvl", ttl=TVL_TTL)
+            self._tvl = {
+                d["id"].lower(): float(d.get("tvl", 0) or 0)
+                for d in data or [] if "id" in d
+            }
+        return self._tvl
+
+    async def onchain_fields(self, symbols):
+        """
+        {symbol: {"active_addresses", "tx_count", "tvl"}} for every symbol.
+        tx_count comes from the batched /coins/markets and tvl from one
+        /defi/tvl download; only active_addresses (community_data, which the
+        batch lacks) needs /coins/<id>, and only for ids the batch knows.
+        Failures are logged and leave the affected fields at 0.
+        """
+        ids = {symbol: symbol.lower() for symbol in symbols}
+
+        markets, tvl = await asyncio.gather(
+            self.markets(ids.values()), self.defi_tvl(), return_exceptions=True,
+        )
+        for name, value in (("markets", markets), ("tvl", tvl)):
+            if isinstance(value, Exception):
+                log.warning("CoinGecko %s unavailable: %s", name, value)
+        markets = {} if isinstance(markets, Exception) else markets
+        tvl = {} if isinstance(tvl, Exception) else tvl
+
+        # непознатите ids би дале 404, не се бараат
+        known = sorted(set(ids.values()) & markets.keys())
+        coins = dict(zip(known, await asyncio.gather(
+            *[self.coin(coin_id) for coin_id in known], return_exceptions=True,
+        )))
+
+        fields = {}
+        for symbol, coin_id in ids.items():
+            coin = coins.get(coin_id)
+            if isinstance(coin, Exception):
+                log.debug("CoinGecko /coins/%s unavailable: %s", coin_id, coin)
+            community = {} if isinstance(coin, Exception) else (coin or {}).get("community_data") or {}
+            fields[symbol] = {
+                "active_addresses": community.get("twitter_followers", 0) or 0,
+                "tx_count": int(markets.get(coin_id, {}).get("total_volume", 0) or 0),
+                "tvl": tvl.get(coin_id, 0),
+            }
+        return fields
+
+
+def fetch_onchain_fields(symbols, **client_kwargs):
+    """Blocking wrapper around CoinGeckoClient.onchain_fields."""
+    async def run():
+        async with CoinGeckoClient(**client_kwargs) as client:
+            return await client.onchain_fields(symbols)
+
+    return asyncio.run(run())
@@ -0,0 +1,230 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from analysis.model_registry import (
+    REGISTRY_DIR, SHARED, latest_version, load_model, registered_models, scale, unscale,
+)
+
+# Next-close forecasts for the web app. Models are loaded from the registry
+# once, in the background, and a single worker thread serves every request:
+# it waits up to max_wait for more requests, groups them per model and runs
+# one predict_on_batch per group. Results are cached per symbol until a new
+# candle (or a new model version) shows up.
+
+log = logging.getLogger(__name__)
+
+
+class ModelNotFound(LookupError):
+    pass
+
+
+class ForecastService:
+    """
+    series(symbol) -> (last candle time, close prices oldest first) or None.
+
+        service = ForecastService(series).start()
+        service.forecast("BTC")
+    """
+
+    def __init__(self, series, path=REGISTRY_DIR, max_batch=64, max_wait=0.005):
+        self.series = series
+        self.path = path
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+
+        self.ready = threading.Event()
+        self._models = {}            # name -> (model, meta)
+        self._cache = {}             # symbol -> forecast dict
+        self._pending = {}           # (symbol, as_of, version) -> Future
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+
+        self._stats = {
+            "requests": 0,
+            "hits": 0,
+            "batches": 0,
+            "batched_requests": 0,
+            "predict_seconds": 0.0,
+        }
+
+    # -------- lifecycle -------- #
+
+    def start(self):
+        threading.Thread(target=self._warm, name="forecast-warm", daemon=True).start()
+        threading.Thread(target=self._run, name="forecast-batcher", daemon=True).start()
+        return self
+
+    def _warm(self):
+        started = time.perf_counter()
+        try:
+            for name in registered_models(self.path):
+                # еден расипан модел не ги гаси останатите
+                try:
+                    loaded = load_model(name, path=self.path)
+                except ImportError as e:
+                    log.warning("Forecasts disabled, TensorFlow is not available: %s", e)
+                    break
+                except Exception:
+                    log.exception("Could not load forecast model %s", name)
+                    continue
+                if loaded is not None:
+                    self._models[name] = loaded
+        finally:
+            self.ready.set()
+        if self._models:
+            log.info("Loaded %d forecast models in %.2fs",
+                     len(self._models), time.perf_counter() - started)
+
+    def reload(self, name):
+        """Picks up a newly published version of one model."""
+        if latest_version(name, self.path) != self._version(name):
+            self._models[name] = load_model(name, path=self.path)
+
+    def _version(self, name):
+        loaded = self._models.get(name)
+        return loaded[1]["version"] if loaded else None
+
+    def _model_for(self, symbol):
+        if symbol in self._models:
+            return symbol
+        shared = self._models.get(SHARED)
+        if shared and symbol in shared[1]["symbol_ids"]:
+            return SHARED
+        return None
+
+    # -------- requests -------- #
+
+    def forecast(self, symbol, timeout=10.0):
+        """
+        Forecast dict for the next candle. Raises KeyError for an unknown
+        symbol, ModelNotFound when no model covers it, ValueError when the
+        history is shorter than the model's lookback and TimeoutError when
+        no result arrives within `timeout`.
+        """
+        self.ready.wait(timeout)
+        with self._lock:
+            self._stats["requests"] += 1
+
+        series = self.series(symbol)
+        if series is None:
+            raise KeyError(symbol)
+        as_of, closes = series
+
+        name = self._model_for(symbol)
+        if name is None:
+            raise ModelNotFound(symbol)
+        _, meta = self._models[name]
+        version = meta["version"]
+        # кратка историја не оди во batch-от, да не ги сруши другите барања
+        if len(closes) < meta["lookback"]:
+            raise ValueError(f"{symbol} has fewer than {meta['lookback']} candles")
+
+        with self._lock:
+            cached = self._cache.get(symbol)
+            if cached and cached["as_of"] == as_of and cached["version"] == version:
+                self._stats["hits"] += 1
+                return cached
+
+            # истиот symbol во ист batch се пресметува еднаш
+            key = (symbol, as_of, version)
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pending[key] = Future()
+                self._queue.put((key, name, closes, future))
+
+        return future.result(timeout)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            groups = {}
+            for request in batch:
+                groups.setdefault(request[1], []).append(request)
+            for name, requests in groups.items():
+                self._predict(name, requests)
+
+    def _predict(self, name, requests):
+        model, meta = self._models[name]
+        lookback = meta["lookback"]
+
+        # моделот можел да се смени по проверката во forecast(): само тие барања паѓаат
+        short = [r for r in requests if len(r[2]) < lookback]
+        for key, _, _, future in short:
+            with self._lock:
+                self._pending.pop(key, None)
+            future.set_exception(ValueError(f"{key[0]} has fewer than {lookback} candles"))
+        requests = [r for r in requests if len(r[2]) >= lookback]
+        if not requests:
+            return
+
+        try:
+            x = np.empty((len(requests), lookback, 1), dtype=np.float32)
+            symbols = []
+            for i, ((symbol, _, _), _, closes, _) in enumerate(requests):
+                x[i, :, 0] = scale(closes[-lookback:], meta["scalers"][symbol])
+                symbols.append(symbol)
+
+            inputs = x
+            if meta["symbol_ids"] is not None:
+                ids = np.array([meta["symbol_ids"][s] for s in symbols], dtype=np.int32)
+                inputs = [x, ids]
+
+            started = time.perf_counter()
+            predicted = np.asarray(model.predict_on_batch(inputs)).reshape(-1)
+            with self._lock:
+                self._stats["batches"] += 1
+                self._stats["batched_requests"] += len(requests)
+                self._stats["predict_seconds"] += time.perf_counter() - started
+        except Exception as e:
+            log.exception("Forecast batch for %s failed", name)
+            for key, _, _, future in requests:
+                with self._lock:
+                    self._pending.pop(key, None)
+                future.set_exception(e)
+            return
+
+        for (key, _, closes, future), value in zip(requests, predicted):
+            symbol, as_of, version = key
+            last_close = float(closes[-1])
+            next_close = float(unscale(value, meta["scalers"][symbol])[0])
+            result = {
+                "symbol": symbol,
+                "model": name,
+                "version": version,
+                "as_of": int(as_of),
+                "lookback": lookback,
+                "last_close": last_close,
+                "forecast": next_close,
+                "change_pct": (next_close - last_close) / last_close * 100.0 if last_close else 0.0,
+            }
+            with self._lock:
+                self._cache[symbol] = result
+                self._pending.pop(key, None)
+            future.set_result(result)
+
+    # -------- stats -------- #
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["models"] = sorted(self._models)
+        stats["cached"] = len(self._cache)
+        stats["avg_batch"] = (
+            stats["batched_requests"] / stats["batches"] if stats["batches"] else 0.0
+        )
+        return stats
@@ -0,0 +1,268 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Fused NumPy backend for technical_analysis.add_indicators(backend="numpy").
+# Works on raw float64 arrays and writes every indicator into one
+# preallocated (rows, len(COLUMNS)) block. Shared intermediates are computed
+# once: the 20-bar close window feeds SMA, WMA and the Bollinger bands,
+# the EMA recurrence is shared by MACD, EMA_20 and RSI, and the previous
+# close is shared by ADX's true range and the directional movement.
+# Indicators are written straight into their output column and every
+# intermediate lives in one of WORK_ROWS reused work rows, so a call
+# allocates the output block, (WORK_ROWS, rows) and a fixed
+# WINDOW_CHUNK x 20 window buffer, nothing per indicator. The default
+# block is column-major: each column is one contiguous array that pandas
+# can take over without another copy.
+
+COLUMNS = [
+    "RSI", "MACD", "MACD_signal", "Stochastic", "ADX", "CCI",
+    "SMA_20", "EMA_20", "WMA_20", "BB_upper", "BB_lower", "Volume_SMA_20",
+]
+COL = {name: i for i, name in enumerate(COLUMNS)}
+
+# колку вредности се пресметуваат одеднаш во _ewm_from
+EWM_BLOCK = 128
+# редови по парче за std/MAD над window view, ја ограничува привремената меморија
+WINDOW_CHUNK = 256
+# работни низи со должина rows, заеднички за сите индикатори
+WORK_ROWS = 4
+
+_decay_cache = {}
+
+
+# -------- RECURRENCES -------- #
+
+def _decay(alpha):
+    decay = _decay_cache.get(alpha)
+    if decay is None:
+        decay = _decay_cache[alpha] = (1.0 - alpha) ** np.arange(1, EWM_BLOCK + 1)
+    return decay
+
+
+def _ewm_from(seed, x, alpha, out):
+    """
+    out[j] = (1 - alpha) * out[j-1] + alpha * x[j], with out[-1] = seed.
+    Solved in closed form block by block, so the Python loop runs
+    len(x) / EWM_BLOCK times instead of len(x).
+    """
+    decay = _decay(alpha)
+    prev = seed
+    for start in range(0, len(x), EWM_BLOCK):
+        seg = x[start:start + EWM_BLOCK]
+        d = decay[:len(seg)]
+        block = out[start:start + len(seg)]
+        np.divide(seg, d, out=block)
+        block *= alpha
+        np.cumsum(block, out=block)
+        block += prev
+        block *= d
+        prev = block[-1]
+    return out
+
+
+def _ewm(x, alpha, out):
+    """pandas ewm(alpha=alpha, adjust=False).mean() without min_periods."""
+    if len(x):
+        out[0] = x[0]
+        _ewm_from(x[0], x[1:], alpha, out[1:])
+    return out
+
+
+def _rolling_mean(x, window, out, csum):
+    # cumsum наместо window view, без (n, window) привремена низа; csum е работна низа
+    np.cumsum(x, out=csum)
+    out[window - 1] = csum[window - 1]
+    np.subtract(csum[window:], csum[:-window], out=out[window:])
+    out[window - 1:] /= window
+    return out
+
+
+def _rolling_extreme(x, window, ufunc, out):
+    """
+    Rolling min/max as window - 1 in-place passes over shifted slices;
+    the reduction over a window view buffers a copy of the whole view.
+    """
+    m = len(out)
+    out[:] = x[:m]
+    for k in range(1, window):
+        ufunc(out, x[k:k + m], out=out)
+    return out
+
+
+def _window_deviation(x, window, mean, kind, out, scratch):
+    """
+    Rolling std (ddof=0) or mean absolute deviation around `mean`,
+    computed over a zero-copy window view in pieces that fit in the
+    1-D `scratch` work array (at most WINDOW_CHUNK rows each).
+    """
+    win = sliding_window_view(x, window)
+    chunk = max(1, min(WINDOW_CHUNK, len(win), len(scratch) // window))
+    tmp = scratch[:chunk * window].reshape(chunk, window)
+    for start in range(0, len(win), chunk):
+        rows = win[start:start + chunk]
+        t = tmp[:len(rows)]
+        np.subtract(rows, mean[start:start + len(rows), None], out=t)
+        if kind == "std":
+            np.square(t, out=t)
+            np.mean(t, axis=1, out=out[start:start + len(rows)])
+        else:
+            np.abs(t, out=t)
+            np.mean(t, axis=1, out=out[start:start + len(rows)])
+    if kind == "std":
+        np.sqrt(out, out=out)
+    return out
+
+
+# -------- ENGINE -------- #
+
+def output_block(n):
+    """Column-major (n, len(COLUMNS)) block: out[:, i] is contiguous."""
+    return np.empty((len(COLUMNS), n), dtype=np.float64).T
+
+
+def compute_indicators(high, low, close, volume, out=None, work=None):
+    """
+    All add_indicators() columns for one symbol, as a (len(close), 12)
+    float64 block ordered like COLUMNS. NaN marks the warm-up rows, the
+    same way the `ta` library reports them. `work` is an optional
+    (WORK_ROWS, >= len(close)) scratch array, for callers that loop over
+    many symbols.
+    """
+    n = len(close)
+    if out is None:
+        out = output_block(n)
+    out.fill(np.nan)
+    if n == 0:
+        return out
+    if work is None:
+        work = np.empty((WORK_ROWS, n), dtype=np.float64)
+    w0, w1, w2, w3 = (row[:n] for row in work[:WORK_ROWS])
+    # парчињата за std/MAD, фиксна големина без разлика на n
+    window_tmp = np.empty(min(WINDOW_CHUNK, n) * 20, dtype=np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # ===== EMA / MACD =====
+        ema_20 = out[:, COL["EMA_20"]]
+        _ewm(close, 2.0 / 21, ema_20)
+        ema_20[:19] = np.nan
+
+        if n >= 26:
+            ema_fast = _ewm(close, 2.0 / 13, w0)
+            ema_slow = _ewm(close, 2.0 / 27, w1)
+            macd = out[25:, COL["MACD"]]
+            np.subtract(ema_fast[25:], ema_slow[25:], out=macd)
+            signal = out[25:, COL["MACD_signal"]]
+            _ewm(macd, 2.0 / 10, signal)
+            signal[:8] = np.nan
+
+        # ===== RSI (Wilder) =====
+        if n >= 14:
+            diff = w0
+            diff[0] = 0.0
+            np.subtract(close[1:], close[:-1], out=diff[1:])
+            up = _ewm(np.maximum(diff, 0.0, out=w1), 1.0 / 14, w1)
+            np.negative(diff, out=diff)
+            down = _ewm(np.maximum(diff, 0.0, out=diff), 1.0 / 14, diff)
+            rsi = out[13:, COL["RSI"]]
+            np.divide(up[13:], down[13:], out=rsi)
+            rsi += 1
+            np.divide(100.0, rsi, out=rsi)
+            np.subtract(100.0, rsi, out=rsi)
+            rsi[down[13:] == 0] = 100.0
+
+        # ===== 20-bar close window: SMA, WMA, Bollinger =====
+        if n >= 20:
+            win = sliding_window_view(close, 20)
+            sma = _rolling_mean(close, 20, out[:, COL["SMA_20"]], w0)[19:]
+
+            weights = np.arange(1, 21, dtype=np.float64) * 2 / (20 * 21)
+            np.matmul(win, weights, out=out[19:, COL["WMA_20"]])
+
+            mstd = _window_deviation(close, 20, sma, "std", w1[:n - 19], window_tmp)
+            mstd *= 2
+            np.add(sma, mstd, out=out[19:, COL["BB_upper"]])
+            np.subtract(sma, mstd, out=out[19:, COL["BB_lower"]])
+
+            _rolling_mean(volume, 20, out[:, COL["Volume_SMA_20"]], w0)
+
+            # ===== CCI =====
+            tp = np.add(high, low, out=w2)
+            tp += close
+            tp /= 3.0
+            tp_mean = _rolling_mean(tp, 20, w3, w0)[19:]
+            mad = _window_deviation(tp, 20, tp_mean, "mad", w1[:n - 19], window_tmp)
+            cci = out[19:, COL["CCI"]]
+            np.subtract(tp[19:], tp_mean, out=cci)
+            mad *= 0.015
+            cci /= mad
+
+        # ===== Stochastic =====
+        if n >= 14:
+            smin = _rolling_extreme(low, 14, np.minimum, w0[:n - 13])
+            smax = _rolling_extreme(high, 14, np.maximum, w1[:n - 13])
+            stoch = out[13:, COL["Stochastic"]]
+            np.subtract(close[13:], smin, out=stoch)
+            stoch *= 100
+            smax -= smin
+            stoch /= smax
+
+        # ===== ADX =====
+        _adx(high, low, close, 14, out[:, COL["ADX"]], w0, w1, w2, w3)
+
+    return out
+
+
+def _adx(high, low, close, w, out, tr, pos, neg, spare):
+    """
+    Same seeding as ta.trend.ADXIndicator; needs at least 2 * w rows.
+    tr, pos, neg and spare are work arrays of len(close), overwritten.
+    """
+    n = len(close)
+    if n < 2 * w:
+        return out
+    m = n - 1
+    tr, pos, neg, spare = tr[:m], pos[:m], neg[:m], spare[:m]
+
+    np.maximum(high[1:], close[:-1], out=tr)
+    tr -= np.minimum(low[1:], close[:-1], out=spare)
+
+    diff_up = np.subtract(high[1:], high[:-1], out=pos)
+    diff_down = np.subtract(low[:-1], low[1:], out=neg)
+    up_wins = (diff_up > diff_down) & (diff_up > 0)
+    down_wins = (diff_down > diff_up) & (diff_down > 0)
+    diff_up[~up_wins] = 0.0
+    diff_down[~down_wins] = 0.0
+
+    # Wilder: s_t = s_{t-1} - s_{t-1}/w + x_t  ==  ewm(alpha=1/w) над w * x;
+    # s[j] се пишува на x[w - 1 + j], на место
+    smoothed = []
+    for x in (tr, pos, neg):
+        s = x[w - 1:]
+        seed = x[:w].sum()
+        tail = s[1:]
+        tail *= w
+        _ewm_from(seed, tail, 1.0 / w, tail)
+        s[0] = seed
+        smoothed.append(s)
+    trs, dip, din = smoothed
+
+    zero = trs == 0
+    for s in (dip, din):
+        s *= 100
+        s /= trs
+        s[zero] = 0.0
+
+    # dx = 100 * |dip - din| / (dip + din), 0 кога збирот е 0
+    total = np.add(dip, din, out=trs)
+    dx = np.subtract(dip, din, out=dip)
+    np.abs(dx, out=dx)
+    dx *= 100
+    dx /= total
+    dx[total == 0] = 0.0
+
+    # dx[j] е за свеќата w + j; ADX почнува на 2w - 1
+    out[:2 * w - 1] = 0.0
+    seed = dx[:w].mean()
+    out[2 * w - 1] = seed
+    _ewm_from(seed, dx[w:], 1.0 / w, out[2 * w:])
+    return out
@@ -1,112 +1,338 @@
+import argparse
+import multiprocessing
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+from numpy.lib.stride_tricks import sliding_window_view
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.metrics import mean_squared_error, mean_absolute_percentage_error, r2_score
 import tensorflow as tf
 from tensorflow import keras
 
+from analysis.model_registry import SHARED, save_model
+from market.coins_dataset import load_coins
+
+# Trains the LSTM next-close models (per coin or one shared model) and
+# publishes them to the registry the web app serves from. The imports are
+# absolute from the project root, so run it from there as a module:
+#
+#     python -m analysis.lstm_price_prediction BTC ETH --save
+
 #-------------------CONFIG----------------------
 COIN_SYMBOL = "BTC"     # Choose what coin you want to search
 LOOKBACK = 30           # days to lookback
 TRAIN_RATIO = 0.7       # train set percentage
 EPOCHS = 20
 BATCH_SIZE = 32
+EMBEDDING_DIM = 4       # symbol embedding size for the shared multi-coin model
 
-#-----------------LOAD DATA---------------------
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
-DATA_PATH = os.path.join(PROJECT_ROOT, "techPrototype", "../data/processed/all_coins.csv")
+DATA_PATH = os.path.join(PROJECT_ROOT, "data", "processed", "all_coins.csv")
 
-print(f"[-INFO-] Loading data from:  {DATA_PATH}")
-df = pd.read_csv(DATA_PATH)
+#-----------------LOAD DATA---------------------
+def load_prices(csv_path=DATA_PATH, symbols=None):
+    """{symbol: close prices as an (n, 1) float array, oldest first}"""
+    print(f"[-INFO-] Loading data from:  {csv_path}")
+    # само symbol/time/close, филтерот по symbol се применува при читањето
+    df = load_coins(symbols=symbols, columns=["symbol", "time", "close"], csv_path=csv_path)
 
-coin_df = df[df["symbol"]==COIN_SYMBOL].sort_values("time").copy()
+    prices = {
+        symbol: group["close"].to_numpy(dtype=np.float64).reshape(-1, 1)
+        for symbol, group in df.groupby("symbol", sort=True, observed=True)
+    }
+    for symbol in symbols or []:
+        if symbol not in prices:
+            raise ValueError(f"[-ERROR-] No rows found for symbol {symbol} in all_coins.csv")
+    return prices
 
-if coin_df.empty:
-    raise ValueError(f"[-ERROR-] No rows found for symbol {COIN_SYMBOL} in all_coins.csv")
+#------------------CREATE SEQUENCES--------------
+def create_sequences(data: np.ndarray, lookback: int):
+    """
+    X[i] = data[i : i + lookback], y[i] = data[i + lookback].
+    X is a read-only sliding_window_view over data, so no window is copied.
+    """
+    windows = sliding_window_view(data[:-1], lookback, axis=0)   # (samples, features, lookback)
+    X = windows.transpose(0, 2, 1)                                # (samples, lookback, features)
+    y = data[lookback:]
+    return X, y
 
-prices = coin_df["close"].values.reshape(-1, 1)
-print(f"[-INFO-] Loaded {len(prices)} price points for {COIN_SYMBOL}")
 
-#------------------SCALE DATA--------------------
-scaler = MinMaxScaler(feature_range =(0, 1))
-prices_scaled = scaler.fit_transform(prices)
+def prepare_coin(prices, lookback=LOOKBACK, train_ratio=TRAIN_RATIO):
+    """Scales one coin and returns (scaler, X, y, train_size)."""
+    if len(prices) <= lookback + 1:
+        raise ValueError("[-ERROR-] Not enough data for the chosen LOOKBACK/TRAIN_RATIO.")
 
-#------------------CREATE SEQUENCES--------------
-def create_sequences(data: np.ndarray, lookback: int):
-    X, y = [], []
-    for i in range(len(data) - lookback):
-        X.append(data[i : i + lookback])
-        y.append(data[i+lookback])
-    return np.array(X), np.array(y)
+    scaler = MinMaxScaler(feature_range=(0, 1))
+    prices_scaled = scaler.fit_transform(prices).astype(np.float32)
 
-X, y = create_sequences(prices_scaled, lookback=LOOKBACK)
-print(f"[-INFO-] X shape: {X.shape}  (samples, timesteps, features)")
-print(f"[-INFO-] y shape: {y.shape}  (samples, 1)")
+    X, y = create_sequences(prices_scaled, lookback)
+    train_size = int(len(X) * train_ratio)
+    if train_size == 0 or train_size == len(X):
+        raise ValueError("[-ERROR-] Not enough data for the chosen LOOKBACK/TRAIN_RATIO.")
+    return scaler, X, y, train_size
 
-#------------------TRAIN / TEST SPLIT------------
-train_size = int(len(X) * TRAIN_RATIO)
-X_train, X_test = X[:train_size], X[train_size:]
-y_train, y_test = y[:train_size], y[train_size:]
+#------------------INPUT PIPELINE----------------
+def make_dataset(X, y, start=0, stop=None, batch_size=BATCH_SIZE,
+                 shuffle=False, symbol_id=None, seed=None):
+    """
+    Streams batches of (X[start:stop], y[start:stop]) into tf.data. Only
+    the current batch is copied out of the window view, so memory stays at
+    one batch no matter how long the history is. With symbol_id set, the
+    inputs become (windows, symbol ids) for the shared model.
+    """
+    stop = len(X) if stop is None else stop
+    lookback, features = X.shape[1], X.shape[2]
+    rng = np.random.default_rng(seed)
 
-print(f"[-INFO-] Train samples: {len(X_train)}")
-print(f"[-INFO-] Test samples:  {len(X_test)}")
+    def batches():
+        idx = np.arange(start, stop)
+        if shuffle:
+            idx = rng.permutation(idx)
+        for i in range(0, len(idx), batch_size):
+            sel = idx[i:i + batch_size]
+            xb = np.ascontiguousarray(X[sel])
+            yb = y[sel]
+            if symbol_id is None:
+                yield xb, yb
+            else:
+                yield (xb, np.full(len(sel), symbol_id, dtype=np.int32)), yb
 
-if len(X_test) == 0:
-    raise ValueError("[-ERROR-] Not enough data for the chosen LOOKBACK/TRAIN_RATIO.")
+    x_spec = tf.TensorSpec((None, lookback, features), tf.float32)
+    if symbol_id is not None:
+        x_spec = (x_spec, tf.TensorSpec((None,), tf.int32))
+    signature = (x_spec, tf.TensorSpec((None, y.shape[1]), tf.float32))
+
+    return tf.data.Dataset.from_generator(batches, output_signature=signature).prefetch(tf.data.AUTOTUNE)
 
 #--------------BUILD LSTM MODEL------------------
-model = keras.Sequential()
-model.add(
-    keras.layers.LSTM(
-        units=50,
-        activation="tanh",
-        return_sequences=False,
-        input_shape=(LOOKBACK, 1)
-    )
-)
-model.add(keras.layers.Dense(1))
-model.compile(optimizer="adam", loss="mse")
-model.summary()
-
-print("[-INFO-] Training LSTM model...")
-history = model.fit(
-    X_train,
-    y_train,
-    epochs=EPOCHS,
-    batch_size=BATCH_SIZE,
-    validation_data=(X_test, y_test),
-    verbose=1
-)
-
-#----------------PREDICTION----------------------
-y_pred_scaled = model.predict(X_test)
-y_test_inv = scaler.inverse_transform(y_test)
-y_pred_inv = scaler.inverse_transform(y_pred_scaled)
+def build_model(lookback=LOOKBACK, n_symbols=None, embedding_dim=EMBEDDING_DIM):
+    """
+    The original single-coin LSTM, or with n_symbols set, one shared model
+    whose symbol embedding is appended to every timestep.
+    """
+    if n_symbols is None:
+        model = keras.Sequential()
+        model.add(
+            keras.layers.LSTM(
+                units=50,
+                activation="tanh",
+                return_sequences=False,
+                input_shape=(lookback, 1)
+            )
+        )
+        model.add(keras.layers.Dense(1))
+    else:
+        prices_in = keras.Input(shape=(lookback, 1), name="prices")
+        symbol_in = keras.Input(shape=(), dtype="int32", name="symbol")
+        emb = keras.layers.Embedding(n_symbols, embedding_dim)(symbol_in)
+        emb = keras.layers.RepeatVector(lookback)(emb)
+        x = keras.layers.Concatenate()([prices_in, emb])
+        x = keras.layers.LSTM(units=50, activation="tanh")(x)
+        model = keras.Model([prices_in, symbol_in], keras.layers.Dense(1)(x))
+
+    model.compile(optimizer="adam", loss="mse")
+    return model
 
 #------------------METRICS----------------------
-rmse = np.sqrt(mean_squared_error(y_test_inv, y_pred_inv))
-mape = mean_absolute_percentage_error(y_test_inv, y_pred_inv)
-r2 = r2_score(y_test_inv, y_pred_inv)
-
-print("\n========== LSTM RESULTS ==========")
-print(f"Coin:           {COIN_SYMBOL}")
-print(f"Lookback:       {LOOKBACK} days")
-print(f"Train/Test:     {int(TRAIN_RATIO*100)}% / {int((1-TRAIN_RATIO)*100)}%")
-print(f"RMSE:           {rmse:.4f}")
-print(f"MAPE:           {mape:.4f}")
-print(f"R-squared (R²): {r2:.4f}")
-print("==================================\n")
+def evaluate(y_true_scaled, y_pred_scaled, scaler):
+    y_true = scaler.inverse_transform(y_true_scaled)
+    y_pred = scaler.inverse_transform(y_pred_scaled)
+    return {
+        "rmse": float(np.sqrt(mean_squared_error(y_true, y_pred))),
+        "mape": float(mean_absolute_percentage_error(y_true, y_pred)),
+        "r2": float(r2_score(y_true, y_pred)),
+    }, y_true, y_pred
+
+#------------------TRAINING---------------------
+def train_coin(symbol, prices, lookback=LOOKBACK, train_ratio=TRAIN_RATIO,
+               epochs=EPOCHS, batch_size=BATCH_SIZE, verbose=0, register=False):
+    """
+    Trains and evaluates one coin. Returns (result, model, scaler, y_test, y_pred),
+    where result holds the metrics and the seconds spent on the coin.
+    With register=True the model and its scaler are saved to the registry.
+    """
+    started = time.perf_counter()
+    scaler, X, y, train_size = prepare_coin(prices, lookback, train_ratio)
+
+    model = build_model(lookback)
+    model.fit(
+        make_dataset(X, y, 0, train_size, batch_size, shuffle=True),
+        epochs=epochs,
+        validation_data=make_dataset(X, y, train_size, batch_size=batch_size),
+        verbose=verbose,
+    )
+
+    y_pred_scaled = model.predict(make_dataset(X, y, train_size, batch_size=batch_size), verbose=0)
+    metrics, y_test, y_pred = evaluate(y[train_size:], y_pred_scaled, scaler)
+
+    result = {
+        "symbol": symbol,
+        "train_samples": train_size,
+        "test_samples": len(X) - train_size,
+        **metrics,
+        "seconds": time.perf_counter() - started,
+    }
+    if register:
+        result["version"] = save_model(symbol, model, {symbol: scaler}, lookback, metrics)
+    return result, model, scaler, y_test, y_pred
+
+
+def _init_worker():
+    # еден TF thread по процес, workers се паралелизмот
+    tf.config.threading.set_intra_op_parallelism_threads(1)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def _train_coin_worker(args):
+    symbol, prices, kwargs = args
+    return train_coin(symbol, prices, **kwargs)[0]
+
+
+def train_shared(prices, lookback=LOOKBACK, train_ratio=TRAIN_RATIO, epochs=EPOCHS,
+                 batch_size=BATCH_SIZE, embedding_dim=EMBEDDING_DIM, verbose=0,
+                 register=False):
+    """
+    One model for every coin, with a symbol embedding. Each coin keeps its
+    own scaler. Returns (results, model, scalers, symbol_ids); a coin's
+    seconds are its evaluation time plus its share of training time,
+    split by training samples.
+    """
+    symbols = sorted(prices)
+    symbol_ids = {symbol: i for i, symbol in enumerate(symbols)}
+    prepared = {symbol: prepare_coin(prices[symbol], lookback, train_ratio) for symbol in symbols}
+
+    def datasets(train):
+        out = []
+        for symbol, (_, X, y, train_size) in prepared.items():
+            start, stop = (0, train_size) if train else (train_size, None)
+            out.append(make_dataset(X, y, start, stop, batch_size, shuffle=train,
+                                    symbol_id=symbol_ids[symbol]))
+        return out
+
+    model = build_model(lookback, n_symbols=len(symbols), embedding_dim=embedding_dim)
+
+    started = time.perf_counter()
+    train_ds = tf.data.Dataset.sample_from_datasets(datasets(train=True), stop_on_empty_dataset=False)
+    val_ds = tf.data.Dataset.sample_from_datasets(datasets(train=False), stop_on_empty_dataset=False)
+    model.fit(train_ds, epochs=epochs, validation_data=val_ds, verbose=verbose)
+    train_seconds = time.perf_counter() - started
+    total_samples = sum(p[3] for p in prepared.values())
+
+    results, scalers = [], {}
+    for symbol, (scaler, X, y, train_size) in prepared.items():
+        started = time.perf_counter()
+        y_pred_scaled = model.predict(
+            make_dataset(X, y, train_size, batch_size=batch_size, symbol_id=symbol_ids[symbol]),
+            verbose=0,
+        )
+        metrics, _, _ = evaluate(y[train_size:], y_pred_scaled, scaler)
+        scalers[symbol] = scaler
+        results.append({
+            "symbol": symbol,
+            "train_samples": train_size,
+            "test_samples": len(X) - train_size,
+            **metrics,
+            "seconds": time.perf_counter() - started + train_seconds * train_size / total_samples,
+        })
+
+    if register:
+        metrics = {r["symbol"]: {k: r[k] for k in ("rmse", "mape", "r2")} for r in results}
+        version = save_model(SHARED, model, scalers, lookback, metrics, symbol_ids)
+        for r in results:
+            r["version"] = version
+    return results, model, scalers, symbol_ids
+
+
+def train_many(symbols=None, mode="per_coin", workers=1, csv_path=DATA_PATH, **kwargs):
+    """
+    Trains and evaluates many coins in one run and returns one row of
+    metrics and seconds per coin.
+
+    mode="per_coin": a separate model per coin, spread over `workers`
+    processes. mode="shared": a single model with a symbol embedding.
+    """
+    prices = load_prices(csv_path, symbols)
+
+    if mode == "shared":
+        results = train_shared(prices, **kwargs)[0]
+    elif mode != "per_coin":
+        raise ValueError(f"Unknown training mode: {mode}")
+    elif workers <= 1:
+        results = [train_coin(symbol, p, **kwargs)[0] for symbol, p in prices.items()]
+    else:
+        # spawn: TensorFlow не е безбеден после fork
+        ctx = multiprocessing.get_context("spawn")
+        tasks = [(symbol, p, kwargs) for symbol, p in prices.items()]
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker) as ex:
+            results = list(ex.map(_train_coin_worker, tasks))
+
+    return pd.DataFrame(results).set_index("symbol")
 
 #--------------PLOT REAL vs PREDICTED-----------
-plt.figure(figsize=(10, 5))
-plt.plot(y_test_inv, label="Real price")
-plt.plot(y_pred_inv, label="Predicted price")
-plt.title(f"LSTM price prediction for {COIN_SYMBOL}")
-plt.xlabel("Time step (test set)")
-plt.ylabel("Price")
-plt.legend()
-plt.tight_layout()
-plt.show()
+def plot_predictions(symbol, y_test_inv, y_pred_inv):
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 5))
+    plt.plot(y_test_inv, label="Real price")
+    plt.plot(y_pred_inv, label="Predicted price")
+    plt.title(f"LSTM price prediction for {symbol}")
+    plt.xlabel("Time step (test set)")
+    plt.ylabel("Price")
+    plt.legend()
+    plt.tight_layout()
+    plt.show()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the LSTM price model.")
+    parser.add_argument("symbols", nargs="*", default=[COIN_SYMBOL])
+    parser.add_argument("--all", action="store_true", help="train every coin in the CSV")
+    parser.add_argument("--mode", choices=["per_coin", "shared"], default="per_coin")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--save", action="store_true", help="publish the models to the registry")
+    parser.add_argument("--plot", action="store_true", help="plot real vs predicted (single coin)")
+    args = parser.parse_args()
+
+    symbols = None if args.all else args.symbols
+
+    if symbols is not None and len(symbols) == 1:
+        symbol = symbols[0]
+        prices = load_prices(DATA_PATH, symbols)[symbol]
+        print(f"[-INFO-] Loaded {len(prices)} price points for {symbol}")
+
+        result, model, _, y_test_inv, y_pred_inv = train_coin(
+            symbol, prices, epochs=args.epochs, verbose=1, register=args.save
+        )
+        model.summary()
+
+        print("\n========== LSTM RESULTS ==========")
+        print(f"Coin:           {symbol}")
+        print(f"Lookback:       {LOOKBACK} days")
+        print(f"Train/Test:     {int(TRAIN_RATIO*100)}% / {int((1-TRAIN_RATIO)*100)}%")
+        print(f"RMSE:           {result['rmse']:.4f}")
+        print(f"MAPE:           {result['mape']:.4f}")
+        print(f"R-squared (R²): {result['r2']:.4f}")
+        print(f"Seconds:        {result['seconds']:.1f}")
+        if args.save:
+            print(f"Registered:     {symbol} {result['version']}")
+        print("==================================\n")
+
+        if args.plot:
+            plot_predictions(symbol, y_test_inv, y_pred_inv)
+        return
+
+    results = train_many(symbols, mode=args.mode, workers=args.workers,
+                         epochs=args.epochs, register=args.save)
+    print("\n========== LSTM RESULTS ==========")
+    print(results.to_string(float_format=lambda v: f"{v:.4f}"))
+    print(f"Total seconds:  {results['seconds'].sum():.1f}")
+    print("==================================\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+# Versioned local registry for the LSTM price models. Every save goes into
+# models/lstm/<name>/v<ns>/ (model.keras + meta.json) and LATEST is swapped
+# atomically, the same way market/ohlcv_store.py publishes its versions.
+# <name> is a coin symbol for per-coin models or SHARED for the multi-coin one.
+
+REGISTRY_DIR = os.path.join("models", "lstm")
+SHARED = "_shared"
+KEEP_VERSIONS = 3
+
+
+def scaler_params(scaler):
+    """MinMaxScaler as plain floats, so inference does not need sklearn."""
+    return {
+        "min": [float(v) for v in scaler.min_],
+        "scale": [float(v) for v in scaler.scale_],
+        "data_min": [float(v) for v in scaler.data_min_],
+        "data_max": [float(v) for v in scaler.data_max_],
+    }
+
+
+def scale(values, params):
+    return np.asarray(values, dtype=np.float64) * params["scale"] + params["min"]
+
+
+def unscale(values, params):
+    return (np.asarray(values, dtype=np.float64) - params["min"]) / params["scale"]
+
+
+# -------- WRITE -------- #
+
+def save_model(name, model, scalers, lookback, metrics=None, symbol_ids=None,
+               path=REGISTRY_DIR):
+    """
+    scalers: {symbol: fitted MinMaxScaler}. symbol_ids is only set for the
+    shared model. Returns the new version.
+    """
+    model_dir = os.path.join(path, name)
+    version = f"v{time.time_ns()}"
+    version_dir = os.path.join(model_dir, version)
+    os.makedirs(version_dir)
+
+    model.save(os.path.join(version_dir, "model.keras"))
+    meta = {
+        "name": name,
+        "version": version,
+        "lookback": lookback,
+        "trained_at": time.time(),
+        "scalers": {symbol: scaler_params(s) for symbol, s in scalers.items()},
+        "symbol_ids": symbol_ids,
+        "metrics": metrics or {},
+    }
+    with open(os.path.join(version_dir, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+    tmp = os.path.join(model_dir, f"LATEST.{os.getpid()}")
+    with open(tmp, "w") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(model_dir, "LATEST"))
+
+    _prune_versions(model_dir, version)
+    return version
+
+
+def _prune_versions(model_dir, current):
+    older = sorted(
+        name for name in os.listdir(model_dir)
+        if name.startswith("v") and name != current
+    )
+    for name in older[:max(len(older) - (KEEP_VERSIONS - 1), 0)]:
+        shutil.rmtree(os.path.join(model_dir, name), ignore_errors=True)
+
+
+# -------- READ -------- #
+
+def registered_models(path=REGISTRY_DIR):
+    """Names that have a published (LATEST) version."""
+    if not os.path.isdir(path):
+        return []
+    return sorted(
+        name for name in os.listdir(path)
+        if os.path.exists(os.path.join(path, name, "LATEST"))
+    )
+
+
+def latest_version(name, path=REGISTRY_DIR):
+    try:
+        with open(os.path.join(path, name, "LATEST")) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def load_meta(name, version=None, path=REGISTRY_DIR):
+    version = version or latest_version(name, path)
+    if version is None:
+        return None
+    with open(os.path.join(path, name, version, "meta.json")) as f:
+        return json.load(f)
+
+
+def load_model(name, version=None, path=REGISTRY_DIR):
+    """(keras model, meta) of a version (LATEST by default), or None."""
+    meta = load_meta(name, version, path)
+    if meta is None:
+        return None
+
+    from tensorflow import keras
+
+    model = keras.models.load_model(
+        os.path.join(path, name, meta["version"], "model.keras"), compile=False
+    )
+    return model, meta
@@ -1,10 +1,34 @@
-import sqlite3
-import requests
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+import threading
+
+import numpy as np
+import pandas as pd
+
+from db import repository
+from db.pool import get_pool
 
-COINGECKO_API = "https://api.coingecko.com/api/v3"
 ETH_HASH_RATE = 120_000_000
 
+# колоните од analysis_results_coingecko*.csv
+RESULT_COLUMNS = [
+    "symbol", "price", "volume", "market_cap", "whale_movements", "exchange_flow",
+    "active_addresses", "tx_count", "hash_rate", "tvl", "nvt", "mvrv", "sentiment",
+]
+
+
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+
+def sentiment_analyzer():
+    """One VADER analyzer per process, its lexicon is loaded on first use."""
+    global _analyzer
+    if _analyzer is None:
+        with _analyzer_lock:
+            if _analyzer is None:
+                from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+                _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
 
 class OnChainAnalysis:
     """
@@ -13,26 +37,25 @@ class OnChainAnalysis:
 
     def __init__(self, coin_symbol="BTC"):
         self.coin_symbol = coin_symbol
-        self.analyzer = SentimentIntensityAnalyzer()
+        self._remote = None
+
+    @property
+    def analyzer(self):
+        return sentiment_analyzer()
 
     def analyze(self, return_results=False):
-        conn = sqlite3.connect("users.db")
-        cur = conn.cursor()
-
-        # -------- Latest price & volume --------
-        cur.execute(
-            "SELECT close, volume FROM coins WHERE symbol=? ORDER BY time DESC LIMIT 1",
-            (self.coin_symbol,)
-        )
-        row = cur.fetchone()
-        conn.close()
-
-        price, volume = row if row else (0, 0)
-        market_cap = price * volume
+        # една конекција за целиот analyze(), helpers ја добиваат истата
+        with get_pool().connection() as conn:
+            # -------- Latest price & volume --------
+            row = repository.latest_close_volume(conn, self.coin_symbol)
+
+            price, volume = row if row else (0, 0)
+            market_cap = price * volume
+
+            # -------- On-chain proxies --------
+            whale_movements = self._whale_movements()
+            exchange_flows = self._exchange_flows()
 
-        # -------- On-chain proxies --------
-        whale_movements = self._whale_movements()
-        exchange_flows = self._exchange_flows()
         active_addresses = self._active_addresses()
         transactions = self._transactions()
         tvl = self._tvl()
@@ -62,60 +85,86 @@ class OnChainAnalysis:
         if return_results:
             return results
 
+    @classmethod
+    def analyze_many(cls, symbols=None, fetch_remote=False):
+        """
+        Scores every symbol in one pass: price, volume, whale counts and
+        exchange flows come from one grouped query, the ratios are computed
+        column-wise. Returns a DataFrame with RESULT_COLUMNS.
+        With fetch_remote=False the CoinGecko fields are left at 0.
+        """
+        with get_pool().connection() as conn:
+            agg = repository.symbol_aggregates(conn, symbols)
+
+        if symbols is None:
+            agg = agg.sort_values("symbol", kind="stable").reset_index(drop=True)
+        else:
+            agg = agg.set_index("symbol").reindex(list(symbols)).fillna(0).reset_index()
+
+        price = agg["price"].to_numpy(dtype=np.float64)
+        volume = agg["volume"].to_numpy(dtype=np.float64)
+        market_cap = price * volume
+        ratio = np.divide(market_cap, volume, out=np.zeros_like(market_cap), where=volume != 0)
+
+        results = pd.DataFrame({
+            "symbol": agg["symbol"],
+            "price": price,
+            "volume": volume,
+            "market_cap": market_cap,
+            "whale_movements": agg["whale_movements"].astype("int64"),
+            "exchange_flow": agg["exchange_flow"].astype("float64"),
+            "active_addresses": 0,
+            "tx_count": 0,
+            "hash_rate": ETH_HASH_RATE,
+            "tvl": 0.0,
+            "nvt": ratio,
+            "mvrv": ratio,
+        })
+
+        analyzer = sentiment_analyzer()
+        results["sentiment"] = [
+            analyzer.polarity_scores(f"{s} crypto market news")["compound"]
+            for s in results["symbol"]
+        ]
+
+        if fetch_remote:
+            # aiohttp се вчитува само кога навистина се повикува CoinGecko
+            from analysis.coingecko_client import fetch_onchain_fields
+
+            remote = pd.DataFrame.from_dict(
+                fetch_onchain_fields(list(results["symbol"])), orient="index"
+            )
+            for col in ("active_addresses", "tx_count", "tvl"):
+                results[col] = results["symbol"].map(remote[col]).fillna(0).to_numpy()
+
+        return results[RESULT_COLUMNS]
+
     # ---------- helpers ----------
 
-    def _whale_movements(self, threshold=1000):
-        conn = sqlite3.connect("users.db")
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT COUNT(*) FROM coins WHERE symbol=? AND volume>=?",
-            (self.coin_symbol, threshold)
-        )
-        count = cur.fetchone()[0]
-        conn.close()
-        return count
+    def _whale_movements(self, threshold=repository.WHALE_VOLUME):
+        with get_pool().connection() as conn:
+            return repository.whale_count(conn, self.coin_symbol, threshold)
 
     def _exchange_flows(self):
-        conn = sqlite3.connect("users.db")
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT SUM(volume) FROM coins WHERE symbol=?",
-            (self.coin_symbol,)
-        )
-        val = cur.fetchone()[0]
-        conn.close()
-        return val or 0
+        with get_pool().connection() as conn:
+            return repository.total_volume(conn, self.coin_symbol)
+
+    def _remote_fields(self):
+        # еден batch повик за сите три полиња, /defi/tvl доаѓа од cache
+        if self._remote is None:
+            from analysis.coingecko_client import fetch_onchain_fields
+
+            self._remote = fetch_onchain_fields([self.coin_symbol])[self.coin_symbol]
+        return self._remote
 
     def _active_addresses(self):
-        try:
-            r = requests.get(
-                f"{COINGECKO_API}/coins/{self.coin_symbol.lower()}",
-                timeout=10
-            ).json()
-            return r.get("community_data", {}).get("twitter_followers", 0)
-        except:
-            return 0
+        return self._remote_fields()["active_addresses"]
 
     def _transactions(self):
-        try:
-            r = requests.get(
-                f"{COINGECKO_API}/coins/markets",
-                params={"vs_currency": "usd", "ids": self.coin_symbol.lower()},
-                timeout=10
-            ).json()
-            return int(r[0].get("total_volume", 0)) if r else 0
-        except:
-            return 0
+        return self._remote_fields()["tx_count"]
 
     def _tvl(self):
-        try:
-            r = requests.get(f"{COINGECKO_API}/defi/tvl", timeout=10).json()
-            for d in r:
-                if d["id"].lower() == self.coin_symbol.lower():
-                    return float(d.get("tvl", 0))
-        except:
-            pass
-        return 0
+        return self._remote_fields()["tvl"]
 
     def _sentiment_score(self):
         text = f"{self.coin_symbol} crypto market news"
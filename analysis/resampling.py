@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+
+# OHLCV resampling per symbol. Buckets are computed straight from the unix
+# `time` column, and every (symbol, bucket) group is reduced in one pass
+# with ufunc.reduceat, so symbols never get mixed together.
+
+TIMEFRAMES = ("1D", "1W", "1M")
+
+BAR_COLUMNS = ["symbol", "bucket", "open", "high", "low", "close", "volume"]
+
+DAY = 86_400
+
+
+def bucket_start(times, timeframe):
+    """Start of the bucket (unix seconds) for every time. Weeks start on Monday."""
+    times = np.asarray(times, dtype=np.int64)
+    days = times // DAY
+    if timeframe == "1D":
+        return days * DAY
+    if timeframe == "1W":
+        # 1970-01-01 е четврток, +3 ги поместува неделите да почнуваат во понеделник
+        return ((days + 3) // 7 * 7 - 3) * DAY
+    if timeframe == "1M":
+        months = times.astype("datetime64[s]").astype("datetime64[M]")
+        return months.astype("datetime64[s]").astype(np.int64)
+    raise ValueError(f"Unknown timeframe: {timeframe}")
+
+
+def _reduce(symbols, buckets, open_, high, low, close, volume):
+    """Input sorted by symbol, then time. Returns one bar per (symbol, bucket)."""
+    if len(symbols) == 0:
+        return pd.DataFrame(columns=BAR_COLUMNS)
+
+    change = np.r_[True, (symbols[1:] != symbols[:-1]) | (buckets[1:] != buckets[:-1])]
+    starts = np.flatnonzero(change)
+    ends = np.r_[starts[1:], len(symbols)] - 1
+
+    return pd.DataFrame({
+        "symbol": symbols[starts],
+        "bucket": buckets[starts],
+        "open": open_[starts],
+        "high": np.maximum.reduceat(high, starts),
+        "low": np.minimum.reduceat(low, starts),
+        "close": close[ends],
+        "volume": np.add.reduceat(volume, starts),
+    })
+
+
+def resample_ohlcv(df, timeframe):
+    """
+    open=first, high=max, low=min, close=last, volume=sum per symbol and
+    bucket. df needs symbol, time, open, high, low, close, volume.
+    """
+    ordered = df.sort_values(["symbol", "time"], kind="stable")
+    return _reduce(
+        ordered["symbol"].to_numpy(),
+        bucket_start(ordered["time"].to_numpy(), timeframe),
+        *(ordered[c].to_numpy(dtype=np.float64) for c in ("open", "high", "low", "close", "volume")),
+    )
+
+
+def _merge_bars(bars, fresh):
+    # новите свеќи можат да го продолжат само последниот (отворен) bar на секој symbol
+    if bars.empty:
+        return fresh
+    if fresh.empty:
+        return bars
+
+    touched = bars["symbol"].isin(set(fresh["symbol"]))
+    is_last = ~bars["symbol"].duplicated(keep="last")
+    open_bars = bars[touched & is_last]
+
+    combined = pd.concat([open_bars, fresh], ignore_index=True)
+    combined = combined.sort_values(["symbol", "bucket"], kind="stable")
+    merged = _reduce(
+        combined["symbol"].to_numpy(),
+        combined["bucket"].to_numpy(),
+        *(combined[c].to_numpy(dtype=np.float64) for c in ("open", "high", "low", "close", "volume")),
+    )
+
+    kept = bars[~(touched & is_last)]
+    return pd.concat([kept, merged], ignore_index=True).sort_values(
+        ["symbol", "bucket"], kind="stable", ignore_index=True
+    )
+
+
+class ResampleCache:
+    """
+    Higher-timeframe bars for every symbol, kept in memory. extend() only
+    touches the open bucket of the symbols that got new candles.
+    """
+
+    def __init__(self, timeframes=TIMEFRAMES):
+        self.bars = {tf: pd.DataFrame(columns=BAR_COLUMNS) for tf in timeframes}
+        self._index = {tf: {} for tf in timeframes}
+
+    @classmethod
+    def from_frame(cls, df, timeframes=TIMEFRAMES):
+        cache = cls(timeframes)
+        cache.extend(df)
+        return cache
+
+    @classmethod
+    def from_store(cls, store, timeframes=TIMEFRAMES):
+        """Builds straight from an OHLCVStore's column arrays, no DataFrame of candles."""
+        cache = cls(timeframes)
+        if not store.index:
+            return cache
+
+        bounds = np.array(list(store.index.values()), dtype=np.int64)
+        order = np.argsort(bounds[:, 0])
+        symbols = np.array(list(store.index), dtype=object)[order]
+        positions = np.concatenate([np.arange(start, end) for start, end in bounds[order]])
+        per_row = np.repeat(symbols, bounds[order, 1] - bounds[order, 0])
+
+        cols = {c: np.asarray(store.columns[c])[positions] for c in store.columns}
+        values = [cols[c].astype(np.float64) for c in ("open", "high", "low", "close", "volume")]
+        for tf in cache.bars:
+            bars = _reduce(per_row, bucket_start(cols["time"], tf), *values)
+            cache.bars[tf] = bars.sort_values(["symbol", "bucket"], kind="stable", ignore_index=True)
+            cache._reindex(tf)
+        return cache
+
+    def copy(self):
+        """Shallow copy; extend() on it leaves this cache untouched."""
+        other = type(self).__new__(type(self))
+        other.bars = dict(self.bars)
+        other._index = dict(self._index)
+        return other
+
+    def extend(self, new_rows):
+        """new_rows must be newer than what the cache has already seen."""
+        for tf in self.bars:
+            self.bars[tf] = _merge_bars(self.bars[tf], resample_ohlcv(new_rows, tf))
+            self._reindex(tf)
+
+    def _reindex(self, tf):
+        symbols = self.bars[tf]["symbol"].to_numpy()
+        if len(symbols) == 0:
+            self._index[tf] = {}
+            return
+        bounds = np.flatnonzero(np.r_[True, symbols[1:] != symbols[:-1], True])
+        self._index[tf] = {
+            symbols[start]: (start, end) for start, end in zip(bounds[:-1], bounds[1:])
+        }
+
+    def get(self, symbol, timeframe):
+        """Bars of one symbol, oldest first, or None if the symbol is unknown."""
+        bounds = self._index[timeframe].get(symbol)
+        if bounds is None:
+            return None
+        return self.bars[timeframe].iloc[bounds[0]:bounds[1]]
@@ -0,0 +1,432 @@
+import json
+import os
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from analysis.technical_analysis import generate_signals
+
+# Stateful versions of the indicators in technical_analysis.add_indicators.
+# Every indicator keeps only the carry-over state it needs (last EMA value,
+# Wilder sums, the last `window` values for the rolling ones), so a new
+# candle costs a constant amount of work no matter how long the history is.
+# The formulas follow the `ta` library, including its warm-up behaviour,
+# so the output matches add_indicators() to floating point tolerance.
+
+STATE_DIR = os.path.join("data", "indicator_state")
+
+NAN = float("nan")
+
+INDICATOR_COLUMNS = [
+    "RSI", "MACD", "MACD_signal", "Stochastic", "ADX", "CCI",
+    "SMA_20", "EMA_20", "WMA_20", "BB_upper", "BB_lower", "Volume_SMA_20",
+]
+
+
+class _Indicator:
+    # атрибути кои се deque, за да се вратат правилно од JSON
+    _deques = ()
+
+    def state(self):
+        return {
+            k: list(v) if isinstance(v, deque) else v
+            for k, v in self.__dict__.items()
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        obj = cls.__new__(cls)
+        for k, v in state.items():
+            if k in cls._deques:
+                v = deque(v, maxlen=state["window"])
+            setattr(obj, k, v)
+        return obj
+
+
+# -------- MOVING AVERAGES -------- #
+
+class EMA(_Indicator):
+    """span-based EMA, adjust=False, NaN until `window` values were seen."""
+
+    def __init__(self, window):
+        self.window = window
+        self.alpha = 2.0 / (window + 1)
+        self.value = None
+        self.count = 0
+
+    def update(self, x):
+        if self.value is None:
+            self.value = x
+        else:
+            self.value = self.value + self.alpha * (x - self.value)
+        self.count += 1
+        return self.value if self.count >= self.window else NAN
+
+
+class SMA(_Indicator):
+    _deques = ("values",)
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+
+    def update(self, x):
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(x)
+        self.total += x
+        return self.total / self.window if len(self.values) == self.window else NAN
+
+
+class WMA(_Indicator):
+    """Linear weights 1..window, running numerator instead of a dot product."""
+
+    _deques = ("values",)
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.weighted = 0.0
+
+    def update(self, x):
+        if len(self.values) == self.window:
+            self.weighted += self.window * x - self.total
+            self.total += x - self.values[0]
+        else:
+            self.weighted += (len(self.values) + 1) * x
+            self.total += x
+        self.values.append(x)
+        if len(self.values) < self.window:
+            return NAN
+        return self.weighted * 2 / (self.window * (self.window + 1))
+
+
+class Bollinger(_Indicator):
+    _deques = ("values",)
+
+    def __init__(self, window=20, window_dev=2):
+        self.window = window
+        self.window_dev = window_dev
+        self.values = deque(maxlen=window)
+
+    def update(self, x):
+        self.values.append(x)
+        if len(self.values) < self.window:
+            return NAN, NAN
+        arr = np.fromiter(self.values, dtype=np.float64, count=self.window)
+        mavg = arr.mean()
+        mstd = arr.std()
+        return mavg + self.window_dev * mstd, mavg - self.window_dev * mstd
+
+
+# -------- OSCILLATORS -------- #
+
+class MACD(_Indicator):
+    def __init__(self, window_slow=26, window_fast=12, window_sign=9):
+        self.window_slow = window_slow
+        self.fast = EMA(window_fast)
+        self.slow = EMA(window_slow)
+        self.signal = EMA(window_sign)
+        self.count = 0
+
+    def update(self, x):
+        fast = self.fast.update(x)
+        slow = self.slow.update(x)
+        self.count += 1
+
+        if self.count < self.window_slow:
+            return NAN, NAN
+        # сигналната EMA почнува од првата валидна MACD вредност
+        macd = fast - slow
+        return macd, self.signal.update(macd)
+
+    def state(self):
+        return {
+            "window_slow": self.window_slow,
+            "count": self.count,
+            "fast": self.fast.state(),
+            "slow": self.slow.state(),
+            "signal": self.signal.state(),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        obj = cls.__new__(cls)
+        obj.window_slow = state["window_slow"]
+        obj.count = state["count"]
+        obj.fast = EMA.from_state(state["fast"])
+        obj.slow = EMA.from_state(state["slow"])
+        obj.signal = EMA.from_state(state["signal"])
+        return obj
+
+
+class RSI(_Indicator):
+    """Wilder smoothing (alpha = 1/window), as ta.momentum.RSIIndicator."""
+
+    def __init__(self, window=14):
+        self.window = window
+        self.prev_close = None
+        self.up = None
+        self.down = None
+        self.count = 0
+
+    def update(self, close):
+        diff = 0.0 if self.prev_close is None else close - self.prev_close
+        self.prev_close = close
+        up = diff if diff > 0 else 0.0
+        down = -diff if diff < 0 else 0.0
+
+        alpha = 1.0 / self.window
+        if self.up is None:
+            self.up, self.down = up, down
+        else:
+            self.up += alpha * (up - self.up)
+            self.down += alpha * (down - self.down)
+        self.count += 1
+
+        if self.count < self.window:
+            return NAN
+        if self.down == 0:
+            return 100.0
+        return 100 - 100 / (1 + self.up / self.down)
+
+
+class Stochastic(_Indicator):
+    _deques = ("highs", "lows")
+
+    def __init__(self, window=14):
+        self.window = window
+        self.highs = deque(maxlen=window)
+        self.lows = deque(maxlen=window)
+
+    def update(self, high, low, close):
+        self.highs.append(high)
+        self.lows.append(low)
+        if len(self.highs) < self.window:
+            return NAN
+        smin = min(self.lows)
+        smax = max(self.highs)
+        if smax == smin:
+            return NAN
+        return 100 * (close - smin) / (smax - smin)
+
+
+class CCI(_Indicator):
+    _deques = ("values",)
+
+    def __init__(self, window=20, constant=0.015):
+        self.window = window
+        self.constant = constant
+        self.values = deque(maxlen=window)
+
+    def update(self, high, low, close):
+        tp = (high + low + close) / 3.0
+        self.values.append(tp)
+        if len(self.values) < self.window:
+            return NAN
+        arr = np.fromiter(self.values, dtype=np.float64, count=self.window)
+        mean = arr.mean()
+        mad = np.abs(arr - mean).mean()
+        if mad == 0:
+            return NAN
+        return (tp - mean) / (self.constant * mad)
+
+
+class ADX(_Indicator):
+    """
+    Mirrors ta.trend.ADXIndicator: Wilder-smoothed TR/+DM/-DM seeded with
+    the sum of the first `window` values, ADX seeded with the mean of the
+    first `window` DX values and reported as 0 before that.
+    """
+
+    def __init__(self, window=14):
+        self.window = window
+        self.t = -1
+        self.prev = None
+        self.trs = self.dip = self.din = 0.0
+        self.dx_sum = 0.0
+        self.adx = 0.0
+
+    def update(self, high, low, close):
+        self.t += 1
+        w = self.window
+        if self.prev is None:
+            self.prev = (high, low, close)
+            return 0.0
+
+        prev_high, prev_low, prev_close = self.prev
+        self.prev = (high, low, close)
+
+        tr = max(high, prev_close) - min(low, prev_close)
+        diff_up = high - prev_high
+        diff_down = prev_low - low
+        pos = diff_up if (diff_up > diff_down and diff_up > 0) else 0.0
+        neg = diff_down if (diff_down > diff_up and diff_down > 0) else 0.0
+
+        if self.t <= w:
+            self.trs += tr
+            self.dip += pos
+            self.din += neg
+            if self.t < w:
+                return 0.0
+        else:
+            self.trs += tr - self.trs / w
+            self.dip += pos - self.dip / w
+            self.din += neg - self.din / w
+
+        dip = 100 * self.dip / self.trs if self.trs != 0 else 0.0
+        din = 100 * self.din / self.trs if self.trs != 0 else 0.0
+        dx = 100 * abs((dip - din) / (dip + din)) if dip + din != 0 else 0.0
+
+        if self.t < 2 * w - 1:
+            self.dx_sum += dx
+            return 0.0
+        if self.t == 2 * w - 1:
+            self.adx = (self.dx_sum + dx) / w
+        else:
+            self.adx = (self.adx * (w - 1) + dx) / w
+        return self.adx
+
+
+# -------- PER-SYMBOL STATE -------- #
+
+_INDICATORS = {
+    "rsi": RSI,
+    "macd": MACD,
+    "stoch": Stochastic,
+    "adx": ADX,
+    "cci": CCI,
+    "sma": SMA,
+    "ema": EMA,
+    "wma": WMA,
+    "bb": Bollinger,
+    "volume_sma": SMA,
+}
+
+
+class StreamingIndicators:
+    """
+    All add_indicators() columns for one symbol, advanced one candle
+    at a time. state()/from_state() round-trip through JSON.
+    """
+
+    def __init__(self):
+        self.last_time = None
+        self.ind = {
+            "rsi": RSI(14),
+            "macd": MACD(),
+            "stoch": Stochastic(14),
+            "adx": ADX(14),
+            "cci": CCI(20),
+            "sma": SMA(20),
+            "ema": EMA(20),
+            "wma": WMA(20),
+            "bb": Bollinger(20, 2),
+            "volume_sma": SMA(20),
+        }
+
+    def update(self, time, high, low, close, volume):
+        self.last_time = int(time)
+        ind = self.ind
+        macd, macd_signal = ind["macd"].update(close)
+        bb_upper, bb_lower = ind["bb"].update(close)
+        return {
+            "RSI": ind["rsi"].update(close),
+            "MACD": macd,
+            "MACD_signal": macd_signal,
+            "Stochastic": ind["stoch"].update(high, low, close),
+            "ADX": ind["adx"].update(high, low, close),
+            "CCI": ind["cci"].update(high, low, close),
+            "SMA_20": ind["sma"].update(close),
+            "EMA_20": ind["ema"].update(close),
+            "WMA_20": ind["wma"].update(close),
+            "BB_upper": bb_upper,
+            "BB_lower": bb_lower,
+            "Volume_SMA_20": ind["volume_sma"].update(volume),
+        }
+
+    def update_frame(self, df):
+        """Advances over the candles in df newer than last_time, returns their rows."""
+        if self.last_time is not None:
+            df = df[df["time"] > self.last_time]
+        df = df.sort_values("time")
+
+        rows = [
+            self.update(t, h, l, c, v)
+            for t, h, l, c, v in zip(
+                df["time"], df["high"].astype(float), df["low"].astype(float),
+                df["close"].astype(float), df["volume"].astype(float),
+            )
+        ]
+        out = df.copy()
+        if rows:
+            values = pd.DataFrame(rows, index=df.index)
+            out[values.columns] = values
+        return out
+
+    def state(self):
+        return {
+            "last_time": self.last_time,
+            "indicators": {name: i.state() for name, i in self.ind.items()},
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        obj = cls.__new__(cls)
+        obj.last_time = state["last_time"]
+        obj.ind = {
+            name: _INDICATORS[name].from_state(s)
+            for name, s in state["indicators"].items()
+        }
+        return obj
+
+
+# -------- PERSISTENCE -------- #
+
+def _state_path(symbol, state_dir):
+    return os.path.join(state_dir, f"{symbol}.json")
+
+
+def load_state(symbol, state_dir=STATE_DIR):
+    try:
+        with open(_state_path(symbol, state_dir)) as f:
+            return StreamingIndicators.from_state(json.load(f))
+    except FileNotFoundError:
+        return StreamingIndicators()
+
+
+def save_state(symbol, indicators, state_dir=STATE_DIR):
+    os.makedirs(state_dir, exist_ok=True)
+    path = _state_path(symbol, state_dir)
+    tmp = f"{path}.{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump(indicators.state(), f)
+    os.replace(tmp, path)
+
+
+def update_indicators(new_rows, state_dir=STATE_DIR):
+    """
+    Advances the saved state of every symbol in new_rows and returns the
+    indicator columns for those candles only. Candles at or before a
+    symbol's last processed time are skipped.
+    """
+    out = []
+    # load_coins дава categorical symbol, без observed празни групи за секој coin
+    for symbol, group in new_rows.groupby("symbol", sort=True, observed=True):
+        indicators = load_state(symbol, state_dir)
+        rows = indicators.update_frame(group)
+        if not rows.empty:
+            save_state(symbol, indicators, state_dir)
+            out.append(rows)
+
+    if not out:
+        return new_rows.iloc[0:0].reindex(columns=list(new_rows.columns) + INDICATOR_COLUMNS)
+    return pd.concat(out)
+
+
+def refresh_signals(new_rows, state_dir=STATE_DIR):
+    """Indicators and BUY/SELL/HOLD for the new candles only."""
+    return generate_signals(update_indicators(new_rows, state_dir))
@@ -1,3 +1,6 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 
@@ -12,17 +15,34 @@ from ta.trend import (
 )
 from ta.volatility import BollingerBands
 
+from analysis.resampling import TIMEFRAMES, resample_ohlcv
+from market.coins_dataset import load_coins
+
+# Indicators and buy/sell/hold signals per timeframe from all_coins.csv.
+# The imports are absolute from the project root, so run it standalone as
+# a module from there:
+#
+#     python -m analysis.technical_analysis
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 # -------- LOAD AND PREPARE DATA -------- #
 
-def load_data(csv_path):
-    df = pd.read_csv(csv_path)
+def load_data(csv_path, symbols=None):
+    # од Parquet копијата на CSV-то (market/coins_dataset.py), само бараните symbols, float64 за ta
+    df = load_coins(symbols=symbols, csv_path=csv_path)
     df["date"] = pd.to_datetime(df["time"], unit="s")
-    return df.sort_values("date")
+    return df.sort_values("date", kind="stable")
 
 
 # -------- ADD TECHNICAL INDICATORS -------- #
 
-def add_indicators(df):
+def add_indicators(df, backend="ta"):
+    if backend == "numpy":
+        return _add_indicators_numpy(df)
+    if backend != "ta":
+        raise ValueError(f"Unknown indicator backend: {backend}")
+
     # ===== OSCILLATORS (5) =====
     df["RSI"] = RSIIndicator(df["close"]).rsi()
 
@@ -37,11 +57,15 @@ def add_indicators(df):
     )
     df["Stochastic"] = stoch.stoch()
 
-    df["ADX"] = ADXIndicator(
-        high=df["high"],
-        low=df["low"],
-        close=df["close"]
-    ).adx()
+    # ta го крши ADX за помалку од 2 * 14 редови (нови coins)
+    if len(df) >= 28:
+        df["ADX"] = ADXIndicator(
+            high=df["high"],
+            low=df["low"],
+            close=df["close"]
+        ).adx()
+    else:
+        df["ADX"] = np.nan
 
     df["CCI"] = CCIIndicator(
         high=df["high"],
@@ -64,6 +88,21 @@ def add_indicators(df):
     return df
 
 
+def _add_indicators_numpy(df):
+    from analysis.indicator_kernels import COLUMNS, compute_indicators
+
+    block = compute_indicators(
+        df["high"].to_numpy(dtype=np.float64),
+        df["low"].to_numpy(dtype=np.float64),
+        df["close"].to_numpy(dtype=np.float64),
+        df["volume"].to_numpy(dtype=np.float64),
+    )
+    # колоните на block-от се contiguous, pandas ги зема без нова 2-D копија
+    for i, col in enumerate(COLUMNS):
+        df[col] = block[:, i]
+    return df
+
+
 # -------- BUY / SELL / HOLD SIGNALS -------- #
 
 def generate_signals(df):
@@ -87,27 +126,76 @@ def generate_signals(df):
     return df
 
 
-# -------- RESAMPLE TIMEFRAMES -------- #
+# -------- PER-SYMBOL PIPELINE -------- #
 
-def analyze_timeframes(df):
-    df = df.set_index("date")
+# под ова, стартот на процесите и pickle на групите чини повеќе од што се добива
+# (benchmarks/bench_technical_analysis.py --sizes ја покажува границата)
+POOL_MIN_ROWS = 100_000
 
-    frames = {
-        "1D": df.resample("1D").last(),
-        "1W": df.resample("1W").last(),
-        "1M": df.resample("1M").last(),
-    }
+
+def default_workers(rows):
+    cpus = os.cpu_count() or 1
+    return cpus if cpus > 1 and rows >= POOL_MIN_ROWS else 1
+
+
+def analyze_symbol(df, backend="ta"):
+    # индикатори и сигнали за еден coin, за да не се мешаат rolling прозорците
+    df = add_indicators(df.copy(), backend=backend)
+    return generate_signals(df)
+
+
+def analyze_symbols(df, workers=None, chunksize=None, backend="ta"):
+    """
+    Runs add_indicators/generate_signals separately for every symbol.
+    With workers > 1 the symbols are spread over a process pool,
+    chunksize symbols per task. workers=None uses the pool only for
+    frames of at least POOL_MIN_ROWS rows on a multi-core machine.
+    """
+    groups = [g for _, g in df.groupby("symbol", sort=True, observed=True)]
+    if not groups:
+        return analyze_symbol(df, backend)
+
+    if workers is None:
+        workers = default_workers(len(df))
+
+    if workers <= 1:
+        results = [analyze_symbol(g, backend) for g in groups]
+    else:
+        if chunksize is None:
+            # ~4 tasks по worker, за подеднакво оптоварување
+            chunksize = max(1, len(groups) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(
+                analyze_symbol, groups, [backend] * len(groups), chunksize=chunksize
+            ))
+
+    return pd.concat(results).sort_values("date", kind="stable")
+
+
+# -------- RESAMPLE TIMEFRAMES -------- #
+
+def analyze_timeframes(df, workers=None, backend="ta"):
+    """
+    OHLCV bars per symbol for every timeframe, indexed by bucket start,
+    with the indicators and signals recomputed on the bars themselves.
+    """
+    frames = {}
+    for tf in TIMEFRAMES:
+        bars = resample_ohlcv(df, tf)
+        bars["time"] = bars["bucket"].astype("int64")
+        bars["date"] = pd.to_datetime(bars["time"], unit="s")
+        bars = analyze_symbols(bars, workers=workers, backend=backend)
+        frames[tf] = bars.set_index("date")
 
     return frames
 
 
 # -------- FULL PIPELINE -------- #
 
-def run_technical_analysis(csv_path):
+def run_technical_analysis(csv_path, workers=None, chunksize=None, backend="ta"):
     df = load_data(csv_path)
-    df = add_indicators(df)
-    df = generate_signals(df)
-    timeframes = analyze_timeframes(df)
+    df = analyze_symbols(df, workers=workers, chunksize=chunksize, backend=backend)
+    timeframes = analyze_timeframes(df, workers=workers, backend=backend)
 
     return df, timeframes
 
@@ -115,7 +203,9 @@ def run_technical_analysis(csv_path):
 # -------- RUN STANDALONE (OPTIONAL) -------- #
 
 if __name__ == "__main__":
-    df, timeframes = run_technical_analysis("../data/processed/all_coins.csv")
+    df, timeframes = run_technical_analysis(
+        os.path.join(PROJECT_ROOT, "data", "processed", "all_coins.csv")
+    )
 
     print("\n=== Latest Signals ===")
     print(df[["date", "close", "RSI", "MACD", "CCI", "signal"]].tail())
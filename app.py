@@ -1,16 +1,62 @@
-from flask import Flask, render_template, abort, request, redirect, url_for, session
-import pandas as pd
+from flask import Flask, Response, render_template, abort, request, redirect, url_for, session, jsonify
+import hmac
 import json
 import os
 import sqlite3
+from functools import wraps
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask import session, redirect, url_for, render_template, request
 from werkzeug.security import check_password_hash, generate_password_hash
 
+from analysis.forecast_service import ForecastService, ModelNotFound
+from db.pool import get_connection, get_pool
+from market.downsample import MIN_POINTS, downsample
+from market.formatting import fmt_number
+from web.metrics import Metrics
+from web.price_hub import HubFull, PriceHub, ReplayFeed, market_deltas
+from web.reloader import DataReloader
+from web.render_cache import RenderCache
+from web.streaming import FORMATS, stream_rows
+
 
 app = Flask(__name__)
 app.secret_key = "secret123"
 
+# токен за scraper-от (Prometheus) на /metrics и /api/.../stats; без него
+# внатрешните бројачи ги гледаат само логирани корисници
+OPS_TOKEN = os.environ.get("OPS_TOKEN")
+
+
+def ops_only(view):
+    """Internal stats: a logged-in user, or Authorization: Bearer $OPS_TOKEN."""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if "user" not in session and not _ops_token_ok():
+            abort(401)
+        return view(*args, **kwargs)
+    return wrapped
+
+
+def api_login_required(view):
+    """API routes of logged-in pages: 401 instead of the redirect to /login."""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if "user" not in session:
+            abort(401)
+        return view(*args, **kwargs)
+    return wrapped
+
+
+def _ops_token_ok():
+    if not OPS_TOKEN:
+        return False
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    return scheme == "Bearer" and hmac.compare_digest(token.encode(), OPS_TOKEN.encode())
+
+
+# latency по route, фази (data/compute/render) и SQLite queries на /metrics
+metrics = Metrics().init_app(app, guard=ops_only)
+
 
 @app.route("/profile", methods=["GET", "POST"])
 def profile():
@@ -25,35 +71,32 @@ def profile():
         new_pw = request.form.get("new_password")
         confirm = request.form.get("confirm_password")
 
-        conn = get_db()
-        cur = conn.cursor()
-
-        # земи го корисникот
-        cur.execute("SELECT * FROM users WHERE username = ?", (username,))
-        user = cur.fetchone()
-
-        if not user or not check_password_hash(user["password_hash"], old_pw):
-            message = "Wrong current password."
-        elif new_pw != confirm:
-            message = "Passwords do not match."
-        else:
-            new_hash = generate_password_hash(new_pw)
-            cur.execute(
-                "UPDATE users SET password_hash = ? WHERE username = ?",
-                (new_hash, username),
-            )
-            conn.commit()
-            message = "Password successfully changed."
-
-        conn.close()
+        with get_db() as conn:
+            cur = conn.cursor()
+
+            # земи го корисникот
+            cur.execute("SELECT * FROM users WHERE username = ?", (username,))
+            user = cur.fetchone()
+
+            if not user or not check_password_hash(user["password_hash"], old_pw):
+                message = "Wrong current password."
+            elif new_pw != confirm:
+                message = "Passwords do not match."
+            else:
+                new_hash = generate_password_hash(new_pw)
+                cur.execute(
+                    "UPDATE users SET password_hash = ? WHERE username = ?",
+                    (new_hash, username),
+                )
+                conn.commit()
+                message = "Password successfully changed."
 
     return render_template("profile.html", username=username, message=message)
 
 
 def get_db():
-    conn = sqlite3.connect("users.db")
-    conn.row_factory = sqlite3.Row
-    return conn
+    # конекција од заедничкиот pool, `with get_db() as conn` ја враќа назад и при грешка
+    return get_connection()
 
 @app.route("/register", methods=["GET", "POST"])
 def register():
@@ -64,21 +107,19 @@ def register():
         if not username or not password:
             return render_template("register.html", error="Please fill all fields.")
 
-        conn = get_db()
-        cur = conn.cursor()
-        cur.execute("SELECT id FROM users WHERE username = ?", (username,))
-        row = cur.fetchone()
-        if row:
-            conn.close()
-            return render_template("register.html", error="Username already exists.")
-
-        pwd_hash = generate_password_hash(password)
-        cur.execute(
-            "INSERT INTO users (username, password_hash) VALUES (?, ?)",
-            (username, pwd_hash),
-        )
-        conn.commit()
-        conn.close()
+        with get_db() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT id FROM users WHERE username = ?", (username,))
+            row = cur.fetchone()
+            if row:
+                return render_template("register.html", error="Username already exists.")
+
+            pwd_hash = generate_password_hash(password)
+            cur.execute(
+                "INSERT INTO users (username, password_hash) VALUES (?, ?)",
+                (username, pwd_hash),
+            )
+            conn.commit()
 
         session["user"] = username
         return redirect(url_for("markets"))
@@ -86,69 +127,50 @@ def register():
     return render_template("register.html")
 
 
-def fmt_number(x):
-    x = float(x)
-    abs_x = abs(x)
-    if abs_x >= 1_000_000_000_000:
-        return f"{x/1_000_000_000_000:.2f}T"
-    elif abs_x >= 1_000_000_000:
-        return f"{x/1_000_000_000:.2f}B"
-    elif abs_x >= 1_000_000:
-        return f"{x/1_000_000:.2f}M"
-    elif abs_x >= 1_000:
-        return f"{x/1_000:.2f}K"
-    else:
-        return f"{x:.2f}"
+# живи цени за /markets преку SSE (/api/stream/prices); секоја нова верзија
+# од ingest се објавува еднаш како делти, hub-от ги дели на сите клиенти
+price_hub = PriceHub()
+
+# store, market_stats и candles, вчитани во позадина (app-от веднаш прима requests);
+# reloader-от ги заменува кога ingest ќе објави нова верзија
+market = DataReloader(on_swap=lambda previous, data: price_hub.publish(market_deltas(previous, data))).start()
+
+# PRICE_REPLAY=<секунди по свеќа>: coins табелата се пушта низ hub-от, за тестирање без ingest
+if os.environ.get("PRICE_REPLAY"):
+    ReplayFeed(price_hub, interval=float(os.environ["PRICE_REPLAY"])).start()
+
+# SSE: heartbeat да не ја затвори proxy-то врската, retry за EventSource
+STREAM_HEARTBEAT = 15.0
+STREAM_RETRY_MS = 3000
+
 
+def close_series(symbol):
+    arrays = market.current.store.arrays(symbol)
+    if arrays is None or not len(arrays["close"]):
+        return None
+    return int(arrays["time"][-1]), arrays["close"]
 
-conn = sqlite3.connect("users.db")
-df = pd.read_sql_query("SELECT * FROM coins", conn)
-conn.close()
 
-df["date"] = pd.to_datetime(df["time"], unit="s").dt.date
+# готови HTML страни, се празни сам кога ingest ќе објави нова верзија на store-от
+render_cache = RenderCache(lambda: market.current.version)
+
+# LSTM моделите од models/lstm се вчитуваат во позадина
+forecasts = ForecastService(close_series).start()
 
 
 @app.route("/")
+@render_cache.cached
 def index():
-    # земи последни 2 реда по coin за цена + 24h change
-    tmp = df.copy().sort_values("time")
-    latest_two = tmp.groupby("symbol").tail(2)
-
-    stats = {}
-    for symbol, g in latest_two.groupby("symbol"):
-        g = g.sort_values("time")
-        last = g.iloc[-1]
-        prev = g.iloc[-2] if len(g) > 1 else None
-
-        price = float(last["close"])
-        volume = float(last["volume"])
-        market_cap = price * volume
-
-        change_24h = 0.0
-        if prev is not None and prev["close"] != 0:
-            change_24h = (price - float(prev["close"])) / float(prev["close"]) * 100.0
-
-        stats[symbol] = {
-            "price": price,
-            "volume": volume,
-            "market_cap": market_cap,
-            "price_fmt": f"${fmt_number(price)}",
-            "volume_fmt": fmt_number(volume),
-            "market_cap_fmt": fmt_number(market_cap),
-            "change_24h": change_24h,
-        }
-
-    # топ 10 по market cap за табелата долу
-    sorted_by_mcap = sorted(
-        stats.keys(), key=lambda s: stats[s]["market_cap"], reverse=True
-    )[:10]
-    top10 = {s: stats[s] for s in sorted_by_mcap}
-
-    # топ 3 по цена за Market Overview box
-    sorted_by_price = sorted(
-        stats.keys(), key=lambda s: stats[s]["price"], reverse=True
-    )[:3]
-    top3_price = [(s, stats[s]) for s in sorted_by_price]
+    with metrics.phase("data"):
+        data = market.current
+        stats = data.market_stats
+
+    with metrics.phase("compute"):
+        # топ 10 по market cap за табелата долу
+        top10 = {s: stats[s] for s in data.market_index.top("market_cap", 10)}
+
+        # топ 3 по цена за Market Overview box
+        top3_price = [(s, stats[s]) for s in data.market_index.top("price", 3)]
 
     return render_template("index.html", top10=top10, top3_price=top3_price)
 
@@ -159,11 +181,10 @@ def login():
         username = request.form.get("username", "").strip()
         password = request.form.get("password", "").strip()
 
-        conn = get_db()
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM users WHERE username = ?", (username,))
-        row = cur.fetchone()
-        conn.close()
+        with get_db() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT * FROM users WHERE username = ?", (username,))
+            row = cur.fetchone()
 
         if row and check_password_hash(row["password_hash"], password):
             session["user"] = username
@@ -184,7 +205,71 @@ def logout():
 def help_page():
     return render_template("help.html")
 
+
+@app.route("/api/cache/stats")
+@ops_only
+def render_cache_stats():
+    return jsonify(render_cache.stats())
+
+
+@app.route("/api/market/reload")
+@ops_only
+def market_reload_stats():
+    return jsonify(market.stats())
+
+
+@app.route("/api/stream/prices")
+@api_login_required
+def price_stream():
+    """
+    Server-Sent Events: a "snapshot" event with the latest prices, then a
+    "prices" event per batch of deltas {symbol: [price, change_24h, volume,
+    market_cap]}. ?symbols=BTC,ETH limits the stream to those symbols.
+    """
+    # EventSource ги праќа cookies, без сесија 401
+    symbols = request.args.get("symbols")
+    symbols = {s.strip().upper() for s in symbols.split(",") if s.strip()} if symbols else None
+    try:
+        sub = price_hub.subscribe(symbols)
+    except HubFull:
+        abort(503)
+
+    def events():
+        try:
+            yield f"retry: {STREAM_RETRY_MS}\n\n"
+            yield price_hub.snapshot(symbols)
+            while True:
+                frames, closed = sub.get(STREAM_HEARTBEAT)
+                if frames:
+                    yield "".join(frames)
+                elif not closed:
+                    yield ": keep-alive\n\n"
+                if closed:
+                    # клиентот заостанал, нека се поврзе пак и земе свеж snapshot
+                    yield "event: reset\ndata: {}\n\n"
+                    return
+        finally:
+            price_hub.unsubscribe(sub)
+
+    return Response(events(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+
+@app.route("/api/stream/stats")
+@ops_only
+def price_stream_stats():
+    return jsonify(price_hub.stats())
+
+
+@app.route("/api/db/pool")
+@ops_only
+def db_pool_stats():
+    return jsonify(get_pool().stats())
+
 @app.route("/markets")
+@render_cache.cached
 def markets():
     if "user" not in session:
         return redirect(url_for("login"))
@@ -196,76 +281,37 @@ def markets():
     min_price = request.args.get("min_price", 0, type=float)
     max_price = request.args.get("max_price", 0, type=float)
 
-    page = request.args.get("page", 1, type=int)
+    # page <= 0 би дала празна страна (или парче од крајот кај стариот slice)
+    page = max(request.args.get("page", 1, type=int), 1)
     per_page = 15
 
-    tmp = df.copy().sort_values("time")
-    latest_two = tmp.groupby("symbol").tail(2)
-
-    stats = {}
-    for symbol, g in latest_two.groupby("symbol"):
-        g = g.sort_values("time")
-        last = g.iloc[-1]
-        prev = g.iloc[-2] if len(g) > 1 else None
-
-        price = float(last["close"])
-        volume = float(last["volume"])
-        market_cap = price * volume
-
-        change_24h = 0.0
-        if prev is not None and prev["close"] != 0:
-            change_24h = (price - float(prev["close"])) / float(prev["close"]) * 100.0
-
-        stats[symbol] = {
-            "last_close": price,
-            "last_volume": volume,
-            "market_cap": market_cap,
-            "price_fmt": f"${fmt_number(price)}",
-            "volume_fmt": fmt_number(volume),
-            "market_cap_fmt": fmt_number(market_cap),
-            "change_24h": change_24h,
-        }
-
-    # филтри
-    stats = {s: v for s, v in stats.items() if v["last_volume"] >= min_vol}
-
-    if min_price > 0:
-        stats = {s: v for s, v in stats.items() if v["last_close"] >= min_price}
-
-    if max_price > 0:
-        stats = {s: v for s, v in stats.items() if v["last_close"] <= max_price}
-
-    if query:
-        stats = {s: v for s, v in stats.items() if query in s}
-
-    # тотален market cap и 24h volume
-    total_market_cap = sum(v["market_cap"] for v in stats.values())
-    total_volume = sum(v["last_volume"] for v in stats.values())
-    total_market_cap_fmt = f"${fmt_number(total_market_cap)}"
-    total_volume_fmt = fmt_number(total_volume)
-
-    # trending цени за BTC, ETH, SOL
-    btc_price = stats.get("BTC", {}).get("price_fmt")
-    eth_price = stats.get("ETH", {}).get("price_fmt")
-    sol_price = stats.get("SOL", {}).get("price_fmt")
-
-    # сортирање
-    reverse = (direction == "desc")
-    if sort == "price":
-        all_symbols = sorted(
-            stats.keys(), key=lambda s: stats[s]["last_close"], reverse=reverse
-        )
-    else:
-        all_symbols = sorted(
-            stats.keys(), key=lambda s: stats[s]["last_volume"], reverse=reverse
+    with metrics.phase("data"):
+        data = market.current
+        stats = data.market_stats
+    filters = dict(query=query, min_vol=min_vol, min_price=min_price, max_price=max_price)
+
+    with metrics.phase("compute"):
+        # филтри, сортирање и pagination преку индексот, без скенирање на сите coins
+        result = data.market_index.query(
+            sort=sort, direction=direction, page=page, per_page=per_page, **filters
         )
+        symbols = result.symbols
+        total = result.total
+        total_pages = (total + per_page - 1) // per_page
 
-    # pagination
-    total = len(all_symbols)
-    start = (page - 1) * per_page
-    end = start + per_page
-    symbols = all_symbols[start:end]
-    total_pages = (total + per_page - 1) // per_page
+        # тотален market cap и 24h volume
+        total_market_cap_fmt = f"${fmt_number(result.total_market_cap)}"
+        total_volume_fmt = fmt_number(result.total_volume)
+
+        # trending цени за BTC, ETH, SOL (само ако поминуваат низ филтрите)
+        def trending(symbol):
+            if data.market_index.matches(symbol, **filters):
+                return stats[symbol]["price_fmt"]
+            return None
+
+        btc_price = trending("BTC")
+        eth_price = trending("ETH")
+        sol_price = trending("SOL")
 
     return render_template(
         "coins.html",
@@ -288,78 +334,251 @@ def markets():
         sol_price=sol_price,
     )
 
+# -------- JSON / streaming API -------- #
+
+API_DEFAULT_LIMIT = 100
+API_MAX_LIMIT = 1000        # за format=json; ndjson/csv без limit ја стримуваат целата историја
+EXPORT_CHUNK = 5000
+
+MARKET_FIELDS = ["symbol", "price", "volume", "market_cap", "change_24h"]
+OHLCV_FIELDS = ["time", "open", "high", "low", "close", "volume"]
+
+
+def _api_format():
+    fmt = request.args.get("format", "json")
+    if fmt != "json" and fmt not in FORMATS:
+        abort(400)
+    return fmt
+
+
+def _int_arg(name):
+    """Integer query argument or None; 400 when it is there but does not parse."""
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        abort(400)
+
+
+def _symbol_cursor():
+    # курсорот е последниот symbol од претходната страна; празен или со мали
+    # букви би дал тивко погрешна страна (целата листа или ништо)
+    after = request.args.get("after")
+    if after is not None and (not after or after != after.strip().upper()):
+        abort(400)
+    return after
+
+
+def _api_limit(fmt):
+    limit = _int_arg("limit")
+    if limit is not None and limit <= 0:
+        abort(400)
+    if fmt == "json":
+        return min(limit or API_DEFAULT_LIMIT, API_MAX_LIMIT)
+    return limit
+
+
+def _next_url(cursor):
+    if cursor is None:
+        return None
+    view_args = request.view_args or {}
+    # query параметар со исто име како view arg (?symbol=X) не смее да го смени патот
+    args = {k: v for k, v in request.args.items() if k not in view_args}
+    args["after"] = cursor
+    return url_for(request.endpoint, **view_args, **args)
+
+
+def _api_response(fields, chunks, fmt, cursor, filename, **extra):
+    next_url = _next_url(cursor)
+    if fmt != "json":
+        return stream_rows(fields, chunks, fmt, next_url, filename)
+
+    resp = jsonify({
+        **extra,
+        "data": [dict(zip(fields, row)) for rows in chunks for row in rows],
+        "next_cursor": cursor,
+    })
+    if next_url:
+        resp.headers["Link"] = f'<{next_url}>; rel="next"'
+    return resp
+
+
+# истите податоци како /markets, па и истата најава
+@app.route("/api/markets")
+@api_login_required
+def api_markets():
+    """Snapshot stats per symbol, keyset-paginated on symbol (?after=BTC)."""
+    fmt = _api_format()
+    limit = _api_limit(fmt)
+    data = market.current
+
+    symbols = data.market_index.after(_symbol_cursor())
+    page = symbols if limit is None else symbols[:limit]
+    cursor = str(page[-1]) if limit is not None and len(symbols) > limit else None
+    stats = data.market_stats
+
+    def chunks():
+        for i in range(0, len(page), EXPORT_CHUNK):
+            yield [
+                (str(s), stats[s]["price"], stats[s]["volume"],
+                 stats[s]["market_cap"], stats[s]["change_24h"])
+                for s in page[i:i + EXPORT_CHUNK]
+            ]
+
+    return _api_response(MARKET_FIELDS, chunks(), fmt, cursor, "markets.csv",
+                         version=data.version)
+
+
+@app.route("/api/coins/<symbol>/ohlcv")
+@api_login_required
+def api_coin_ohlcv(symbol):
+    """Candles of one symbol, keyset-paginated on time (?after=<unix seconds>)."""
+    fmt = _api_format()
+    limit = _api_limit(fmt)
+    after = _int_arg("after")
+    data = market.current
+
+    # views над memory-mapped store-от; генераторот ги држи и по reload
+    arrays = data.store.window(symbol, None if after is None else after + 1)
+    if arrays is None:
+        abort(404)
+
+    rows = len(arrays["time"])
+    count = rows if limit is None else min(limit, rows)
+    cursor = int(arrays["time"][count - 1]) if count < rows else None
+
+    def chunks():
+        for i in range(0, count, EXPORT_CHUNK):
+            end = min(i + EXPORT_CHUNK, count)
+            yield list(zip(*(arrays[col][i:end].tolist() for col in OHLCV_FIELDS)))
+
+    return _api_response(OHLCV_FIELDS, chunks(), fmt, cursor, f"{symbol}_ohlcv.csv",
+                         symbol=symbol, version=data.version)
+
+
+@app.route("/coin/<symbol>/forecast")
+def coin_forecast(symbol):
+    try:
+        return jsonify(forecasts.forecast(symbol))
+    except KeyError:
+        abort(404)
+    except ModelNotFound:
+        return jsonify({"error": f"no trained model for {symbol}"}), 503
+    except ValueError as e:
+        # на пр. пократка историја од lookback-от на моделот
+        return jsonify({"error": str(e)}), 422
+    except TimeoutError:
+        return jsonify({"error": "forecast timed out, try again"}), 503
+
+
+@app.route("/api/forecast/stats")
+@ops_only
+def forecast_stats():
+    return jsonify(forecasts.stats())
+
+
+@app.route("/api/coin/<symbol>/candles")
+def coin_candles(symbol):
+    tf = request.args.get("tf", "1W")
+    candles = market.current.candles
+    if tf not in candles.bars:
+        abort(400)
+
+    bars = candles.get(symbol, tf)
+    if bars is None:
+        abort(404)
+
+    return jsonify({
+        "symbol": symbol,
+        "tf": tf,
+        "time": bars["bucket"].astype(int).tolist(),
+        "open": bars["open"].tolist(),
+        "high": bars["high"].tolist(),
+        "low": bars["low"].tolist(),
+        "close": bars["close"].tolist(),
+        "volume": bars["volume"].tolist(),
+    })
+
+# колку точки максимум враќа /api/coin/<symbol>/series
+SERIES_MAX_POINTS = 5000
+
+
+@app.route("/api/coin/<symbol>/series")
+def coin_series(symbol):
+    # лоша граница е 400, не тивко цела историја
+    start = _int_arg("from")
+    end = _int_arg("to")
+    points = _int_arg("points")
+    points = min(1000 if points is None else points, SERIES_MAX_POINTS)
+    method = request.args.get("method", "lttb")
+    if method not in MIN_POINTS:
+        abort(400)
+    # lttb/minmax секогаш ги чуваат првата и последната точка и барем еден bucket
+    if points < MIN_POINTS[method]:
+        abort(400)
+
+    arrays = market.current.store.window(symbol, start, end)
+    if arrays is None:
+        abort(404)
+
+    times = arrays["time"]
+    closes = arrays["close"]
+    idx = downsample(times, closes, points, method)
+
+    return jsonify({
+        "symbol": symbol,
+        "rows": int(len(times)),
+        "points": int(len(idx)),
+        "time": times[idx].tolist(),
+        "close": closes[idx].tolist(),
+    })
+
+
 @app.route("/coin/<symbol>")
+@render_cache.cached
 def coin_detail(symbol):
-    coin_df = df[df["symbol"] == symbol].sort_values("time")
-    if coin_df.empty:
+    # сè е пресметано однапред (market/coin_stats.py), тука е само lookup
+    with metrics.phase("data"):
+        stats = market.current.coin_stats.get(symbol)
+    if stats is None:
         abort(404)
 
-    rows = coin_df.to_dict(orient="records")
-    last_row = rows[-1]
-
-    def pct_change(days):
-        if len(rows) <= days:
-            return 0.0
-        prev = rows[-(days + 1)]["close"]
-        curr = last_row["close"]
-        if prev == 0:
-            return 0.0
-        return (curr - prev) / prev * 100.0
-
-    change_1h = pct_change(1)
-    change_7d = pct_change(7)
-    change_30d = pct_change(30)
-
-    chart_data = {
-        "dates": [str(r["date"]) for r in rows],
-        "prices": [r["close"] for r in rows],
-    }
-
-    def fmt_number(x):
-        x = float(x)
-        abs_x = abs(x)
-        if abs_x >= 1_000_000_000_000:
-            return f"{x / 1_000_000_000_000:.2f}T"
-        elif abs_x >= 1_000_000_000:
-            return f"{x / 1_000_000_000:.2f}B"
-        elif abs_x >= 1_000_000:
-            return f"{x / 1_000_000:.2f}M"
-        elif abs_x >= 1_000:
-            return f"{x / 1_000:.2f}K"
-        else:
-            return f"{x:.2f}"
-
-    trading_vol_fmt = fmt_number(last_row["volume"])
-    market_cap_val = last_row["close"] * last_row["volume"]
-    market_cap_fmt = fmt_number(market_cap_val)
-    close_fmt = fmt_number(last_row["close"])
-
-    # HIGH–LOW за целиот период
-    lowest_low = min(r["low"] for r in rows)
-    highest_high = max(r["high"] for r in rows)
-    range_low_fmt = f"{lowest_low:,.2f}"
-    range_high_fmt = f"{highest_high:,.2f}"
-
-    # RANGE = high - low за последниот ден
-    price_range = float(last_row["high"]) - float(last_row["low"])
-    range_value = f"{price_range:,.2f}"
+    with metrics.phase("compute"):
+        last_row = {col: stats[col] for col in ("time", "open", "high", "low", "close", "volume")}
+
+        trading_vol_fmt = fmt_number(stats["volume"])
+        market_cap_fmt = fmt_number(stats["close"] * stats["volume"])
+        close_fmt = fmt_number(stats["close"])
+
+        # HIGH–LOW за целиот период
+        range_low_fmt = f"{stats['low_all']:,.2f}"
+        range_high_fmt = f"{stats['high_all']:,.2f}"
 
+        # RANGE = high - low за последниот ден
+        range_value = f"{stats['high'] - stats['low']:,.2f}"
 
     return render_template(
         "coin_detail.html",
         symbol=symbol,
         last=last_row,  # ако немаш друго 'last'
-        rows=rows,
-        change_1h=change_1h,
-        change_7d=change_7d,
-        change_30d=change_30d,
+        change_1h=stats["change_1h"],
+        change_7d=stats["change_7d"],
+        change_30d=stats["change_30d"],
         trading_vol_fmt=trading_vol_fmt,
         market_cap_fmt=market_cap_fmt,
         close_fmt=close_fmt,
         range_low_fmt=range_low_fmt,
         range_high_fmt=range_high_fmt,
         range_value=range_value,
-        chart_data=chart_data,
+        max_close=stats["ath"],
+        min_close=stats["atl"],
+        high_52w=stats["high_52w"],
+        low_52w=stats["low_52w"],
+        drawdown=stats["drawdown"],
+        volatility=stats["volatility_30d"],
+        last_time=last_row["time"],
     )
 
 if __name__ == "__main__":
@@ -0,0 +1,78 @@
+# ta vs fused NumPy indicator backend: parity, time and peak allocations.
+#
+#   python -m benchmarks.bench_indicator_kernels --csv data/processed/all_coins.csv
+
+import argparse
+import os
+import time
+import tracemalloc
+
+import numpy as np
+
+from analysis.indicator_kernels import COLUMNS
+from analysis.technical_analysis import add_indicators, load_data
+
+RTOL = 1e-9
+# ta ги зема Bollinger од pandas rolling std (online варијанса), која за
+# скапи coins греши до ~1e-8 релативно; kernel-от е точен two-pass std
+RTOL_COLUMNS = {"BB_upper": 1e-7, "BB_lower": 1e-7}
+
+
+def check_parity(groups):
+    worst = {col: 0.0 for col in COLUMNS}
+    for g in groups:
+        ref = add_indicators(g.copy(), backend="ta")
+        got = add_indicators(g.copy(), backend="numpy")
+        for col in COLUMNS:
+            a = ref[col].to_numpy(dtype=np.float64)
+            b = got[col].to_numpy(dtype=np.float64)
+            if not (np.isnan(a) == np.isnan(b)).all():
+                raise AssertionError(f"{g['symbol'].iloc[0]} {col}: NaN positions differ")
+            mask = np.isfinite(a)
+            if mask.any():
+                err = np.max(np.abs(a[mask] - b[mask]) / np.maximum(1.0, np.abs(a[mask])))
+                worst[col] = max(worst[col], float(err))
+    bad = {col: err for col, err in worst.items() if err > RTOL_COLUMNS.get(col, RTOL)}
+    if bad:
+        raise AssertionError(f"backends differ: {bad}")
+    return worst
+
+
+def measure(groups, backend, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for g in groups:
+            add_indicators(g.copy(), backend=backend)
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    for g in groups:
+        add_indicators(g.copy(), backend=backend)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", default=os.path.join("data", "processed", "all_coins.csv"))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = load_data(args.csv)
+    groups = [g for _, g in df.groupby("symbol", observed=True)]
+    print(f"{len(df)} rows, {len(groups)} symbols")
+
+    worst = check_parity(groups)
+    print("parity ok, max relative error:", f"{max(worst.values()):.2e}")
+
+    ta_time, ta_peak = measure(groups, "ta", args.repeat)
+    np_time, np_peak = measure(groups, "numpy", args.repeat)
+    print(f"ta:     {ta_time:.3f}s  peak {ta_peak / 2**20:.1f} MiB")
+    print(f"numpy:  {np_time:.3f}s  peak {np_peak / 2**20:.1f} MiB")
+    print(f"speedup {ta_time / np_time:.1f}x, peak ratio ta/numpy {ta_peak / max(np_peak, 1):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# /markets filtering: the old dict-comprehension scan vs MarketIndex.query,
+# p50/p99 latency over a mix of searches, filters, sorts and pages.
+#
+#   python -m benchmarks.bench_market_index --sizes 500 5000 50000
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from market.market_index import MarketIndex
+from tests.helpers import scan_query, synthetic_stats
+
+
+def workload(count, seed=1):
+    rng = random.Random(seed)
+    return [
+        dict(
+            query=rng.choice(["", "", "", "A", "BT", "XQZ"]),
+            min_vol=rng.choice([0, 0, 0, 10_000]),
+            min_price=rng.choice([0, 0, 0, 1]),
+            max_price=rng.choice([0, 0, 0, 1000]),
+            sort=rng.choice(["price", "volume"]),
+            direction=rng.choice(["asc", "desc"]),
+            page=rng.choice([1, 1, 1, 2, 10]),
+        )
+        for _ in range(count)
+    ]
+
+
+def latencies(fn, queries):
+    out = []
+    for kwargs in queries:
+        started = time.perf_counter()
+        fn(**kwargs)
+        out.append((time.perf_counter() - started) * 1000)
+    return np.array(out)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 5_000, 50_000])
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    queries = workload(args.queries)
+    print(f"{'symbols':>8} {'build ms':>9} {'scan p50':>9} {'scan p99':>9} "
+          f"{'index p50':>10} {'index p99':>10}")
+
+    for n in args.sizes:
+        stats = synthetic_stats(n)
+        started = time.perf_counter()
+        index = MarketIndex(stats)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        # иста страна и исти тотали како старата имплементација
+        for kwargs in queries[:50]:
+            page, total, mcap, vol = scan_query(stats, **kwargs)
+            result = index.query(**kwargs)
+            assert result.symbols == page and result.total == total, kwargs
+            assert np.isclose(result.total_market_cap, mcap) and np.isclose(result.total_volume, vol)
+
+        scan = latencies(lambda **kw: scan_query(stats, **kw), queries)
+        indexed = latencies(index.query, queries)
+        print(f"{n:>8} {build_ms:>9.1f} "
+              f"{np.percentile(scan, 50):>9.3f} {np.percentile(scan, 99):>9.3f} "
+              f"{np.percentile(indexed, 50):>10.3f} {np.percentile(indexed, 99):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
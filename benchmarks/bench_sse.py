@@ -0,0 +1,130 @@
+# Price stream load test: web/price_hub.ReplayFeed replays a synthetic coins
+# table through a PriceHub with many subscribers, some of them slow. Reports
+# the fan-out time per publish, delivery latency (publish -> client gets the
+# frame) for fast and slow clients, and how much the slow ones were
+# coalesced or dropped.
+#
+#   python -m benchmarks.bench_sse --clients 2000 --slow 0.1 --rate 50 --seconds 10
+#
+# Clients are polled by a few threads instead of one thread each, so the
+# numbers are the hub's cost, not the cost of thousands of OS threads.
+
+import argparse
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from tests.helpers import DB_NAME, build_workdir
+from web.price_hub import PriceHub, ReplayFeed
+
+
+def consume(subs, pause, published, latencies, stop):
+    """Polls its clients every `pause` seconds, latency per received frame."""
+    while not stop.is_set():
+        for sub in subs:
+            if sub.closed:
+                continue
+            frames, _ = sub.get(0)
+            now = time.perf_counter()
+            for frame in frames:
+                seq = int(frame[4:frame.index("\n")])
+                latencies.append(now - published[seq])
+        time.sleep(pause)
+
+
+def percentiles(values):
+    if not values:
+        return "-"
+    ms = np.array(values) * 1000
+    return f"p50 {np.percentile(ms, 50):.2f} ms, p99 {np.percentile(ms, 99):.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--slow", type=float, default=0.1, help="fraction of slow clients")
+    parser.add_argument("--slow-pause", type=float, default=2.0, help="seconds between reads of a slow client")
+    parser.add_argument("--filtered", type=float, default=0.5,
+                        help="fraction of clients subscribed to 15 symbols (one /markets page)")
+    parser.add_argument("--rate", type=float, default=50, help="replayed candle steps per second")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--threads", type=int, default=8, help="consumer threads per client group")
+    parser.add_argument("--max-queue", type=int, default=32)
+    parser.add_argument("--max-lag", type=float, default=30.0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_sse_")
+    atexit.register(shutil.rmtree, workdir, True)
+    df = build_workdir(workdir, args.symbols, args.days)
+    symbols = sorted(df["symbol"].unique())
+
+    hub = PriceHub(max_queue=args.max_queue, max_lag=args.max_lag)
+
+    # време на објава по seq, за латенцијата кај клиентите
+    published = {}
+    fanout = []
+    publish = hub.publish
+
+    def timed_publish(deltas):
+        started = time.perf_counter()
+        published[hub.seq + 1] = started
+        publish(deltas)
+        fanout.append(time.perf_counter() - started)
+
+    hub.publish = timed_publish
+
+    n_slow = int(args.clients * args.slow)
+    n_filtered = int(args.clients * args.filtered)
+    subs = [
+        hub.subscribe(symbols[(i * 15) % len(symbols):][:15] if i < n_filtered else None)
+        for i in range(args.clients)
+    ]
+    # спорите клиенти се мешаат меѓу филтрираните и нефилтрираните
+    slow = subs[::max(1, args.clients // n_slow)][:n_slow] if n_slow else []
+    slow_ids = {id(s) for s in slow}
+    fast = [s for s in subs if id(s) not in slow_ids]
+
+    stop = threading.Event()
+    fast_lat, slow_lat = [], []
+    threads = []
+    for group, pause, lat in ((fast, 0.005, fast_lat), (slow, args.slow_pause, slow_lat)):
+        for k in range(args.threads):
+            part = group[k::args.threads]
+            if part:
+                threads.append(threading.Thread(
+                    target=consume, args=(part, pause, published, lat, stop), daemon=True,
+                ))
+    for t in threads:
+        t.start()
+
+    feed = ReplayFeed(hub, interval=1 / args.rate, db_path=os.path.join(workdir, DB_NAME)).start()
+    time.sleep(args.seconds)
+    feed.stop()
+    stop.set()
+    for t in threads:
+        t.join()
+
+    stats = hub.stats()
+    fanout_ms = np.array(fanout) * 1000
+    print(f"{args.clients} clients ({len(slow)} slow, {n_filtered} filtered), "
+          f"{len(symbols)} symbols, {args.seconds:.0f}s at {args.rate:.0f} steps/s")
+    print(f"  publishes:       {stats['published']}")
+    print(f"  fan-out:         mean {fanout_ms.mean():.2f} ms, p99 {np.percentile(fanout_ms, 99):.2f} ms "
+          f"per publish ({fanout_ms.mean() * 1000 / args.clients:.2f} us per client)")
+    print(f"  frames received: {len(fast_lat) + len(slow_lat)} "
+          f"({(len(fast_lat) + len(slow_lat)) / args.seconds:,.0f}/s)")
+    print(f"  fast latency:    {percentiles(fast_lat)}")
+    print(f"  slow latency:    {percentiles(slow_lat)}")
+    print(f"  coalesced:       {stats['coalesced']} batches merged into queued ones")
+    print(f"  dropped:         {stats['dropped']} clients over max lag")
+
+
+if __name__ == "__main__":
+    main()
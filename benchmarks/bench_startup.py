@@ -0,0 +1,74 @@
+# Startup time of the web app and import cost of the analysis package, each
+# measured in a fresh interpreter. Exits with status 1 when the app takes
+# longer than --max-seconds to answer its first request, or when
+# `import analysis` pulls in a heavy dependency.
+#
+#   python -m benchmarks.bench_startup --repeat 5
+
+import argparse
+import json
+import subprocess
+import sys
+
+import numpy as np
+
+HEAVY_MODULES = ["pandas", "ta", "tensorflow", "sklearn", "matplotlib", "aiohttp", "vaderSentiment"]
+
+APP_PROBE = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter() - started
+app.app.test_client().get("/help")
+first_response = time.perf_counter() - started
+app.market.ready.wait()
+print(json.dumps({
+    "import": imported,
+    "first_response": first_response,
+    "warm": time.perf_counter() - started,
+}))
+"""
+
+PACKAGE_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import analysis
+print(json.dumps({
+    "import": time.perf_counter() - started,
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def probe(code):
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    runs = [probe(APP_PROBE) for _ in range(args.repeat)]
+    package = probe(PACKAGE_PROBE)
+
+    for key in ("import", "first_response", "warm"):
+        values = np.array([r[key] for r in runs])
+        print(f"app {key:<15} p50 {np.median(values):.3f}s  max {values.max():.3f}s")
+    print(f"import analysis     {package['import']:.3f}s, heavy modules: {package['loaded'] or 'none'}")
+
+    failed = False
+    worst = max(r["first_response"] for r in runs)
+    if worst > args.max_seconds:
+        print(f"FAIL: first response after {worst:.3f}s (limit {args.max_seconds:.3f}s)")
+        failed = True
+    if package["loaded"]:
+        print(f"FAIL: `import analysis` loaded {', '.join(package['loaded'])}")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+# End-to-end benchmark suite on a seeded synthetic dataset: Flask test-client
+# load on the web routes plus the analysis pipelines. Writes p50/p95/p99
+# latency, throughput and peak RSS per case to JSON and compares the run
+# with a stored baseline; exits with status 1 when a case regressed.
+#
+#   python -m benchmarks.bench_suite --symbols 200 --days 730 --out bench.json
+#   python -m benchmarks.bench_suite --save-baseline      # new benchmarks/baseline.json
+#
+# Everything runs inside a temporary directory built by
+# tests/helpers.build_workdir, so the real users.db and data/ are never touched.
+
+import argparse
+import atexit
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from unittest import mock
+
+import numpy as np
+
+from tests.helpers import CSV_NAME, build_workdir
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# дозволено влошување пред case да се означи како регресија
+TOLERANCE = 0.25
+
+CASES = [
+    "web_index", "web_markets", "web_markets_cached", "web_coin_detail",
+    "technical_analysis", "onchain_analysis", "lstm_windowing",
+]
+
+
+class Skipped(Exception):
+    """A case that cannot run here (missing optional dependency)."""
+
+
+def peak_rss_mb():
+    # ru_maxrss е во KB на Linux, во bytes на macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(fn, calls):
+    """Runs fn(call) for every call; latency percentiles and throughput."""
+    latencies = np.empty(len(calls))
+    started = time.perf_counter()
+    for i, call in enumerate(calls):
+        t = time.perf_counter()
+        fn(call)
+        latencies[i] = time.perf_counter() - t
+    elapsed = time.perf_counter() - started
+    ms = latencies * 1000
+    return {
+        "count": len(calls),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "mean_ms": float(ms.mean()),
+        "throughput_per_s": len(calls) / elapsed if elapsed else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+# -------- WEB -------- #
+
+def markets_queries(count, symbols, seed=1):
+    """/markets query strings: searches, filters, sorts and pages."""
+    rng = random.Random(seed)
+    prefixes = sorted({s[:k] for s in symbols for k in (1, 2)})
+    queries = []
+    for _ in range(count):
+        params = {
+            "sort": rng.choice(["price", "volume", "market_cap"]),
+            "dir": rng.choice(["asc", "desc"]),
+            "page": rng.choice([1, 1, 1, 2, 3, 10]),
+        }
+        if rng.random() < 0.3:
+            params["q"] = rng.choice(prefixes)
+        if rng.random() < 0.3:
+            params["min_vol"] = rng.choice([1_000, 100_000, 1_000_000])
+        if rng.random() < 0.2:
+            params["min_price"] = rng.choice([0.1, 1, 10])
+        if rng.random() < 0.2:
+            params["max_price"] = rng.choice([100, 1_000, 10_000])
+        queries.append("/markets?" + "&".join(f"{k}={v}" for k, v in params.items()))
+    return queries
+
+
+def web_cases(requests, symbols):
+    import app
+
+    app.market.ready.wait()
+    client = app.app.test_client()
+    # /markets бара најавен корисник
+    with client.session_transaction() as session:
+        session["user"] = "bench"
+
+    def get(url, cached=False):
+        if not cached:
+            # да се мери пресметката, не render cache-от
+            app.render_cache.clear()
+        response = client.get(url)
+        if response.status_code != 200:
+            raise AssertionError(f"{url}: HTTP {response.status_code}")
+        response.get_data()
+
+    rng = random.Random(2)
+    markets = markets_queries(requests, symbols)
+    # повторени URL-и, како реален сообраќај: погодоци во render cache
+    hot = markets[:max(1, requests // 20)]
+    return {
+        "web_index": lambda: measure(get, ["/"] * requests),
+        "web_markets": lambda: measure(get, markets),
+        "web_markets_cached": lambda: measure(
+            lambda url: get(url, cached=True), [rng.choice(hot) for _ in range(requests)]
+        ),
+        "web_coin_detail": lambda: measure(
+            get, [f"/coin/{rng.choice(symbols)}" for _ in range(requests)]
+        ),
+    }
+
+
+# -------- ANALYSIS -------- #
+
+def technical_analysis(repeat, backend):
+    from analysis.technical_analysis import run_technical_analysis
+
+    return measure(lambda _: run_technical_analysis(CSV_NAME, backend=backend), range(repeat))
+
+
+def onchain_analysis(repeat, symbols):
+    from analysis.onchain_analysis import OnChainAnalysis
+
+    # без мрежа: CoinGecko одговара со фиксни вредности
+    def fake_fields(requested, **kwargs):
+        return {s: {"active_addresses": 1000, "tx_count": 100, "tvl": 1e6} for s in requested}
+
+    def run(_):
+        OnChainAnalysis.analyze_many(fetch_remote=True)
+        for symbol in symbols[:20]:
+            OnChainAnalysis(symbol).analyze(return_results=True)
+
+    with mock.patch("analysis.coingecko_client.fetch_onchain_fields", fake_fields):
+        return measure(run, range(repeat))
+
+
+def lstm_windowing(repeat):
+    try:
+        from analysis.lstm_price_prediction import BATCH_SIZE, LOOKBACK, create_sequences, load_prices
+    except ImportError as e:
+        raise Skipped(f"{e.name} is not installed")
+
+    def run(_):
+        # прозорци за секој coin + копија на секој batch, како make_dataset
+        for prices in load_prices(CSV_NAME).values():
+            if len(prices) <= LOOKBACK + 1:
+                continue
+            X, y = create_sequences(prices.astype(np.float32), LOOKBACK)
+            for start in range(0, len(X), BATCH_SIZE):
+                np.ascontiguousarray(X[start:start + BATCH_SIZE])
+
+    return measure(run, range(repeat))
+
+
+# -------- BASELINE -------- #
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Metrics that got worse than the baseline by more than `tolerance`."""
+    regressions = []
+    for case, metrics in results["cases"].items():
+        base = baseline.get("cases", {}).get(case)
+        if not base or "skipped" in metrics or "skipped" in base:
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if metrics[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{case} {key}: {base[key]:.2f} -> {metrics[key]:.2f}")
+        if metrics["throughput_per_s"] < base["throughput_per_s"] / (1 + tolerance):
+            regressions.append(
+                f"{case} throughput_per_s: {base['throughput_per_s']:.1f} -> "
+                f"{metrics['throughput_per_s']:.1f}"
+            )
+    if results["meta"]["dataset"] != baseline.get("meta", {}).get("dataset"):
+        regressions.insert(0, "warning: baseline was recorded on a different dataset")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--requests", type=int, default=200, help="requests per web case")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per analysis case")
+    parser.add_argument("--backend", default="numpy", help="indicator backend for technical_analysis")
+    parser.add_argument("--cases", nargs="+", default=CASES, choices=CASES)
+    parser.add_argument("--out", default=None, help="write the results JSON here")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    baseline_path = os.path.abspath(args.baseline)
+    out_path = os.path.abspath(args.out) if args.out else None
+
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    atexit.register(shutil.rmtree, workdir, True)
+    started = time.perf_counter()
+    df = build_workdir(workdir, args.symbols, args.days, args.seed)
+    setup_seconds = time.perf_counter() - started
+    os.chdir(workdir)
+    symbols = sorted(df["symbol"].unique())
+
+    results = {
+        "meta": {
+            "dataset": {"symbols": args.symbols, "days": args.days, "seed": args.seed, "rows": len(df)},
+            "requests": args.requests,
+            "repeat": args.repeat,
+            "setup_seconds": setup_seconds,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "cases": {},
+    }
+
+    runners = {
+        "technical_analysis": lambda: technical_analysis(args.repeat, args.backend),
+        "onchain_analysis": lambda: onchain_analysis(args.repeat, symbols),
+        "lstm_windowing": lambda: lstm_windowing(args.repeat),
+    }
+    if any(case.startswith("web_") for case in args.cases):
+        runners.update(web_cases(args.requests, symbols))
+
+    print(f"{len(df)} candles, {len(symbols)} symbols in {workdir} ({setup_seconds:.1f}s setup)")
+    print(f"{'case':<20} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'per s':>9} {'rss MB':>8}")
+    for case in args.cases:
+        try:
+            metrics = runners[case]()
+        except Skipped as e:
+            results["cases"][case] = {"skipped": str(e)}
+            print(f"{case:<20} skipped: {e}")
+            continue
+        results["cases"][case] = metrics
+        print(f"{case:<20} {metrics['p50_ms']:>9.2f} {metrics['p95_ms']:>9.2f} "
+              f"{metrics['p99_ms']:>9.2f} {metrics['throughput_per_s']:>9.1f} "
+              f"{metrics['peak_rss_mb']:>8.0f}")
+
+    if out_path:
+        with open(out_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(baseline_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline saved to {baseline_path}")
+        return
+
+    if not os.path.exists(baseline_path):
+        print("no baseline, run with --save-baseline to record one")
+        return
+
+    with open(baseline_path) as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}" if not line.startswith("warning") else line)
+    if any(not line.startswith("warning") for line in regressions):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
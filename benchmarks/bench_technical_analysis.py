@@ -0,0 +1,81 @@
+# Serial vs process-pool run of the per-symbol technical analysis.
+#
+#   python -m benchmarks.bench_technical_analysis --csv data/processed/all_coins.csv
+#
+# --sizes runs the same comparison on synthetic frames of growing size
+# (tests/helpers.generate_coins), to see from how many rows the pool pays off
+# on this machine (analysis.technical_analysis.POOL_MIN_ROWS).
+#
+#   python -m benchmarks.bench_technical_analysis --sizes 10 50 200 800 --days 730
+
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from analysis.technical_analysis import POOL_MIN_ROWS, analyze_symbols, default_workers, load_data
+
+INDICATOR_COLUMNS = ["RSI", "MACD", "MACD_signal", "Stochastic", "ADX", "CCI",
+                     "SMA_20", "EMA_20", "WMA_20", "BB_upper", "BB_lower", "signal"]
+
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def compare(df, workers, chunksize, repeat):
+    """Best serial and pool time for df; both runs must give the same frame."""
+    serial_times, parallel_times = [], []
+    for _ in range(repeat):
+        serial, t = timed(analyze_symbols, df, workers=1)
+        serial_times.append(t)
+        parallel, t = timed(analyze_symbols, df, workers=workers, chunksize=chunksize)
+        parallel_times.append(t)
+
+    # двата пата мора да дадат исти резултати
+    pd.testing.assert_frame_equal(
+        serial[INDICATOR_COLUMNS].sort_index(), parallel[INDICATOR_COLUMNS].sort_index()
+    )
+    return min(serial_times), min(parallel_times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", default=os.path.join("data", "processed", "all_coins.csv"))
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunksize", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--sizes", type=int, nargs="+", default=None,
+                        help="synthetic symbol counts instead of --csv")
+    parser.add_argument("--days", type=int, default=730)
+    args = parser.parse_args()
+
+    if args.sizes:
+        from tests.helpers import generate_coins
+
+        print(f"{args.workers} workers, pool by default from {POOL_MIN_ROWS} rows "
+              f"on more than one CPU ({os.cpu_count()} here)")
+        print(f"{'rows':>9} {'symbols':>8} {'serial s':>9} {'pool s':>9} {'speedup':>8} {'default':>8}")
+        for symbols in args.sizes:
+            df = generate_coins(symbols, args.days)
+            df["date"] = pd.to_datetime(df["time"], unit="s")
+            serial, parallel = compare(df, args.workers, args.chunksize, args.repeat)
+            default = "pool" if default_workers(len(df)) > 1 else "serial"
+            print(f"{len(df):>9} {symbols:>8} {serial:>9.3f} {parallel:>9.3f} "
+                  f"{serial / parallel:>7.2f}x {default:>8}")
+        return
+
+    df = load_data(args.csv)
+    print(f"{len(df)} rows, {df['symbol'].nunique()} symbols, {args.workers} workers")
+
+    best_serial, best_parallel = compare(df, args.workers, args.chunksize, args.repeat)
+    print(f"serial:   {best_serial:.3f}s")
+    print(f"parallel: {best_parallel:.3f}s")
+    print(f"speedup:  {best_serial / best_parallel:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
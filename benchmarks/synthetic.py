@@ -0,0 +1,25 @@
+# Seeded synthetic `coins` data for the benchmarks, written out as an app
+# directory (CSV + users.db). The generators live in tests/helpers.py,
+# shared with the test suite.
+#
+#   python -m benchmarks.synthetic --symbols 500 --days 730 --out /tmp/bench
+
+import argparse
+
+from tests.helpers import build_workdir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic coins dataset")
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True, help="directory for data/ and users.db")
+    args = parser.parse_args()
+
+    df = build_workdir(args.out, args.symbols, args.days, args.seed)
+    print(f"{len(df)} candles, {df['symbol'].nunique()} symbols -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 DROP TABLE IF EXISTS coins;
+DROP TABLE IF EXISTS coin_summary;
 
 CREATE TABLE coins (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -10,3 +11,20 @@ CREATE TABLE coins (
     close REAL,
     volume REAL
 );
+
+CREATE UNIQUE INDEX idx_coins_symbol_time ON coins (symbol, time);
+
+CREATE INDEX idx_coins_symbol_time_close_volume ON coins (symbol, time, close, volume);
+
+CREATE TABLE coin_summary (
+    symbol TEXT PRIMARY KEY,
+    rows INTEGER NOT NULL,
+    first_time INTEGER,
+    last_time INTEGER,
+    last_close REAL,
+    last_volume REAL,
+    total_volume REAL,
+    whale_count INTEGER
+);
+
+PRAGMA user_version = 3;
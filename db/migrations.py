@@ -0,0 +1,60 @@
+# Migrations for the coins part of users.db.
+# The applied version is kept in PRAGMA user_version, so migrate() is safe
+# to call on every ingest run.
+
+from db.repository import refresh_summary
+
+
+def _unique_symbol_time(conn):
+    # стари бази можат да имаат дупликати од претходните reload-и
+    conn.execute(
+        "DELETE FROM coins WHERE id NOT IN "
+        "(SELECT MAX(id) FROM coins GROUP BY symbol, time)"
+    )
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_coins_symbol_time ON coins (symbol, time)"
+    )
+
+
+def _covering_index(conn):
+    # latest close/volume, whale count и SUM(volume) по symbol се читаат
+    # само од индексот, без скок во табелата
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_coins_symbol_time_close_volume "
+        "ON coins (symbol, time, close, volume)"
+    )
+
+
+def _coin_summary(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS coin_summary (
+            symbol TEXT PRIMARY KEY,
+            rows INTEGER NOT NULL,
+            first_time INTEGER,
+            last_time INTEGER,
+            last_close REAL,
+            last_volume REAL,
+            total_volume REAL,
+            whale_count INTEGER
+        )
+        """
+    )
+    refresh_summary(conn)
+
+
+MIGRATIONS = [
+    _unique_symbol_time,
+    _covering_index,
+    _coin_summary,
+]
+
+
+def migrate(conn):
+    """Applies every migration newer than the database's user_version."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, step in enumerate(MIGRATIONS[version:], start=version + 1):
+        with conn:
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+    return len(MIGRATIONS)
@@ -0,0 +1,312 @@
+# Shared SQLite connection pool for app.py and the analysis package.
+# A thread that asks for a connection while it already holds one gets the
+# same handle back, so nested helpers (e.g. OnChainAnalysis.analyze and its
+# _whale_movements/_exchange_flows) share one connection.
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DB_PATH = "users.db"
+
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,   # во KiB, т.е. 64 MB по конекција
+    "busy_timeout": 5000,
+}
+
+
+class PoolTimeout(sqlite3.OperationalError):
+    pass
+
+
+# -------- query timing -------- #
+
+_query_observer = None
+
+
+def set_query_observer(observer):
+    """
+    observer(seconds, statement) is called after every execute*/fetch* on a
+    pooled connection; statement is False for fetches, so one query's time
+    includes reading its rows. None turns it off.
+    """
+    global _query_observer
+    _query_observer = observer
+
+
+def _observe(started, statement=True):
+    observer = _query_observer
+    if observer is not None:
+        observer(time.perf_counter() - started, statement)
+
+
+class TimedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _observe(started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _observe(started)
+
+    def executescript(self, sql_script):
+        started = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            _observe(started)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            _observe(started, False)
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        try:
+            return super().fetchmany(self.arraysize if size is None else size)
+        finally:
+            _observe(started, False)
+
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            _observe(started, False)
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose cursors report to the query observer."""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    # sqlite3.Connection.execute* не минуваат низ Python execute на cursor-от
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+class PooledConnection:
+    """
+    Thin wrapper returned by get_db(): close() hands the connection back
+    to the pool instead of closing it. As a context manager it is handed
+    back on exit, also when the block raises (uncommitted work is rolled
+    back).
+
+        with get_db() as conn:
+            ...
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            self._pool.release(self._conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class ConnectionPool:
+    def __init__(self, path=DB_PATH, max_size=8, timeout=30.0, max_lifetime=3600.0,
+                 pragmas=None):
+        self.path = path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.pragmas = PRAGMAS if pragmas is None else pragmas
+
+        self._idle = queue.LifoQueue()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._open = 0
+        self._born = {}
+
+        self._stats = {
+            "created": 0,
+            "closed": 0,
+            "hits": 0,
+            "reuses": 0,
+            "misses": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "closed_lifetime_seconds": 0.0,
+        }
+
+    # -------- connections -------- #
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path, check_same_thread=False, timeout=self.timeout, factory=TimedConnection
+        )
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        with self._lock:
+            self._born[id(conn)] = time.monotonic()
+            self._stats["created"] += 1
+        return conn
+
+    def _discard(self, conn):
+        conn.close()
+        with self._lock:
+            born = self._born.pop(id(conn), None)
+            self._open -= 1
+            self._stats["closed"] += 1
+            if born is not None:
+                self._stats["closed_lifetime_seconds"] += time.monotonic() - born
+
+    def _expired(self, conn):
+        born = self._born.get(id(conn))
+        return born is not None and time.monotonic() - born > self.max_lifetime
+
+    def acquire(self):
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            self._local.depth += 1
+            with self._lock:
+                self._stats["reuses"] += 1
+            return held
+
+        try:
+            conn = self._idle.get_nowait()
+            with self._lock:
+                self._stats["hits"] += 1
+        except queue.Empty:
+            with self._lock:
+                can_open = self._open < self.max_size
+                if can_open:
+                    self._open += 1
+                    self._stats["misses"] += 1
+            if can_open:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._open -= 1
+                    raise
+            else:
+                started = time.monotonic()
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise PoolTimeout(
+                        f"no connection to {self.path} free after {self.timeout}s"
+                    )
+                with self._lock:
+                    self._stats["waits"] += 1
+                    self._stats["wait_seconds"] += time.monotonic() - started
+
+        if self._expired(conn):
+            self._discard(conn)
+            with self._lock:
+                self._open += 1
+            conn = self._connect()
+
+        self._local.conn = conn
+        self._local.depth = 1
+        return conn
+
+    def release(self, conn):
+        if getattr(self._local, "conn", None) is not conn:
+            # пуштена од друг thread, само врати ја
+            self._return(conn)
+            return
+
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            self._local.conn = None
+            self._return(conn)
+
+    def _return(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    # -------- stats -------- #
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            now = time.monotonic()
+            ages = [now - born for born in self._born.values()]
+            stats["open"] = self._open
+        stats["idle"] = self._idle.qsize()
+        stats["in_use"] = stats["open"] - stats["idle"]
+        stats["max_size"] = self.max_size
+        stats["open_age_seconds_max"] = max(ages) if ages else 0.0
+        stats["closed_lifetime_seconds_avg"] = (
+            stats["closed_lifetime_seconds"] / stats["closed"] if stats["closed"] else 0.0
+        )
+        return stats
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path=DB_PATH, **kwargs):
+    """
+    One pool per database path and per process. A forked worker gets a
+    fresh pool, SQLite connections must not cross fork().
+    """
+    key = (os.getpid(), path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(path, **kwargs)
+        return pool
+
+
+def get_connection(path=DB_PATH):
+    """Pooled connection whose close() returns it to the pool."""
+    pool = get_pool(path)
+    return PooledConnection(pool, pool.acquire())
@@ -0,0 +1,164 @@
+# Every query against the coins table goes through here, so the indexes
+# and the coin_summary table from db/migrations.py are actually used.
+
+import pandas as pd
+
+COIN_COLUMNS = ["symbol", "time", "open", "high", "low", "close", "volume"]
+
+# volume над оваа граница се брои како whale movement
+WHALE_VOLUME = 1000
+
+UPSERT_SQL = f"""
+    INSERT INTO coins ({", ".join(COIN_COLUMNS)})
+    VALUES ({", ".join("?" for _ in COIN_COLUMNS)})
+    ON CONFLICT(symbol, time) DO UPDATE SET
+        open = excluded.open,
+        high = excluded.high,
+        low = excluded.low,
+        close = excluded.close,
+        volume = excluded.volume
+"""
+
+
+def _has_summary(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='coin_summary'"
+    ).fetchone() is not None
+
+
+# -------- READ -------- #
+
+def load_coins(conn, columns=None, symbol=None):
+    cols = ", ".join(columns or COIN_COLUMNS)
+    if symbol is None:
+        return pd.read_sql_query(f"SELECT {cols} FROM coins", conn)
+    return pd.read_sql_query(
+        f"SELECT {cols} FROM coins WHERE symbol=? ORDER BY time", conn, params=(symbol,)
+    )
+
+
+def latest_close_volume(conn, symbol):
+    """(close, volume) of the newest candle, or None if the symbol is unknown."""
+    return conn.execute(
+        "SELECT close, volume FROM coins WHERE symbol=? ORDER BY time DESC LIMIT 1",
+        (symbol,),
+    ).fetchone()
+
+
+def whale_count(conn, symbol, threshold=WHALE_VOLUME):
+    if threshold == WHALE_VOLUME and _has_summary(conn):
+        row = conn.execute(
+            "SELECT whale_count FROM coin_summary WHERE symbol=?", (symbol,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    return conn.execute(
+        "SELECT COUNT(*) FROM coins WHERE symbol=? AND volume>=?",
+        (symbol, threshold),
+    ).fetchone()[0]
+
+
+def total_volume(conn, symbol):
+    if _has_summary(conn):
+        row = conn.execute(
+            "SELECT total_volume FROM coin_summary WHERE symbol=?", (symbol,)
+        ).fetchone()
+        return (row[0] or 0) if row else 0
+
+    val = conn.execute(
+        "SELECT SUM(volume) FROM coins WHERE symbol=?", (symbol,)
+    ).fetchone()[0]
+    return val or 0
+
+
+def symbol_aggregates(conn, symbols=None, threshold=WHALE_VOLUME):
+    """
+    One row per symbol: latest price/volume, whale count and total volume,
+    from a single grouped query.
+    """
+    params = []
+    where = ""
+    if symbols is not None:
+        symbols = list(symbols)
+        where = f"WHERE symbol IN ({', '.join('?' for _ in symbols)})"
+        params += symbols
+
+    if threshold == WHALE_VOLUME and _has_summary(conn):
+        return pd.read_sql_query(
+            f"""
+            SELECT symbol,
+                   last_close AS price,
+                   last_volume AS volume,
+                   whale_count AS whale_movements,
+                   total_volume AS exchange_flow
+            FROM coin_summary {where}
+            """,
+            conn,
+            params=params,
+        )
+
+    # со точно еден MAX(), SQLite ги зема close/volume од редот со MAX(time)
+    return pd.read_sql_query(
+        f"""
+        SELECT symbol,
+               MAX(time) AS last_time,
+               close AS price,
+               volume,
+               SUM(volume >= ?) AS whale_movements,
+               SUM(volume) AS exchange_flow
+        FROM coins {where}
+        GROUP BY symbol
+        """,
+        conn,
+        params=[threshold] + params,
+    ).drop(columns="last_time")
+
+
+def max_times(conn):
+    """{symbol: latest stored time}"""
+    if _has_summary(conn):
+        return dict(conn.execute("SELECT symbol, last_time FROM coin_summary").fetchall())
+    return dict(conn.execute("SELECT symbol, MAX(time) FROM coins GROUP BY symbol").fetchall())
+
+
+# -------- WRITE -------- #
+
+def upsert_candles(conn, rows):
+    """rows: DataFrame with COIN_COLUMNS. Caller owns the transaction."""
+    conn.executemany(UPSERT_SQL, rows[COIN_COLUMNS].itertuples(index=False, name=None))
+
+
+def refresh_summary(conn, symbols=None, threshold=WHALE_VOLUME):
+    """
+    Recomputes coin_summary for the given symbols (all of them if None).
+    Ingestion calls this with just the symbols it touched.
+    """
+    where = ""
+    params = [threshold]
+    if symbols is not None:
+        symbols = list(symbols)
+        if not symbols:
+            return
+        where = f"WHERE c.symbol IN ({', '.join('?' for _ in symbols)})"
+        params += symbols
+
+    conn.execute(
+        f"""
+        INSERT OR REPLACE INTO coin_summary
+            (symbol, rows, first_time, last_time, last_close, last_volume,
+             total_volume, whale_count)
+        SELECT
+            c.symbol,
+            COUNT(*),
+            MIN(c.time),
+            MAX(c.time),
+            (SELECT close FROM coins WHERE symbol=c.symbol ORDER BY time DESC LIMIT 1),
+            (SELECT volume FROM coins WHERE symbol=c.symbol ORDER BY time DESC LIMIT 1),
+            SUM(c.volume),
+            SUM(c.volume >= ?)
+        FROM coins c
+        {where}
+        GROUP BY c.symbol
+        """,
+        params,
+    )
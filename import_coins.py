@@ -1,8 +1,9 @@
 import sqlite3
-import pandas as pd
+
+from db.repository import load_coins
 
 conn = sqlite3.connect("users.db")
-df = pd.read_sql_query("SELECT * FROM coins", conn)
+df = load_coins(conn)
 conn.close()
 
 
@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+
+COIN_STATS_TABLE = "coin_stats"
+
+# промена во % наназад за N свеќи (1h колоната е претходната свеќа, како досега)
+HORIZONS = {"change_1h": 1, "change_7d": 7, "change_30d": 30}
+YEAR_SECONDS = 365 * 86400
+VOLATILITY_WINDOW = 30      # returns за volatility_30d
+PERIODS_PER_YEAR = 365
+
+LAST_COLUMNS = ["time", "open", "high", "low", "close", "volume"]
+STAT_COLUMNS = list(HORIZONS) + [
+    "ath", "atl", "high_all", "low_all", "high_52w", "low_52w",
+    "drawdown", "volatility_30d",
+]
+COIN_STATS_COLUMNS = LAST_COLUMNS + STAT_COLUMNS
+
+
+# -------- BUILD -------- #
+
+def compute_coin_stats(store, symbols=None):
+    """
+    Per-symbol stats for coin_detail from an OHLCVStore, every symbol in one
+    vectorized pass (groups are reduced with ufunc.reduceat):
+    last candle, 1h/7d/30d change, all-time and 52-week high/low, drawdown
+    from the all-time high close and annualized 30-candle volatility.
+    With symbols set only those are computed (ingest passes the touched ones).
+    """
+    names = list(store.index) if symbols is None else [s for s in symbols if s in store]
+    names = [s for s in names if store.index[s][1] > store.index[s][0]]
+    if not names:
+        return pd.DataFrame(columns=COIN_STATS_COLUMNS, index=pd.Index([], name="symbol"))
+
+    bounds = np.array([store.index[s] for s in names], dtype=np.int64)
+    lengths = bounds[:, 1] - bounds[:, 0]
+    positions = np.concatenate([np.arange(start, end) for start, end in bounds])
+    cols = {c: np.asarray(store.columns[c])[positions] for c in LAST_COLUMNS}
+
+    starts = np.r_[0, np.cumsum(lengths)[:-1]]
+    last = starts + lengths - 1
+    group = np.repeat(np.arange(len(names)), lengths)
+    close, high, low, times = cols["close"], cols["high"], cols["low"], cols["time"]
+
+    out = {c: cols[c][last] for c in LAST_COLUMNS}
+    last_close = out["close"]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for name, n in HORIZONS.items():
+            prev = last - n
+            valid = prev >= starts
+            prev_close = close[np.where(valid, prev, last)]
+            out[name] = np.where(
+                valid & (prev_close != 0), (last_close - prev_close) / prev_close * 100.0, 0.0
+            )
+
+        out["ath"] = np.maximum.reduceat(close, starts)
+        out["atl"] = np.minimum.reduceat(close, starts)
+        out["high_all"] = np.maximum.reduceat(high, starts)
+        out["low_all"] = np.minimum.reduceat(low, starts)
+
+        # 52 недели наназад од последната свеќа на секој symbol
+        in_year = times >= (times[last] - YEAR_SECONDS)[group]
+        out["high_52w"] = np.maximum.reduceat(np.where(in_year, high, -np.inf), starts)
+        out["low_52w"] = np.minimum.reduceat(np.where(in_year, low, np.inf), starts)
+
+        out["drawdown"] = np.where(
+            out["ath"] != 0, (last_close - out["ath"]) / out["ath"] * 100.0, 0.0
+        )
+
+        # returns во последните VOLATILITY_WINDOW свеќи, без првата свеќа на symbol
+        returns = np.zeros(len(close))
+        returns[1:] = close[1:] / close[:-1] - 1.0
+        row = np.arange(len(close))
+        window = (row > starts[group]) & (row > last[group] - VOLATILITY_WINDOW) & np.isfinite(returns)
+        count = np.add.reduceat(window.astype(np.float64), starts)
+        total = np.add.reduceat(np.where(window, returns, 0.0), starts)
+        squares = np.add.reduceat(np.where(window, returns * returns, 0.0), starts)
+        var = np.where(count > 1, (squares - total * total / count) / (count - 1), 0.0)
+        out["volatility_30d"] = np.sqrt(np.maximum(var, 0.0)) * np.sqrt(PERIODS_PER_YEAR) * 100.0
+
+    return pd.DataFrame(out, index=pd.Index(names, name="symbol"))[COIN_STATS_COLUMNS]
+
+
+def coin_stats_dict(stats):
+    """{symbol: {column: python value}} for O(1) lookups in the views."""
+    records = stats.to_dict(orient="index")
+    for record in records.values():
+        record["time"] = int(record["time"])
+    return records
+
+
+# -------- PERSISTENCE -------- #
+
+def load_coin_stats(conn, version=None):
+    """
+    The persisted stats, or None if they were never written or were
+    computed for a different store version than `version`.
+    """
+    exists = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
+        (COIN_STATS_TABLE,),
+    ).fetchone()
+    if not exists:
+        return None
+
+    stats = pd.read_sql_query(
+        f"SELECT symbol, version, {', '.join(COIN_STATS_COLUMNS)} FROM {COIN_STATS_TABLE}", conn
+    )
+    if stats.empty:
+        return None
+    if version is not None and (stats["version"] != version).any():
+        return None
+    return stats.drop(columns="version").set_index("symbol").sort_index()
+
+
+def _stored_symbols(conn):
+    exists = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
+        (COIN_STATS_TABLE,),
+    ).fetchone()
+    if not exists:
+        return set()
+    return {symbol for (symbol,) in conn.execute(f"SELECT symbol FROM {COIN_STATS_TABLE}")}
+
+
+def save_coin_stats(conn, stats, version, replace=False):
+    """Upserts the rows in stats and stamps the whole table with `version`."""
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {COIN_STATS_TABLE} (
+            symbol TEXT PRIMARY KEY,
+            version TEXT NOT NULL,
+            time INTEGER NOT NULL,
+            {", ".join(f"{c} REAL" for c in COIN_STATS_COLUMNS[1:])}
+        )
+        """
+    )
+    if replace:
+        conn.execute(f"DELETE FROM {COIN_STATS_TABLE}")
+    conn.executemany(
+        f"INSERT OR REPLACE INTO {COIN_STATS_TABLE} (symbol, version, {', '.join(COIN_STATS_COLUMNS)}) "
+        f"VALUES ({', '.join('?' for _ in range(len(COIN_STATS_COLUMNS) + 2))})",
+        [
+            (symbol, version, int(row[0]), *(float(v) for v in row[1:]))
+            for symbol, row in zip(stats.index, stats[COIN_STATS_COLUMNS].to_numpy(dtype=object))
+        ],
+    )
+    conn.execute(f"UPDATE {COIN_STATS_TABLE} SET version=?", (version,))
+
+
+def refresh_coin_stats(conn, store, symbols=None):
+    """
+    Called by the ingestion script once the new store version is written.
+    Only `symbols` are recomputed; the others cannot change, because every
+    window is anchored on the symbol's own last candle. Falls back to all
+    symbols when the table does not cover the store yet (first ingest).
+    """
+    if symbols is not None and set(store.index) - set(symbols) - _stored_symbols(conn):
+        symbols = None
+    stats = compute_coin_stats(store, symbols)
+    save_coin_stats(conn, stats, store.version, replace=symbols is None)
+    return stats
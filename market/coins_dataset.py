@@ -0,0 +1,297 @@
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Columnar copy of data/processed/all_coins.csv shared by the analysis
+# loaders. The CSV is parsed once into a Parquet dataset partitioned by
+# symbol (symbol=BTC/part-0.parquet, ...) with compact types:
+#   symbol  -> categorical (dictionary)
+#   time    -> int64
+#   prices, volume -> float32
+# Readers ask only for the columns and rows they need; the symbol filter
+# skips whole partitions and the time filter uses the Parquet row-group
+# statistics, so e.g. BTC close never touches the other files.
+# float32 is only the on-disk format: load_coins hands out float64 values,
+# so indicator code (ta, the NumPy kernels) computes in double precision.
+#
+#   load_coins(symbols=["BTC"], columns=["time", "close"])
+#
+# The dataset lives next to its CSV (all_coins.csv -> all_coins.parquet/)
+# and is rebuilt automatically when the CSV changes (size/mtime), into a
+# new version directory with an atomic CURRENT swap, like the OHLCV store.
+# The incremental ingest uses extend_dataset instead: the new version
+# hard-links the existing files and adds only the new candles.
+
+CSV_PATH = os.path.join("data", "processed", "all_coins.csv")
+
+COLUMNS = ["symbol", "time", "open", "high", "low", "close", "volume"]
+VALUE_COLUMNS = ["open", "high", "low", "close", "volume"]
+SCHEMA = pa.schema(
+    [("symbol", pa.string()), ("time", pa.int64())]
+    + [(col, pa.float32()) for col in VALUE_COLUMNS]
+)
+PARTITIONING = ds.partitioning(
+    pa.schema([("symbol", pa.dictionary(pa.int32(), pa.string()))]),
+    flavor="hive",
+    dictionaries="infer",
+)
+
+# редови по row group, за time филтрите да прескокнуваат парчиња
+ROW_GROUP_SIZE = 64 * 1024
+# фајлови по symbol пред extend_dataset да ги спои во еден
+MAX_FRAGMENTS = 32
+# колку стари верзии да останат на диск (читач можеби уште ги користи)
+KEEP_VERSIONS = 2
+
+
+# -------- BUILD -------- #
+
+def dataset_dir(csv_path=CSV_PATH):
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def _source(csv_path):
+    stat = os.stat(csv_path)
+    return {"csv": os.path.abspath(csv_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _current_dir(path):
+    try:
+        with open(os.path.join(path, "CURRENT")) as f:
+            return os.path.join(path, f.read().strip())
+    except FileNotFoundError:
+        return None
+
+
+def dataset_is_fresh(csv_path=CSV_PATH, path=None):
+    """True when the dataset exists and was built from the CSV as it is now."""
+    version_dir = _current_dir(path or dataset_dir(csv_path))
+    if version_dir is None:
+        return False
+    try:
+        with open(os.path.join(version_dir, "_source.json")) as f:
+            return json.load(f) == _source(csv_path)
+    except FileNotFoundError:
+        return False
+
+
+def build_dataset(csv_path=CSV_PATH, path=None):
+    """
+    Parses the CSV once with the target types and writes it as a
+    symbol-partitioned Parquet dataset, rows sorted by time inside each
+    symbol. Returns the version directory name.
+    """
+    path = path or dataset_dir(csv_path)
+    source = _source(csv_path)
+    table = pacsv.read_csv(
+        csv_path,
+        convert_options=pacsv.ConvertOptions(
+            column_types=SCHEMA, include_columns=COLUMNS
+        ),
+    )
+
+    version = f"v{time.time_ns()}"
+    version_dir = os.path.join(path, version)
+    _write_fragments(table, version_dir, "part-{i}.parquet")
+    return _publish(path, version, source)
+
+
+def extend_dataset(new_rows, csv_path=CSV_PATH, path=None):
+    """
+    Next version for the incremental ingest: the current fragments are
+    hard-linked into it and only new_rows (candles newer than the stored
+    history) are written, as one extra fragment per touched symbol.
+    A symbol with more than MAX_FRAGMENTS files is compacted back into
+    one. Without a current version it falls back to build_dataset.
+    """
+    path = path or dataset_dir(csv_path)
+    current = _current_dir(path)
+    if current is None:
+        return build_dataset(csv_path, path)
+    # loader веќе го изградил од истото CSV: новите свеќи се таму
+    if dataset_is_fresh(csv_path, path):
+        return os.path.basename(current)
+    source = _source(csv_path)
+
+    # само свеќи понови од последната зачувана по symbol, како ingest-от
+    touched = list(pd.unique(new_rows["symbol"].astype(str)))
+    stored = ds.dataset(current, format="parquet", partitioning=PARTITIONING).to_table(
+        columns=["symbol", "time"], filter=_filter(symbols=touched)
+    ).to_pandas()
+    latest = stored.groupby("symbol", observed=True)["time"].max()
+    new_rows = new_rows[new_rows["time"] > new_rows["symbol"].astype(str).map(latest).fillna(-1)]
+
+    version = f"v{time.time_ns()}"
+    version_dir = os.path.join(path, version)
+    for root, _, files in os.walk(current):
+        target = os.path.join(version_dir, os.path.relpath(root, current))
+        os.makedirs(target, exist_ok=True)
+        for name in files:
+            if name.endswith(".parquet"):
+                _link(os.path.join(root, name), os.path.join(target, name))
+
+    table = pa.Table.from_pandas(new_rows[COLUMNS], schema=SCHEMA, preserve_index=False)
+    _write_fragments(table, version_dir, f"part-{version}-{{i}}.parquet")
+
+    for symbol in pc.unique(table["symbol"]).to_pylist():
+        partition = os.path.join(version_dir, f"symbol={symbol}")
+        # symbols со посебни знаци се URI-кодирани во името, тие остануваат
+        if os.path.isdir(partition) and len(os.listdir(partition)) > MAX_FRAGMENTS:
+            _compact(partition)
+    return _publish(path, version, source)
+
+
+def _link(src, dst):
+    # исти фајлови без копирање; читач на старата верзија не се менува
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _write_fragments(table, version_dir, basename):
+    table = table.sort_by([("symbol", "ascending"), ("time", "ascending")])
+    ds.write_dataset(
+        table,
+        version_dir,
+        format="parquet",
+        partitioning=ds.partitioning(pa.schema([("symbol", pa.string())]), flavor="hive"),
+        basename_template=basename,
+        max_rows_per_group=ROW_GROUP_SIZE,
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def _compact(partition):
+    files = sorted(os.path.join(partition, name) for name in os.listdir(partition))
+    table = ds.dataset(files, format="parquet").to_table().sort_by("time")
+    tmp = os.path.join(partition, "compact.tmp")
+    pq.write_table(table, tmp, row_group_size=ROW_GROUP_SIZE)
+    for name in files:
+        os.remove(name)
+    os.replace(tmp, os.path.join(partition, "part-0.parquet"))
+
+
+def _publish(path, version, source):
+    version_dir = os.path.join(path, version)
+    with open(os.path.join(version_dir, "_source.json"), "w") as f:
+        json.dump(source, f)
+
+    tmp = os.path.join(path, f"CURRENT.{os.getpid()}")
+    with open(tmp, "w") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(path, "CURRENT"))
+
+    _prune_versions(path, version)
+    return version
+
+
+def _prune_versions(path, current):
+    older = sorted(
+        name for name in os.listdir(path)
+        if name.startswith("v") and name != current
+    )
+    for name in older[:max(len(older) - (KEEP_VERSIONS - 1), 0)]:
+        shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+
+
+def ensure_dataset(csv_path=CSV_PATH, path=None):
+    """The current version directory, (re)built first if the CSV changed."""
+    path = path or dataset_dir(csv_path)
+    if not dataset_is_fresh(csv_path, path):
+        build_dataset(csv_path, path)
+    return _current_dir(path)
+
+
+# -------- READ -------- #
+
+def open_dataset(csv_path=CSV_PATH, path=None):
+    return ds.dataset(
+        ensure_dataset(csv_path, path), format="parquet", partitioning=PARTITIONING
+    )
+
+
+def _filter(symbols=None, start=None, end=None):
+    expr = None
+    parts = []
+    if symbols is not None:
+        parts.append(pc.field("symbol").isin(list(symbols)))
+    if start is not None:
+        parts.append(pc.field("time") >= start)
+    if end is not None:
+        parts.append(pc.field("time") <= end)
+    for part in parts:
+        expr = part if expr is None else expr & part
+    return expr
+
+
+def _sort(table):
+    """Rows by (symbol, time); arrow cannot sort dictionary columns, so by dictionary rank."""
+    if table.num_rows == 0:
+        return table
+    table = table.unify_dictionaries()
+    symbol = table["symbol"].combine_chunks()
+    rank = np.argsort(np.argsort(symbol.dictionary.to_numpy(zero_copy_only=False), kind="stable"))
+    keys = rank[symbol.indices.to_numpy()]
+    order = np.lexsort((table["time"].to_numpy(), keys))
+    # фрагментите обично веќе се по ред, тогаш без копија
+    if (np.diff(order) == 1).all():
+        return table
+    return table.take(order)
+
+
+def load_table(symbols=None, columns=None, start=None, end=None,
+               csv_path=CSV_PATH, path=None):
+    """
+    pyarrow Table with `columns` (all of COLUMNS by default) for `symbols`
+    and start <= time <= end; every filter is pushed down to the scan.
+    Rows come grouped by symbol and sorted by time.
+    """
+    columns = COLUMNS if columns is None else list(columns)
+    dataset = open_dataset(csv_path, path)
+    # symbol треба за сортирање, се отстранува ако не е побаран
+    scan_columns = columns if "symbol" in columns else ["symbol"] + columns
+    if "time" not in scan_columns:
+        scan_columns = scan_columns + ["time"]
+    table = dataset.to_table(columns=scan_columns, filter=_filter(symbols, start, end))
+    return _sort(table).select(columns)
+
+
+def load_coins(symbols=None, columns=None, start=None, end=None,
+               csv_path=CSV_PATH, path=None, dtype=np.float64):
+    """
+    Same as load_table, as a DataFrame: categorical symbol (only the
+    categories present), int64 time and the values as `dtype` (float64
+    by default; np.float32 keeps the on-disk precision and half the memory).
+    """
+    df = load_table(symbols, columns, start, end, csv_path, path).to_pandas()
+    if "symbol" in df.columns:
+        df["symbol"] = df["symbol"].cat.remove_unused_categories()
+    values = [col for col in VALUE_COLUMNS if col in df.columns]
+    if values and dtype != np.float32:
+        df[values] = df[values].astype(dtype)
+    return df
+
+
+def read_csv_chunks(csv_path=CSV_PATH, chunk_rows=50_000, columns=COLUMNS):
+    """
+    The CSV itself in chunks, values as float64 so the ingest stores the
+    exact numbers (the Parquet copy is float32) and time as int64.
+    """
+    dtypes = {"symbol": "object", **{col: np.float64 for col in VALUE_COLUMNS}}
+    for chunk in pd.read_csv(
+        csv_path, usecols=columns, chunksize=chunk_rows,
+        dtype={c: dtypes[c] for c in columns if c in dtypes},
+    ):
+        if "time" in chunk.columns:
+            chunk["time"] = chunk["time"].astype("int64")
+        yield chunk
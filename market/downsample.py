@@ -0,0 +1,86 @@
+import numpy as np
+
+# Downsampling for the price charts. Both functions return indices into the
+# input, so the caller can pick any column (time, close, ...) with them and
+# the first and last points are always kept.
+
+# најмал број точки што методот може да го врати (прва, последна и барем
+# еден bucket); помалку не се бара, /api/coin/<symbol>/series враќа 400
+MIN_POINTS = {"lttb": 3, "minmax": 4}
+
+
+def minmax(y, points):
+    """
+    Splits y into points // 2 buckets and keeps the min and the max of each,
+    in time order. Spikes survive, which plain striding would drop.
+    """
+    n = len(y)
+    points = max(points, MIN_POINTS["minmax"])
+    if points >= n:
+        return np.arange(n)
+
+    buckets = (points - 2) // 2
+    edges = np.linspace(1, n - 1, buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    starts = starts[np.r_[True, starts[1:] != starts[:-1]]]
+
+    inner = y[1:n - 1]
+    rel = starts - 1
+    lengths = np.diff(np.r_[rel, len(inner)])
+    # сортирано по (bucket, вредност): прв во bucket е min, последен е max
+    order = np.lexsort((inner, np.repeat(np.arange(len(rel)), lengths)))
+    lo = order[rel]
+    hi = order[rel + lengths - 1]
+
+    return np.unique(np.concatenate([[0], lo + 1, hi + 1, [n - 1]]))
+
+
+def lttb(x, y, points):
+    """
+    Largest-Triangle-Three-Buckets: per bucket keeps the point that forms
+    the largest triangle with the previously kept point and the average of
+    the next bucket. Keeps the shape of the line better than minmax at low
+    point counts. The loop runs once per output point, not per input row.
+    """
+    n = len(y)
+    points = max(points, MIN_POINTS["lttb"])
+    if points >= n:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+
+    # просеци на секој bucket однапред, со cumsum
+    cx = np.r_[0.0, np.cumsum(x)]
+    cy = np.r_[0.0, np.cumsum(y)]
+    next_starts = np.r_[edges[1:-1], n - 1]
+    next_ends = np.r_[edges[2:], n]
+    counts = np.maximum(next_ends - next_starts, 1)
+    avg_x = (cx[next_ends] - cx[next_starts]) / counts
+    avg_y = (cy[next_ends] - cy[next_starts]) / counts
+
+    idx = np.empty(points, dtype=np.int64)
+    idx[0] = 0
+    idx[-1] = n - 1
+    a = 0
+    for b in range(points - 2):
+        start, end = edges[b], edges[b + 1]
+        if start >= end:
+            idx[b + 1] = a
+            continue
+        bx = x[start:end]
+        by = y[start:end]
+        area = np.abs((x[a] - avg_x[b]) * (by - y[a]) - (x[a] - bx) * (avg_y[b] - y[a]))
+        a = start + int(np.argmax(area))
+        idx[b + 1] = a
+    return np.unique(idx)
+
+
+def downsample(x, y, points, method="lttb"):
+    """Indices of at most max(points, MIN_POINTS[method]) kept rows."""
+    if method == "lttb":
+        return lttb(x, y, points)
+    if method == "minmax":
+        return minmax(y, points)
+    raise ValueError(f"Unknown downsampling method: {method}")
@@ -0,0 +1,13 @@
+def fmt_number(x):
+    x = float(x)
+    abs_x = abs(x)
+    if abs_x >= 1_000_000_000_000:
+        return f"{x/1_000_000_000_000:.2f}T"
+    elif abs_x >= 1_000_000_000:
+        return f"{x/1_000_000_000:.2f}B"
+    elif abs_x >= 1_000_000:
+        return f"{x/1_000_000:.2f}M"
+    elif abs_x >= 1_000:
+        return f"{x/1_000:.2f}K"
+    else:
+        return f"{x:.2f}"
@@ -0,0 +1,178 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Read-only index over snapshot_stats() for the /markets page. Built once
+# per data version (web/market_data.py), so a request only does bisection,
+# mask lookups and a partial selection of the rows it actually shows:
+#   - price, volume and market cap presorted, range filters via searchsorted
+#   - every substring of every symbol -> positions, for the search box
+#   - prefix sums of market cap and volume along each presorted order, so
+#     totals over a single range cost O(1)
+
+MarketPage = namedtuple("MarketPage", "symbols total total_market_cap total_volume")
+
+
+class MarketIndex:
+    def __init__(self, stats):
+        # редоследот на stats е редоследот за исти вредности, како кај sorted()
+        self.symbols = np.array(list(stats), dtype=object)
+        self.positions = {s: i for i, s in enumerate(self.symbols)}
+        n = len(self.symbols)
+
+        self.values = {
+            "price": np.fromiter((v["last_close"] for v in stats.values()), np.float64, n),
+            "volume": np.fromiter((v["last_volume"] for v in stats.values()), np.float64, n),
+            "market_cap": np.fromiter((v["market_cap"] for v in stats.values()), np.float64, n),
+        }
+
+        self.order = {}
+        self.sorted_values = {}
+        self.prefix = {}
+        for key, values in self.values.items():
+            order = np.argsort(values, kind="stable")
+            self.order[key] = order
+            self.sorted_values[key] = values[order]
+            self.prefix[key] = {
+                total: np.r_[0.0, np.cumsum(self.values[total][order])]
+                for total in ("market_cap", "volume")
+            }
+        # desc со stable tie-break по позиција, исто како sorted(reverse=True)
+        self.order_desc = {
+            key: np.argsort(-values, kind="stable") for key, values in self.values.items()
+        }
+
+        # за keyset pagination по symbol (/api/markets?after=)
+        self.sorted_symbols = np.sort(self.symbols)
+
+        substrings = {}
+        for i, symbol in enumerate(self.symbols):
+            seen = set()
+            for start in range(len(symbol)):
+                for end in range(start + 1, len(symbol) + 1):
+                    seen.add(symbol[start:end])
+            for sub in seen:
+                substrings.setdefault(sub, []).append(i)
+        self.substrings = {sub: np.array(pos, dtype=np.int64) for sub, pos in substrings.items()}
+
+    def __len__(self):
+        return len(self.symbols)
+
+    # -------- filters -------- #
+
+    def _range(self, key, low=None, high=None):
+        """[lo, hi) into order[key] for low <= value <= high."""
+        values = self.sorted_values[key]
+        lo = 0 if low is None else int(np.searchsorted(values, low, side="left"))
+        # NaN е на крајот од сортираната низа и не поминува ниеден филтер
+        high = np.inf if high is None else high
+        hi = int(np.searchsorted(values, high, side="right"))
+        return lo, max(lo, hi)
+
+    def _filters(self, query, min_vol, min_price, max_price):
+        ranges = {}
+        if min_vol is not None:
+            ranges["volume"] = self._range("volume", low=min_vol)
+        if min_price > 0 or max_price > 0:
+            ranges["price"] = self._range(
+                "price",
+                low=min_price if min_price > 0 else None,
+                high=max_price if max_price > 0 else None,
+            )
+        text = None
+        if query:
+            text = self.substrings.get(query, np.empty(0, dtype=np.int64))
+        return ranges, text
+
+    def matches(self, symbol, query="", min_vol=0, min_price=0, max_price=0):
+        i = self.positions.get(symbol)
+        if i is None:
+            return False
+        price = self.values["price"][i]
+        return (
+            self.values["volume"][i] >= min_vol
+            and (min_price <= 0 or price >= min_price)
+            and (max_price <= 0 or price <= max_price)
+            and (not query or query in symbol)
+        )
+
+    # -------- pages -------- #
+
+    def query(self, query="", min_vol=0, min_price=0, max_price=0,
+              sort="price", direction="desc", page=1, per_page=15):
+        """
+        Same filters and order as the old markets() view, one page of
+        symbols. Like that view, any sort other than "price" (market_cap
+        included) orders by volume; page is 1-based, the caller clamps it.
+        """
+        sort = "price" if sort == "price" else "volume"
+        ranges, text = self._filters(query, min_vol, min_price, max_price)
+        n = len(self.symbols)
+
+        # вистински ограничувања (опсег кој не е целата низа)
+        active = {k: r for k, r in ranges.items() if r != (0, n)}
+
+        if text is None and len(active) <= 1:
+            key, (lo, hi) = next(iter(active.items())) if active else (sort, (0, n))
+            total = hi - lo
+            prefix = self.prefix[key]
+            total_market_cap = prefix["market_cap"][hi] - prefix["market_cap"][lo]
+            total_volume = prefix["volume"][hi] - prefix["volume"][lo]
+            if not active:
+                # без филтри: страната е директно парче од пресортираниот редослед
+                order = self.order_desc[sort] if direction == "desc" else self.order[sort]
+                start = (page - 1) * per_page
+                return MarketPage(
+                    list(self.symbols[order[max(start, 0):max(start + per_page, 0)]]),
+                    total, float(total_market_cap), float(total_volume),
+                )
+            candidates = np.sort(self.order[key][lo:hi])
+        else:
+            mask = np.ones(n, dtype=bool)
+            for key, (lo, hi) in active.items():
+                keep = np.zeros(n, dtype=bool)
+                keep[self.order[key][lo:hi]] = True
+                mask &= keep
+            if text is not None:
+                keep = np.zeros(n, dtype=bool)
+                keep[text] = True
+                mask &= keep
+            candidates = np.flatnonzero(mask)
+            total = len(candidates)
+            total_market_cap = self.values["market_cap"][candidates].sum()
+            total_volume = self.values["volume"][candidates].sum()
+
+        return MarketPage(
+            self._select(candidates, sort, direction, page, per_page),
+            total, float(total_market_cap), float(total_volume),
+        )
+
+    def _select(self, candidates, sort, direction, page, per_page):
+        """One page of candidates in sort order, via argpartition on the first `end` rows."""
+        start = max((page - 1) * per_page, 0)
+        end = max(start + per_page, 0)
+        if start >= len(candidates) or end == 0:
+            return []
+
+        keys = self.values[sort][candidates]
+        if direction == "desc":
+            keys = -keys
+        if end < len(candidates):
+            # сите до end-тата вредност, вклучително исти вредности на границата
+            bound = keys[np.argpartition(keys, end - 1)[:end]].max()
+            top = np.flatnonzero(keys <= bound)
+        else:
+            top = np.arange(len(candidates))
+        # candidates се по позиција, па lexsort дава stable редослед за исти вредности
+        top = top[np.lexsort((top, keys[top]))]
+        return list(self.symbols[candidates[top[start:end]]])
+
+    def after(self, symbol=None):
+        """Symbols in alphabetical order that come after `symbol` (a view, no copy)."""
+        if symbol is None:
+            return self.sorted_symbols
+        return self.sorted_symbols[np.searchsorted(self.sorted_symbols, symbol, side="right"):]
+
+    def top(self, key, k):
+        """k symbols with the largest `key`, largest first."""
+        return list(self.symbols[self.order_desc[key][:k]])
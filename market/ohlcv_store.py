@@ -0,0 +1,222 @@
+import json
+import os
+import shutil
+import time
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+STORE_DIR = os.path.join("data", "ohlcv_store")
+COLUMNS = ["time", "open", "high", "low", "close", "volume"]
+DTYPES = {
+    "time": np.int64,
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "volume": np.float64,
+}
+
+# колку стари верзии да останат на диск (workers можеби уште ги мапираат)
+KEEP_VERSIONS = 2
+
+
+# -------- WRITE -------- #
+
+def build_store(df, path=STORE_DIR):
+    """
+    Writes df as one .npy file per column, rows grouped by symbol and
+    sorted by time, plus an index.json with the [start, end) of each symbol.
+    Every build goes into a new version directory and CURRENT is swapped
+    atomically, so readers never see a half-written store.
+    """
+    ordered = df.sort_values(["symbol", "time"], kind="stable")
+    symbols = ordered["symbol"].to_numpy()
+
+    index = {}
+    if len(symbols):
+        bounds = np.flatnonzero(np.r_[True, symbols[1:] != symbols[:-1], True])
+        index = {
+            str(symbols[start]): [int(start), int(end)]
+            for start, end in zip(bounds[:-1], bounds[1:])
+        }
+
+    columns = {col: ordered[col].to_numpy(dtype=DTYPES[col]) for col in COLUMNS}
+    return _write_version(path, columns, index, len(ordered))
+
+
+def extend_store(new_rows, path=STORE_DIR):
+    """
+    Merges freshly ingested candles into the current store and writes
+    a new version. Rows with an existing (symbol, time) replace the old one.
+    When every new candle is newer than its symbol's last stored one (what
+    the incremental ingest produces) the new rows are inserted at the end
+    of their symbol's range with np.insert: no sort or dedup of the
+    history, only the copy into the new version's files.
+    """
+    current = OHLCVStore(path)
+    new = new_rows[["symbol"] + COLUMNS].sort_values(["symbol", "time"], kind="stable")
+    new = new.drop_duplicates(["symbol", "time"], keep="last")
+    if new.empty:
+        return current.version
+    symbols = new["symbol"].to_numpy(dtype=object)
+    times = new["time"].to_numpy(dtype=np.int64)
+
+    # позиција во стариот store: крајот на опсегот на symbol-от, а нов symbol
+    # оди пред првиот постоечки што доаѓа по него по азбучен ред
+    names = sorted(current.index)
+    starts = [current.index[name][0] for name in names] + [current.rows]
+    positions = np.empty(len(new), dtype=np.int64)
+    counts = {name: end - start for name, (start, end) in current.index.items()}
+    old_time = current.columns["time"]
+    group = np.flatnonzero(np.r_[True, symbols[1:] != symbols[:-1], True])
+    for lo, hi in zip(group[:-1], group[1:]):
+        symbol = str(symbols[lo])
+        bounds = current.index.get(symbol)
+        if bounds is None:
+            positions[lo:hi] = starts[bisect_left(names, symbol)]
+        elif bounds[1] > bounds[0] and times[lo] <= old_time[bounds[1] - 1]:
+            # корекција на постоечка свеќа: целосно спојување
+            return _merge_store(current, new_rows, path)
+        else:
+            positions[lo:hi] = bounds[1]
+        counts[symbol] = counts.get(symbol, 0) + int(hi - lo)
+
+    columns = {
+        col: np.insert(current.columns[col], positions, new[col].to_numpy(dtype=DTYPES[col]))
+        for col in COLUMNS
+    }
+    index, offset = {}, 0
+    for name in sorted(counts):
+        index[name] = [offset, offset + counts[name]]
+        offset += counts[name]
+    return _write_version(path, columns, index, offset)
+
+
+def _merge_store(current, new_rows, path):
+    old = pd.DataFrame({col: np.asarray(arr) for col, arr in current.columns.items()})
+    old.insert(0, "symbol", np.repeat(
+        np.array(list(current.index), dtype=object),
+        [end - start for start, end in current.index.values()],
+    ))
+    merged = pd.concat([old, new_rows[["symbol"] + COLUMNS]], ignore_index=True)
+    merged = merged.drop_duplicates(["symbol", "time"], keep="last")
+    return build_store(merged, path)
+
+
+def _write_version(path, columns, index, rows):
+    version = f"v{time.time_ns()}"
+    version_dir = os.path.join(path, version)
+    os.makedirs(version_dir)
+
+    for col in COLUMNS:
+        np.save(
+            os.path.join(version_dir, f"{col}.npy"),
+            np.ascontiguousarray(columns[col], dtype=DTYPES[col]),
+        )
+    with open(os.path.join(version_dir, "index.json"), "w") as f:
+        json.dump({"rows": int(rows), "symbols": index}, f)
+
+    tmp = os.path.join(path, f"CURRENT.{os.getpid()}")
+    with open(tmp, "w") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(path, "CURRENT"))
+
+    _prune_versions(path, version)
+    return version
+
+
+def _prune_versions(path, current):
+    older = sorted(
+        name for name in os.listdir(path)
+        if name.startswith("v") and name != current
+    )
+    stale = older[:max(len(older) - (KEEP_VERSIONS - 1), 0)]
+    for name in stale:
+        shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+
+
+def store_exists(path=STORE_DIR):
+    return os.path.exists(os.path.join(path, "CURRENT"))
+
+
+# -------- READ -------- #
+
+class OHLCVStore:
+    """
+    Read-only, memory-mapped view over a store written by build_store.
+    Column files are opened with mmap_mode="r", so every worker process
+    shares the same pages through the OS cache.
+    """
+
+    def __init__(self, path=STORE_DIR):
+        with open(os.path.join(path, "CURRENT")) as f:
+            self.version = f.read().strip()
+
+        version_dir = os.path.join(path, self.version)
+        with open(os.path.join(version_dir, "index.json")) as f:
+            meta = json.load(f)
+
+        self.rows = meta["rows"]
+        self.index = {s: tuple(bounds) for s, bounds in meta["symbols"].items()}
+        self.columns = {
+            col: np.load(os.path.join(version_dir, f"{col}.npy"), mmap_mode="r")
+            for col in COLUMNS
+        }
+
+    @property
+    def symbols(self):
+        return list(self.index)
+
+    def __contains__(self, symbol):
+        return symbol in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def arrays(self, symbol):
+        """Column views for one symbol (no copy), or None if unknown."""
+        bounds = self.index.get(symbol)
+        if bounds is None:
+            return None
+        start, end = bounds
+        return {col: arr[start:end] for col, arr in self.columns.items()}
+
+    def window(self, symbol, start=None, end=None):
+        """
+        Column views for one symbol limited to start <= time <= end (unix
+        seconds, either bound optional), found with searchsorted.
+        """
+        arrays = self.arrays(symbol)
+        if arrays is None:
+            return None
+        times = arrays["time"]
+        lo = 0 if start is None else int(np.searchsorted(times, start, side="left"))
+        hi = len(times) if end is None else int(np.searchsorted(times, end, side="right"))
+        return {col: arr[lo:hi] for col, arr in arrays.items()}
+
+    def frame(self, symbol):
+        arrays = self.arrays(symbol)
+        if arrays is None:
+            return None
+        coin_df = pd.DataFrame({col: np.asarray(a) for col, a in arrays.items()})
+        coin_df.insert(0, "symbol", symbol)
+        coin_df["date"] = pd.to_datetime(coin_df["time"], unit="s").dt.date
+        return coin_df
+
+    def tail(self, n=2):
+        """Last n candles of every symbol as one small DataFrame."""
+        if not self.index:
+            return pd.DataFrame(columns=["symbol"] + COLUMNS)
+
+        symbols = np.array(list(self.index))
+        bounds = np.array(list(self.index.values()), dtype=np.int64)
+        counts = np.minimum(bounds[:, 1] - bounds[:, 0], n)
+
+        positions = np.concatenate(
+            [np.arange(end - c, end) for (_, end), c in zip(bounds, counts)]
+        )
+        tail_df = pd.DataFrame({col: arr[positions] for col, arr in self.columns.items()})
+        tail_df.insert(0, "symbol", np.repeat(symbols, counts))
+        return tail_df
@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+
+from market.formatting import fmt_number
+
+SNAPSHOT_TABLE = "market_snapshot"
+
+# колоните што се чуваат во market_snapshot табелата
+SNAPSHOT_COLUMNS = ["time", "close", "volume", "prev_time", "prev_close"]
+
+
+# -------- BUILD -------- #
+
+def build_snapshot(df):
+    """
+    Last and previous candle per symbol, computed in one vectorized pass.
+    Returns a DataFrame indexed by symbol with SNAPSHOT_COLUMNS.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=SNAPSHOT_COLUMNS, index=pd.Index([], name="symbol"))
+
+    ordered = df[["symbol", "time", "close", "volume"]].sort_values(
+        ["symbol", "time"], kind="stable"
+    )
+    symbols = ordered["symbol"].to_numpy()
+    times = ordered["time"].to_numpy(dtype=np.int64)
+    close = ordered["close"].to_numpy(dtype=np.float64)
+    volume = ordered["volume"].to_numpy(dtype=np.float64)
+
+    # крај на секоја група (последен ред за symbol)
+    ends = np.flatnonzero(np.r_[symbols[1:] != symbols[:-1], True])
+    starts = np.r_[0, ends[:-1] + 1]
+    has_prev = ends > starts
+    prev = np.maximum(ends - 1, 0)
+
+    return pd.DataFrame(
+        {
+            "time": times[ends],
+            "close": close[ends],
+            "volume": volume[ends],
+            "prev_time": np.where(has_prev, times[prev], -1),
+            "prev_close": np.where(has_prev, close[prev], np.nan),
+        },
+        index=pd.Index(symbols[ends], name="symbol"),
+    )
+
+
+def update_snapshot(snapshot, new_rows):
+    """
+    Advance an existing snapshot with freshly ingested candles.
+    Only the symbols present in new_rows are recomputed.
+    """
+    if new_rows.empty:
+        return snapshot
+
+    touched = pd.Index(new_rows["symbol"].unique())
+    known = snapshot.loc[snapshot.index.intersection(touched)]
+
+    # старите last/prev редови се враќаат како обични свеќи
+    carried = pd.concat(
+        [
+            pd.DataFrame({
+                "symbol": known.index,
+                "time": known["prev_time"].to_numpy(),
+                "close": known["prev_close"].to_numpy(),
+                "volume": np.nan,
+            })[known["prev_time"].to_numpy() >= 0],
+            pd.DataFrame({
+                "symbol": known.index,
+                "time": known["time"].to_numpy(),
+                "close": known["close"].to_numpy(),
+                "volume": known["volume"].to_numpy(),
+            }),
+        ]
+    )
+    rows = pd.concat(
+        [carried, new_rows[["symbol", "time", "close", "volume"]]],
+        ignore_index=True,
+    )
+    rows = rows.drop_duplicates(["symbol", "time"], keep="last")
+
+    fresh = build_snapshot(rows)
+    return pd.concat([snapshot.drop(fresh.index, errors="ignore"), fresh]).sort_index()
+
+
+# -------- VIEW DATA -------- #
+
+def snapshot_stats(snapshot):
+    """
+    Per-symbol stats dict used by the index and markets templates.
+    Built once per snapshot, so the views only read it.
+    """
+    close = snapshot["close"].to_numpy(dtype=np.float64)
+    volume = snapshot["volume"].to_numpy(dtype=np.float64)
+    prev_close = snapshot["prev_close"].to_numpy(dtype=np.float64)
+    market_cap = close * volume
+
+    valid_prev = ~np.isnan(prev_close) & (prev_close != 0)
+    change_24h = np.zeros_like(close)
+    np.divide(close - prev_close, prev_close, out=change_24h, where=valid_prev)
+    change_24h *= 100.0
+
+    stats = {}
+    for i, symbol in enumerate(snapshot.index):
+        price = float(close[i])
+        vol = float(volume[i])
+        mcap = float(market_cap[i])
+        stats[symbol] = {
+            "price": price,
+            "volume": vol,
+            "last_close": price,
+            "last_volume": vol,
+            "market_cap": mcap,
+            "price_fmt": f"${fmt_number(price)}",
+            "volume_fmt": fmt_number(vol),
+            "market_cap_fmt": fmt_number(mcap),
+            "change_24h": float(change_24h[i]),
+        }
+    return stats
+
+
+# -------- PERSISTENCE -------- #
+
+def load_snapshot(conn, version=None):
+    """
+    The persisted snapshot, or None if it was never written or was built
+    for a different store version than `version`.
+    """
+    exists = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
+        (SNAPSHOT_TABLE,),
+    ).fetchone()
+    if not exists:
+        return None
+    # табела од пред version колоната не може да се провери
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({SNAPSHOT_TABLE})")}
+    if version is not None and "version" not in columns:
+        return None
+
+    stamp = "version" if "version" in columns else "NULL AS version"
+    snapshot = pd.read_sql_query(
+        f"SELECT symbol, {stamp}, {', '.join(SNAPSHOT_COLUMNS)} FROM {SNAPSHOT_TABLE}", conn
+    )
+    if snapshot.empty:
+        return None
+    if version is not None and (snapshot["version"] != version).any():
+        return None
+    return snapshot.drop(columns="version").set_index("symbol").sort_index()
+
+
+def save_snapshot(conn, snapshot, version):
+    """Replaces the persisted snapshot, stamped with the store `version` it was built for."""
+    # секогаш се пишува целиот snapshot, па табелата може и да се креира одново
+    conn.execute(f"DROP TABLE IF EXISTS {SNAPSHOT_TABLE}")
+    conn.execute(
+        f"""
+        CREATE TABLE {SNAPSHOT_TABLE} (
+            symbol TEXT PRIMARY KEY,
+            version TEXT NOT NULL,
+            time INTEGER NOT NULL,
+            close REAL,
+            volume REAL,
+            prev_time INTEGER,
+            prev_close REAL
+        )
+        """
+    )
+    conn.executemany(
+        f"INSERT INTO {SNAPSHOT_TABLE} (symbol, version, {', '.join(SNAPSHOT_COLUMNS)}) "
+        f"VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            (r.Index, version, int(r.time), float(r.close), float(r.volume),
+             int(r.prev_time), None if np.isnan(r.prev_close) else float(r.prev_close))
+            for r in snapshot.itertuples()
+        ],
+    )
+
+
+def refresh_snapshot(conn, new_rows, store, previous=None):
+    """
+    Called by the ingestion script once `store` (an OHLCVStore) holds the
+    new candles. A snapshot persisted for `previous`, the store version
+    new_rows were added to, is advanced with new_rows. Otherwise (none
+    yet, a stale one, a full rebuild) it is rebuilt from the last two
+    candles in the store, so symbols that new_rows does not touch are kept.
+    """
+    snapshot = load_snapshot(conn, previous) if previous is not None else None
+    if snapshot is None:
+        snapshot = build_snapshot(store.tail(2))
+    else:
+        snapshot = update_snapshot(snapshot, new_rows)
+    save_snapshot(conn, snapshot, store.version)
+    return snapshot
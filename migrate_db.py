@@ -0,0 +1,9 @@
+import sqlite3
+
+from db.migrations import migrate
+
+conn = sqlite3.connect("users.db")
+version = migrate(conn)
+conn.close()
+
+print(f"Coins schema migrated to version {version}.")
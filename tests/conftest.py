@@ -0,0 +1,64 @@
+import os
+import sqlite3
+
+import pytest
+
+import db.pool
+from tests.helpers import COLUMNS, CSV_NAME, DB_NAME, ROOT, generate_coins, write_csv
+from update_coins_from_csv import ingest_csv
+
+
+@pytest.fixture
+def fresh_pools(monkeypatch):
+    # get_pool() ги кешира pool-овите по (pid, path); "users.db" е релативен
+    monkeypatch.setattr(db.pool, "_pools", {})
+
+
+@pytest.fixture
+def baseline(tmp_path, monkeypatch, fresh_pools):
+    """
+    users.db as the baseline app left it: the coins table and nothing
+    derived from it (no snapshot, store or coin stats).
+    """
+    monkeypatch.chdir(tmp_path)
+    df = generate_coins(symbols=3, days=30, seed=8)
+    conn = sqlite3.connect(DB_NAME)
+    with open(os.path.join(ROOT, "coins_schema.sql")) as f:
+        conn.executescript(f.read())
+    conn.executemany(
+        f"INSERT INTO coins ({', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        df[COLUMNS].itertuples(index=False),
+    )
+    conn.commit()
+    conn.close()
+    os.makedirs(os.path.dirname(CSV_NAME))
+    return df
+
+
+@pytest.fixture
+def ingested(baseline):
+    """baseline after one ingest: store, snapshot, coin stats and Parquet copy."""
+    write_csv(baseline)
+    ingest_csv(CSV_NAME, DB_NAME)
+    return baseline
+
+
+@pytest.fixture
+def web(ingested, monkeypatch):
+    """Test client of app.py serving the ingested store, logged in."""
+    import app
+    from market.ohlcv_store import STORE_DIR
+    from web.reloader import DataReloader
+
+    # reloader-от од import-от гледа во cwd од тогаш, овој во tmp_path
+    app.market.stop()
+    market = DataReloader(STORE_DIR)
+    market.check()
+    market.ready.set()
+    monkeypatch.setattr(app, "market", market)
+    app.render_cache.clear()
+
+    client = app.app.test_client()
+    with client.session_transaction() as session:
+        session["user"] = "test"
+    return client
@@ -0,0 +1,154 @@
+# Seeded synthetic data shared by the tests and the benchmarks: the same
+# arguments always give the same candles, so runs on different machines and
+# commits are comparable.
+#   - generate_coins: a coins-table frame, build_workdir: that frame
+#     ingested into a self-contained app directory
+#   - synthetic_stats / scan_query: market_stats and the old markets()
+#     scan, the reference for market/market_index.py
+
+import os
+import random
+import sqlite3
+import string
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DAY = 86400
+# 2020-01-01 00:00 UTC
+START_TIME = 1577836800
+
+CSV_NAME = os.path.join("data", "processed", "all_coins.csv")
+DB_NAME = "users.db"
+COLUMNS = ["symbol", "time", "open", "high", "low", "close", "volume"]
+
+
+def symbol_names(n):
+    """BTC, ETH, SOL, then C0, C1, ... like the test data."""
+    head = ["BTC", "ETH", "SOL"][:n]
+    return head + [f"C{i}" for i in range(n - len(head))]
+
+
+def generate_coins(symbols=50, days=365, seed=0, start=START_TIME):
+    """
+    Daily OHLCV for `symbols` coins over `days` days as a coins-table frame.
+    Close is a geometric random walk with a per-coin price level and
+    volatility; newer coins (every 7th) start later, so histories differ
+    in length the way they do in the real data.
+    """
+    rng = np.random.default_rng(seed)
+    names = symbol_names(symbols)
+
+    level = 10 ** rng.uniform(-2, 4, symbols)
+    sigma = rng.uniform(0.02, 0.08, symbols)
+    lengths = np.full(symbols, days, dtype=np.int64)
+    late = np.arange(symbols) % 7 == 6
+    lengths[late] = rng.integers(min(days, 40), days + 1, late.sum())
+
+    group = np.repeat(np.arange(symbols), lengths)
+    starts = np.r_[0, np.cumsum(lengths)[:-1]]
+    day = np.arange(len(group)) - starts[group] + (days - lengths)[group]
+
+    steps = rng.normal(0.0005, 1.0, len(group)) * sigma[group]
+    steps[starts] = 0.0
+    log_close = np.cumsum(steps)
+    log_close -= (log_close[starts])[group]
+    close = level[group] * np.exp(log_close)
+
+    open_ = np.empty_like(close)
+    open_[1:] = close[:-1]
+    open_[starts] = close[starts]
+    wick = np.abs(rng.normal(0, 1, (2, len(group)))) * sigma[group] / 2
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+    volume = 10 ** rng.uniform(3, 7, symbols)[group] * rng.lognormal(0, 0.5, len(group))
+
+    return pd.DataFrame({
+        "symbol": np.array(names, dtype=object)[group],
+        "time": start + day * DAY,
+        "open": open_,
+        "high": high,
+        "low": low,
+        "close": close,
+        "volume": volume,
+    })
+
+
+def write_csv(df):
+    """df as the all_coins.csv of the current directory."""
+    df[COLUMNS].to_csv(CSV_NAME, index=False)
+
+
+def next_candle(df, symbol):
+    """The day after the last candle of `symbol`, closing 10% higher."""
+    last = df[df["symbol"] == symbol].iloc[[-1]].copy()
+    last["time"] += 86400
+    last["close"] *= 1.1
+    return last
+
+
+def build_workdir(workdir, symbols=50, days=365, seed=0):
+    """
+    Lays out a self-contained app directory in `workdir`: the CSV at
+    data/processed/all_coins.csv and users.db with the users and coins
+    schema, loaded through the regular ingest (summary, snapshot, store and
+    coin stats included). Relative paths resolve once the caller chdirs
+    into `workdir`. Returns the generated frame.
+    """
+    from update_coins_from_csv import ingest_csv
+
+    df = generate_coins(symbols, days, seed)
+
+    os.makedirs(os.path.join(workdir, os.path.dirname(CSV_NAME)), exist_ok=True)
+    csv_path = os.path.join(workdir, CSV_NAME)
+    df.to_csv(csv_path, index=False)
+
+    db_path = os.path.join(workdir, DB_NAME)
+    conn = sqlite3.connect(db_path)
+    for schema in ("schema.sql", "coins_schema.sql"):
+        with open(os.path.join(ROOT, schema)) as f:
+            conn.executescript(f.read())
+    conn.close()
+
+    previous = os.getcwd()
+    os.chdir(workdir)
+    try:
+        ingest_csv(CSV_NAME, DB_NAME, full=True)
+    finally:
+        os.chdir(previous)
+    return df
+
+
+# -------- MARKET STATS -------- #
+
+def synthetic_stats(n, seed=0):
+    rng = random.Random(seed)
+    stats = {}
+    while len(stats) < n:
+        symbol = "".join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(2, 6)))
+        price = 10 ** rng.uniform(-3, 5)
+        volume = float(round(10 ** rng.uniform(0, 9)))
+        stats[symbol] = {"last_close": price, "last_volume": volume, "market_cap": price * volume}
+    return stats
+
+
+def scan_query(stats, query="", min_vol=0, min_price=0, max_price=0,
+               sort="price", direction="desc", page=1, per_page=15):
+    """What markets() used to do on every request."""
+    stats = {s: v for s, v in stats.items() if v["last_volume"] >= min_vol}
+    if min_price > 0:
+        stats = {s: v for s, v in stats.items() if v["last_close"] >= min_price}
+    if max_price > 0:
+        stats = {s: v for s, v in stats.items() if v["last_close"] <= max_price}
+    if query:
+        stats = {s: v for s, v in stats.items() if query in s}
+
+    total_market_cap = sum(v["market_cap"] for v in stats.values())
+    total_volume = sum(v["last_volume"] for v in stats.values())
+
+    key = "last_close" if sort == "price" else "last_volume"
+    ordered = sorted(stats.keys(), key=lambda s: stats[s][key], reverse=(direction == "desc"))
+    start = (page - 1) * per_page
+    return ordered[start:start + per_page], len(ordered), total_market_cap, total_volume
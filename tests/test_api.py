@@ -0,0 +1,43 @@
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+
+def next_link(resp):
+    return resp.headers["Link"].split(";")[0].strip("<>")
+
+
+def test_next_link_keeps_the_path_symbol(web):
+    resp = web.get("/api/coins/BTC/ohlcv?limit=2&symbol=X")
+    assert resp.status_code == 200
+    url = urlsplit(next_link(resp))
+    assert url.path == "/api/coins/BTC/ohlcv"
+    assert parse_qs(url.query) == {"limit": ["2"], "after": [str(resp.json["next_cursor"])]}
+
+
+def test_next_link_walks_every_candle(web, ingested):
+    times = []
+    url = "/api/coins/ETH/ohlcv?limit=7"
+    while url:
+        resp = web.get(url)
+        times += [row["time"] for row in resp.json["data"]]
+        url = resp.headers.get("Link") and next_link(resp)
+    assert times == list(ingested.loc[ingested["symbol"] == "ETH", "time"])
+
+
+def test_series_bounds(web, ingested):
+    btc = ingested.loc[ingested["symbol"] == "BTC", "time"]
+    resp = web.get(f"/api/coin/BTC/series?from={btc.iloc[5]}&to={btc.iloc[9]}")
+    assert resp.json["time"] == list(btc.iloc[5:10])
+
+
+def test_series_bad_bounds_are_400(web):
+    for query in ("from=yesterday", "to=1.5", "from=0&to=x", "points=many"):
+        assert web.get(f"/api/coin/BTC/series?{query}").status_code == 400
+
+
+@pytest.mark.parametrize("url", ["/api/markets", "/api/coins/BTC/ohlcv", "/api/markets?format=csv"])
+def test_bulk_api_needs_a_login(web, url):
+    with web.session_transaction() as session:
+        session.clear()
+    assert web.get(url).status_code == 401
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.backtest import BacktestData, backtest, signal_codes, signals, sweep
+from analysis.technical_analysis import add_indicators, generate_signals
+from tests.helpers import generate_coins
+
+
+@pytest.fixture(scope="module")
+def coins():
+    return generate_coins(symbols=4, days=200, seed=9)
+
+
+@pytest.fixture(scope="module")
+def data(coins):
+    return BacktestData.from_frame(coins)
+
+
+def loop_backtest(close, codes, cost, short):
+    """One symbol, one bar at a time."""
+    pos = prev = 0
+    equity, peak = 1.0, 1.0
+    out = {"position": [], "equity": [], "drawdown": [], "trades": 0}
+    for i, code in enumerate(codes):
+        if code == 1:
+            pos = 1
+        elif code == -1:
+            pos = -1 if short else 0
+        ret = close[i] / close[i - 1] - 1 if i else 0.0
+        equity *= 1 + prev * ret - cost * abs(pos - prev)
+        peak = max(peak, equity)
+        out["trades"] += pos != 0 and pos != prev
+        out["position"].append(pos)
+        out["equity"].append(equity)
+        out["drawdown"].append(equity / peak - 1)
+        prev = pos
+    return out
+
+
+@pytest.mark.parametrize("cost, short", [(0.0, False), (0.001, False), (0.001, True)])
+def test_matches_a_bar_by_bar_loop(data, cost, short):
+    # случајни сигнали, за да има многу трговии во секој symbol
+    codes = np.random.default_rng(1).choice(np.array([-1, 0, 0, 0, 1], dtype=np.int8), len(data))
+    result = backtest(data, codes, cost=cost, short=short)
+
+    for i, symbol in enumerate(data.symbols):
+        rows = slice(data.starts[i], data.starts[i] + data.lengths[i])
+        expected = loop_backtest(data.close[rows], codes[rows], cost, short)
+        assert list(result.position[rows]) == expected["position"]
+        np.testing.assert_allclose(result.equity[rows], expected["equity"], rtol=1e-9)
+        np.testing.assert_allclose(result.drawdown[rows], expected["drawdown"], rtol=1e-9, atol=1e-12)
+        assert result.summary.loc[symbol, "trades"] == expected["trades"]
+        assert result.summary.loc[symbol, "total_return"] == pytest.approx(expected["equity"][-1] - 1)
+
+
+@pytest.fixture(scope="module")
+def indicators(coins):
+    return pd.concat(
+        add_indicators(g.sort_values("time").copy()) for _, g in coins.groupby("symbol", sort=True)
+    )
+
+
+def test_signal_rules_match_generate_signals(data, indicators):
+    reference = generate_signals(indicators.copy())
+    assert (signals(data) == signal_codes(reference["signal"].to_numpy())).all()
+
+
+def test_signal_thresholds(data, indicators):
+    # со стандардните прагови овие податоци немаат BUY/SELL, со пошироки имаат
+    df = indicators
+    trend = df["MACD"] - df["MACD_signal"]
+    buy = (df["RSI"] < 70) & (df["close"] > df["EMA_20"]) & (trend > 0)
+    sell = (df["RSI"] > 30) & (df["close"] < df["EMA_20"]) & (trend < 0)
+    expected = buy.to_numpy().astype(np.int8) - sell.to_numpy().astype(np.int8)
+
+    codes = signals(data, rsi_buy=70, rsi_sell=30)
+    assert set(np.unique(codes)) == {-1, 0, 1}
+    assert (codes == expected).all()
+
+
+def test_parallel_sweep_matches_serial(data):
+    grid = {"rsi_buy": (60, 70), "rsi_sell": (30, 40), "ema_window": (10, 20)}
+    serial = sweep(data, grid, cost=0.001)
+    pd.testing.assert_frame_equal(sweep(data, grid, cost=0.001, workers=2), serial)
+
+    row = serial[(serial["rsi_buy"] == 70) & (serial["rsi_sell"] == 30) & (serial["ema_window"] == 20)]
+    summary = backtest(data, signals(data, 70, 30, 20), cost=0.001).summary
+    assert row["trades"].iloc[0] == summary["trades"].sum() > 0
+    assert row["mean_return"].iloc[0] == pytest.approx(summary["total_return"].mean())
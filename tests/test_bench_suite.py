@@ -0,0 +1,82 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_suite import compare, measure
+from market.ohlcv_store import OHLCVStore
+from tests.helpers import CSV_NAME, DB_NAME, ROOT, build_workdir, generate_coins
+
+
+def test_generator_is_seeded_and_well_formed():
+    df = generate_coins(symbols=14, days=120, seed=5)
+    pd.testing.assert_frame_equal(df, generate_coins(symbols=14, days=120, seed=5))
+    assert not df.equals(generate_coins(symbols=14, days=120, seed=6))
+
+    assert (df["low"] <= df[["open", "close"]].min(axis=1)).all()
+    assert (df["high"] >= df[["open", "close"]].max(axis=1)).all()
+    assert (df[["open", "high", "low", "close", "volume"]] > 0).all().all()
+
+    lengths = df.groupby("symbol").size()
+    # секој 7-ми coin почнува подоцна, сите завршуваат истиот ден
+    assert lengths[["C3", "C10"]].lt(120).all()
+    assert lengths.drop(["C3", "C10"]).eq(120).all()
+    assert df.groupby("symbol")["time"].max().nunique() == 1
+
+
+def test_workdir_is_a_ready_app_directory(tmp_path, fresh_pools):
+    df = build_workdir(str(tmp_path), symbols=4, days=30, seed=1)
+    assert pd.read_csv(tmp_path / CSV_NAME).shape == df.shape
+
+    conn = sqlite3.connect(tmp_path / DB_NAME)
+    assert conn.execute("SELECT COUNT(*) FROM coins").fetchone()[0] == len(df)
+    assert conn.execute("SELECT COUNT(*) FROM market_snapshot").fetchone()[0] == 4
+    conn.close()
+    assert OHLCVStore(str(tmp_path / "data" / "ohlcv_store")).rows == len(df)
+
+
+def test_measure():
+    metrics = measure(lambda _: None, range(20))
+    assert metrics["count"] == 20
+    assert metrics["p50_ms"] <= metrics["p95_ms"] <= metrics["p99_ms"]
+    assert metrics["throughput_per_s"] > 0
+
+
+def case(p50, per_s=100.0):
+    return {"p50_ms": p50, "p95_ms": p50, "p99_ms": p50, "throughput_per_s": per_s}
+
+
+def test_compare_flags_only_real_regressions():
+    dataset = {"symbols": 5}
+    baseline = {"meta": {"dataset": dataset}, "cases": {
+        "web_index": case(10), "web_markets": case(10), "lstm_windowing": {"skipped": "tensorflow"},
+    }}
+    results = {"meta": {"dataset": dataset}, "cases": {
+        "web_index": case(12),                  # во толеранцијата
+        "web_markets": case(10, per_s=50.0),    # пад на throughput
+        "lstm_windowing": case(1000),
+    }}
+    assert compare(results, baseline) == ["web_markets throughput_per_s: 100.0 -> 50.0"]
+
+    results["meta"]["dataset"] = {"symbols": 6}
+    assert compare(results, baseline)[0].startswith("warning")
+
+
+def test_suite_runs_end_to_end(tmp_path):
+    out = tmp_path / "bench.json"
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_suite", "--symbols", "5", "--days", "60",
+         "--requests", "3", "--repeat", "1", "--cases", "web_index", "web_coin_detail",
+         "--out", str(out), "--baseline", str(tmp_path / "none.json")],
+        cwd=ROOT, check=True, capture_output=True, timeout=300,
+    )
+    with open(out) as f:
+        results = json.load(f)
+    assert results["meta"]["dataset"]["rows"] > 0
+    assert set(results["cases"]) == {"web_index", "web_coin_detail"}
+    assert all(np.isfinite(m["p50_ms"]) for m in results["cases"].values())
+    assert not os.path.exists(tmp_path / "none.json")
@@ -0,0 +1,82 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from market.coin_stats import COIN_STATS_COLUMNS, compute_coin_stats, load_coin_stats
+from market.formatting import fmt_number
+from market.ohlcv_store import OHLCVStore, build_store
+from tests.helpers import CSV_NAME, DAY, DB_NAME, generate_coins, next_candle, write_csv
+from update_coins_from_csv import ingest_csv
+
+
+def reference(g):
+    """coin_detail stats of one symbol, the slow pandas way."""
+    g = g.sort_values("time")
+    close = g["close"]
+    last = g.iloc[-1]
+
+    def change(n):
+        return (close.iloc[-1] / close.iloc[-1 - n] - 1) * 100 if len(g) > n else 0.0
+
+    year = g[g["time"] >= last["time"] - 365 * DAY]
+    returns = close.pct_change().iloc[1:].tail(30)
+    return {
+        **{c: last[c] for c in ("time", "open", "high", "low", "close", "volume")},
+        "change_1h": change(1),
+        "change_7d": change(7),
+        "change_30d": change(30),
+        "ath": close.max(),
+        "atl": close.min(),
+        "high_all": g["high"].max(),
+        "low_all": g["low"].min(),
+        "high_52w": year["high"].max(),
+        "low_52w": year["low"].min(),
+        "drawdown": (close.iloc[-1] / close.max() - 1) * 100,
+        "volatility_30d": returns.std() * np.sqrt(365) * 100 if len(returns) > 1 else 0.0,
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    # 400 дена за 52w прозорецот, C1 со само 5 свеќи за кратките хоризонти
+    df = generate_coins(symbols=3, days=400, seed=6)
+    short = df[df["symbol"] == "ETH"].tail(5).assign(symbol="C1")
+    df = pd.concat([df, short], ignore_index=True)
+    path = str(tmp_path / "store")
+    build_store(df, path)
+    return df, OHLCVStore(path)
+
+
+def test_vectorized_stats_match_pandas(store):
+    df, store = store
+    stats = compute_coin_stats(store)
+    assert list(stats.columns) == COIN_STATS_COLUMNS
+    for symbol, g in df.groupby("symbol"):
+        expected = reference(g)
+        for col in COIN_STATS_COLUMNS:
+            assert stats.loc[symbol, col] == pytest.approx(expected[col], rel=1e-9), f"{symbol}.{col}"
+
+
+def test_only_requested_symbols(store):
+    _, store = store
+    assert list(compute_coin_stats(store, ["ETH", "DOGE"]).index) == ["ETH"]
+
+
+def test_incremental_refresh_matches_a_full_recompute(ingested):
+    write_csv(pd.concat([ingested, next_candle(ingested, "SOL")]))
+    ingest_csv(CSV_NAME, DB_NAME)
+
+    store = OHLCVStore()
+    conn = sqlite3.connect(DB_NAME)
+    stored = load_coin_stats(conn, store.version)
+    conn.close()
+    pd.testing.assert_frame_equal(stored, compute_coin_stats(store).sort_index(), check_dtype=False)
+
+
+def test_coin_detail_renders_the_stored_stats(web, ingested):
+    close = ingested.loc[ingested["symbol"] == "BTC", "close"].iloc[-1]
+    page = web.get("/coin/BTC").get_data(as_text=True)
+    assert fmt_number(close) in page
+    assert web.get("/coin/DOGE").status_code == 404
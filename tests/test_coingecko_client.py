@@ -0,0 +1,153 @@
+import asyncio
+import time
+from collections import Counter
+
+from aiohttp import web
+
+from analysis.coingecko_client import MARKETS_BATCH, CoinGeckoClient, TTLCache
+
+# Локален stub на CoinGecko API (без мрежа): /coins/markets, /coins/<id>
+# и /defi/tvl, со бројач на повици по path.
+
+KNOWN = {f"c{i:03d}" for i in range(300)}
+
+
+class Stub:
+    def __init__(self, limited=0, retry_after="0.2"):
+        self.calls = Counter()
+        self.times = []
+        self.limited = limited          # колку 429 пред првиот 200
+        self.retry_after = retry_after
+
+    def _limit(self, path):
+        self.calls[path] += 1
+        self.times.append((path, time.monotonic()))
+        if self.limited:
+            self.limited -= 1
+            return web.Response(status=429, headers={"Retry-After": self.retry_after})
+        return None
+
+    async def markets(self, request):
+        limited = self._limit("/coins/markets")
+        if limited:
+            return limited
+        ids = request.query["ids"].split(",")
+        assert len(ids) <= MARKETS_BATCH
+        return web.json_response([
+            {"id": coin_id, "total_volume": 1000 + len(coin_id)} for coin_id in ids if coin_id in KNOWN
+        ])
+
+    async def coin(self, request):
+        coin_id = request.match_info["id"]
+        limited = self._limit("/coins/<id>")
+        if limited:
+            return limited
+        if coin_id not in KNOWN:
+            return web.Response(status=404)
+        return web.json_response({"community_data": {"twitter_followers": 7}})
+
+    async def tvl(self, request):
+        limited = self._limit("/defi/tvl")
+        if limited:
+            return limited
+        return web.json_response([{"id": "C000", "tvl": 5.5}])
+
+
+def run(stub, fn, cache=None):
+    """Starts the stub on a free port and runs fn(client) against it."""
+    async def main():
+        app = web.Application()
+        app.router.add_get("/coins/markets", stub.markets)
+        app.router.add_get("/coins/{id}", stub.coin)
+        app.router.add_get("/defi/tvl", stub.tvl)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            async with CoinGeckoClient(
+                f"http://127.0.0.1:{port}", backoff=0.05,
+                cache=cache if cache is not None else TTLCache(path=None),
+            ) as client:
+                return await fn(client)
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(main())
+
+
+def test_ttl_cache_hits_memory_and_disk(tmp_path):
+    stub = Stub()
+    cache = TTLCache(path=str(tmp_path))
+
+    async def twice(client):
+        first = await client.defi_tvl()
+        client._tvl = None
+        second = await client.defi_tvl()
+        return first, second
+
+    first, second = run(stub, twice, cache)
+    assert first == second == {"c000": 5.5}
+    assert stub.calls["/defi/tvl"] == 1
+    assert cache.hits == 1
+
+    # нов процес: се чита од диск, без повик
+    run(stub, lambda client: client.defi_tvl(), TTLCache(path=str(tmp_path)))
+    assert stub.calls["/defi/tvl"] == 1
+
+
+def test_ttl_expiry_refetches(tmp_path):
+    stub = Stub()
+    cache = TTLCache(path=str(tmp_path))
+
+    async def expired(client):
+        await client.get_json("/defi/tvl")
+        await client.get_json("/defi/tvl", ttl=0)
+
+    run(stub, expired, cache)
+    assert stub.calls["/defi/tvl"] == 2
+
+
+def test_429_cools_down_every_request():
+    stub = Stub(limited=1, retry_after="0.3")
+
+    async def parallel(client):
+        return await asyncio.gather(client.coin("c001"), client.coin("c002"), client.coin("c003"))
+
+    started = time.monotonic()
+    results = run(stub, parallel)
+    assert all(r["community_data"]["twitter_followers"] == 7 for r in results)
+    # првиот одговор е 429, потоа сите три се успешни
+    assert stub.calls["/coins/<id>"] == 4
+
+    limited_at = stub.times[0][1]
+    retried = [t for _, t in stub.times[1:] if t > limited_at + 0.05]
+    # секое барање после 429 чека Retry-After, не само ограниченото
+    assert all(t - limited_at >= 0.25 for t in retried)
+    assert time.monotonic() - started >= 0.3
+
+
+def test_onchain_fields_batches_requests():
+    stub = Stub()
+    symbols = [f"C{i:03d}" for i in range(300)] + ["UNKNOWN1", "UNKNOWN2"]
+
+    fields = run(stub, lambda client: client.onchain_fields(symbols))
+
+    # 302 ids -> 2 markets батчи, tvl еднаш, /coins/<id> само за познатите
+    assert stub.calls["/coins/markets"] == 2
+    assert stub.calls["/defi/tvl"] == 1
+    assert stub.calls["/coins/<id>"] == 300
+    assert fields["C000"] == {"active_addresses": 7, "tx_count": 1004, "tvl": 5.5}
+    assert fields["UNKNOWN1"] == {"active_addresses": 0, "tx_count": 0, "tvl": 0}
+
+
+def test_onchain_fields_cached_between_runs():
+    stub = Stub()
+    cache = TTLCache(path=None)
+    symbols = ["C001", "C002"]
+
+    run(stub, lambda client: client.onchain_fields(symbols), cache)
+    calls = sum(stub.calls.values())
+    run(stub, lambda client: client.onchain_fields(symbols), cache)
+    assert sum(stub.calls.values()) == calls
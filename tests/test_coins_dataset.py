@@ -0,0 +1,126 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import market.coins_dataset as coins_dataset
+from market.coins_dataset import (
+    VALUE_COLUMNS, build_dataset, dataset_is_fresh, extend_dataset, load_coins,
+)
+from tests.helpers import generate_coins, next_candle
+
+
+def write(df, csv_path):
+    df.to_csv(csv_path, index=False)
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    df = generate_coins(symbols=4, days=20, seed=3)
+    csv_path = str(tmp_path / "all_coins.csv")
+    write(df, csv_path)
+    build_dataset(csv_path)
+    return df, csv_path
+
+
+def rebuilt(df, tmp_path):
+    csv_path = str(tmp_path / "rebuilt.csv")
+    write(df, csv_path)
+    return load_coins(csv_path=csv_path)
+
+
+def test_extend_matches_a_rebuild(dataset, tmp_path):
+    df, csv_path = dataset
+    new = pd.concat([next_candle(df, "BTC"), next_candle(df, "ETH")])
+    full = pd.concat([df, new])
+    write(full, csv_path)
+
+    extend_dataset(new, csv_path)
+    pd.testing.assert_frame_equal(load_coins(csv_path=csv_path), rebuilt(full, tmp_path))
+
+
+def test_extend_skips_candles_already_stored(dataset, tmp_path):
+    df, csv_path = dataset
+    new = next_candle(df, "BTC")
+    full = pd.concat([df, new])
+    write(full, csv_path)
+    extend_dataset(new, csv_path)
+
+    # CSV-то се сменило, а истата свеќа доаѓа повторно
+    os.utime(csv_path, ns=(0, 0))
+    extend_dataset(pd.concat([df[df["symbol"] == "BTC"].tail(3), new]), csv_path)
+    pd.testing.assert_frame_equal(load_coins(csv_path=csv_path), rebuilt(full, tmp_path))
+
+
+def test_fresh_dataset_is_not_extended(dataset):
+    df, csv_path = dataset
+    version = build_dataset(csv_path)
+    assert extend_dataset(next_candle(df, "BTC"), csv_path) == version
+
+
+def test_many_appends_are_compacted(dataset, tmp_path, monkeypatch):
+    monkeypatch.setattr(coins_dataset, "MAX_FRAGMENTS", 2)
+    df, csv_path = dataset
+    for _ in range(4):
+        new = next_candle(df, "SOL")
+        df = pd.concat([df, new])
+        write(df, csv_path)
+        version = extend_dataset(new, csv_path)
+
+    partition = os.path.join(coins_dataset.dataset_dir(csv_path), version, "symbol=SOL")
+    assert len(os.listdir(partition)) <= 2
+    pd.testing.assert_frame_equal(load_coins(csv_path=csv_path), rebuilt(df, tmp_path))
+
+
+def test_load_coins_types_and_order(tmp_path):
+    df = generate_coins(symbols=5, days=15, seed=7)
+    csv_path = str(tmp_path / "all_coins.csv")
+    # CSV-то не мора да е подредено
+    write(df.sample(frac=1, random_state=1), csv_path)
+
+    loaded = load_coins(csv_path=csv_path)
+    assert loaded["symbol"].dtype == "category"
+    assert loaded["time"].dtype == np.int64
+    assert (loaded[VALUE_COLUMNS].dtypes == np.float64).all()
+    expected = df.sort_values(["symbol", "time"], ignore_index=True)
+    assert list(zip(loaded["symbol"], loaded["time"])) == list(zip(expected["symbol"], expected["time"]))
+    # на диск float32: вредностите се заокружени на float32
+    np.testing.assert_array_equal(
+        loaded["close"].to_numpy(), expected["close"].to_numpy(dtype=np.float32).astype(np.float64)
+    )
+
+    compact = load_coins(csv_path=csv_path, dtype=np.float32)
+    assert (compact[VALUE_COLUMNS].dtypes == np.float32).all()
+
+
+def test_filters_are_applied(dataset):
+    df, csv_path = dataset
+    times = sorted(df["time"].unique())
+    loaded = load_coins(["ETH", "SOL"], ["time", "close"], start=times[3], end=times[5], csv_path=csv_path)
+    assert list(loaded.columns) == ["time", "close"]
+    assert len(loaded) == 6
+
+    by_symbol = load_coins(["SOL"], csv_path=csv_path)
+    # само категориите што ги има во резултатот
+    assert list(by_symbol["symbol"].cat.categories) == ["SOL"]
+
+
+def test_changed_csv_is_rebuilt(dataset):
+    df, csv_path = dataset
+    assert dataset_is_fresh(csv_path)
+    write(df[df["symbol"] != "BTC"], csv_path)
+    os.utime(csv_path, ns=(0, 0))
+    assert not dataset_is_fresh(csv_path)
+    assert "BTC" not in set(load_coins(csv_path=csv_path)["symbol"])
+    assert dataset_is_fresh(csv_path)
+
+
+def test_analysis_loader_reads_the_dataset(dataset):
+    from analysis.technical_analysis import load_data
+
+    df, csv_path = dataset
+    btc = load_data(csv_path, ["BTC"])
+    assert set(btc["symbol"]) == {"BTC"}
+    assert btc["close"].dtype == np.float64
+    assert list(btc["time"]) == list(df.loc[df["symbol"] == "BTC", "time"])
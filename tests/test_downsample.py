@@ -0,0 +1,17 @@
+import numpy as np
+import pytest
+
+from market.downsample import MIN_POINTS, downsample
+
+
+@pytest.mark.parametrize("method", sorted(MIN_POINTS))
+@pytest.mark.parametrize("n", [1, 2, 5, 100, 1001])
+def test_never_more_than_requested(method, n):
+    rng = np.random.default_rng(n)
+    x = np.arange(n, dtype=np.int64) * 86400
+    y = rng.random(n)
+    for points in range(MIN_POINTS[method], 40):
+        idx = downsample(x, y, points, method)
+        assert len(idx) <= points
+        assert idx[0] == 0 and idx[-1] == n - 1
+        assert (np.diff(idx) > 0).all()
@@ -0,0 +1,93 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from analysis import forecast_service
+from analysis.forecast_service import ForecastService
+from analysis.model_registry import SHARED
+
+# Без TensorFlow: load_model се заменува со мали модели што враќаат
+# константа, за да се тестира сервисот, не Keras.
+
+SCALER = {"min": [0.0], "scale": [1.0], "data_min": [0.0], "data_max": [1.0]}
+
+
+class ConstantModel:
+    def predict_on_batch(self, inputs):
+        # shared моделот добива [x, symbol_ids]
+        x = inputs[0] if isinstance(inputs, list) else inputs
+        return np.full((len(x), 1), 2.0)
+
+
+def meta(name, lookback=5):
+    return {"version": "v1", "lookback": lookback, "scalers": {name: SCALER}, "symbol_ids": None}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    def load_model(name, path=None):
+        if name == "BROKEN":
+            raise OSError("model.keras is corrupt")
+        return ConstantModel(), meta(name)
+
+    monkeypatch.setattr(forecast_service, "registered_models", lambda path: ["BROKEN", "BTC", "ETH"])
+    monkeypatch.setattr(forecast_service, "load_model", load_model)
+
+    closes = {"BTC": np.arange(1.0, 11.0), "ETH": np.arange(1.0, 4.0)}
+    service = ForecastService(lambda symbol: (100, closes[symbol]) if symbol in closes else None)
+    service.start()
+    assert service.ready.wait(5)
+    return service
+
+
+def test_broken_model_does_not_disable_the_rest(service):
+    assert service.stats()["models"] == ["BTC", "ETH"]
+    result = service.forecast("BTC")
+    assert result["forecast"] == 2.0
+    assert result["last_close"] == 10.0
+
+
+def test_short_history_raises_value_error(service):
+    with pytest.raises(ValueError):
+        service.forecast("ETH")
+    with pytest.raises(KeyError):
+        service.forecast("DOGE")
+
+
+@pytest.fixture
+def shared(monkeypatch):
+    shared_meta = {
+        "version": "v1", "lookback": 5,
+        "scalers": {"BTC": SCALER, "ETH": SCALER}, "symbol_ids": {"BTC": 0, "ETH": 1},
+    }
+    monkeypatch.setattr(forecast_service, "registered_models", lambda path: [SHARED])
+    monkeypatch.setattr(forecast_service, "load_model", lambda name, path=None: (ConstantModel(), shared_meta))
+
+    closes = {"BTC": np.arange(1.0, 11.0), "ETH": np.arange(1.0, 4.0)}
+    # подолг max_wait, двете барања да паднат во ист batch
+    service = ForecastService(lambda symbol: (100, closes[symbol]), max_wait=0.2)
+    service.start()
+    assert service.ready.wait(5)
+    return service, closes
+
+
+def test_short_history_does_not_fail_the_rest_of_the_batch(shared):
+    service, _ = shared
+    with ThreadPoolExecutor(2) as pool:
+        btc = pool.submit(service.forecast, "BTC")
+        eth = pool.submit(service.forecast, "ETH")
+        assert btc.result()["forecast"] == 2.0
+        with pytest.raises(ValueError):
+            eth.result()
+
+
+def test_batch_fails_only_the_short_request(shared):
+    # барање што стигнало во batch-от и покрај проверката во forecast()
+    service, closes = shared
+    requests = [((s, 100, "v1"), SHARED, closes[s], Future()) for s in ("BTC", "ETH")]
+    service._predict(SHARED, requests)
+
+    (_, _, _, btc), (_, _, _, eth) = requests
+    assert btc.result(0)["last_close"] == 10.0
+    assert isinstance(eth.exception(0), ValueError)
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from analysis.indicator_kernels import COLUMNS, WORK_ROWS, compute_indicators
+from analysis.technical_analysis import add_indicators
+from tests.helpers import generate_coins
+
+RTOL = 1e-9
+# ta ги зема Bollinger од pandas rolling std (online варијанса); kernel-от е
+# точен two-pass std, па разликата е грешката на pandas, не на kernel-от
+RTOL_COLUMNS = {"BB_upper": 1e-7, "BB_lower": 1e-7}
+
+
+def coin(days, seed):
+    return generate_coins(symbols=1, days=days, seed=seed)
+
+
+def assert_parity(df):
+    ref = add_indicators(df.copy(), backend="ta")
+    got = add_indicators(df.copy(), backend="numpy")
+    for col in COLUMNS:
+        a = ref[col].to_numpy(dtype=np.float64)
+        b = got[col].to_numpy(dtype=np.float64)
+        np.testing.assert_array_equal(np.isnan(a), np.isnan(b), err_msg=f"{col}: NaN positions")
+        mask = np.isfinite(a)
+        err = np.abs(a[mask] - b[mask]) / np.maximum(1.0, np.abs(a[mask]))
+        assert err.max(initial=0.0) <= RTOL_COLUMNS.get(col, RTOL), f"{col}: {err.max():.2e}"
+
+
+@pytest.mark.parametrize("days", [1, 2, 13, 14, 19, 20, 25, 26, 27, 28, 33, 34, 40])
+def test_short_histories_match_ta(days):
+    # границите на warm-up: RSI/Stochastic 14, SMA/CCI 20, MACD 26, signal 34, ADX 28
+    assert_parity(coin(days, seed=days))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_long_histories_match_ta(seed):
+    assert_parity(coin(730, seed=seed))
+
+
+def test_flat_prices_match_ta():
+    # константна цена: нулти std/MAD/опсег, RSI со down == 0
+    df = coin(60, seed=1)
+    df[["open", "high", "low", "close"]] = 100.0
+    assert_parity(df)
+
+
+def test_layouts_and_shared_work_give_the_same_block():
+    df = coin(300, seed=7)
+    arrays = [df[c].to_numpy(dtype=np.float64) for c in ("high", "low", "close", "volume")]
+
+    default = compute_indicators(*arrays)
+    row_major = np.empty((len(df), len(COLUMNS)))
+    compute_indicators(*arrays, out=row_major)
+    # поголем work од потребното, со стари вредности во него
+    work = np.full((WORK_ROWS, 1000), 123.0)
+    shared = compute_indicators(*arrays, work=work)
+
+    np.testing.assert_array_equal(default, row_major)
+    np.testing.assert_array_equal(default, shared)
+    assert default[:, 0].flags["C_CONTIGUOUS"]
+
@@ -0,0 +1,56 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from market.ohlcv_store import OHLCVStore
+from market.snapshot import load_snapshot, snapshot_stats
+from tests.helpers import CSV_NAME, DB_NAME, next_candle, write_csv
+from update_coins_from_csv import ingest_csv
+
+
+def snapshot():
+    conn = sqlite3.connect(DB_NAME)
+    try:
+        return load_snapshot(conn)
+    finally:
+        conn.close()
+
+
+def test_ingest_without_snapshot_keeps_every_symbol(baseline):
+    # CSV-то има само една нова свеќа за BTC
+    write_csv(next_candle(baseline, "BTC"))
+    report = ingest_csv(CSV_NAME, DB_NAME)
+    assert report["rows_inserted"] == 1
+
+    snap = snapshot()
+    assert sorted(snap.index) == ["BTC", "ETH", "SOL"]
+    assert snap["prev_close"].notna().all()
+
+    stats = snapshot_stats(snap)
+    assert stats["BTC"]["change_24h"] == pytest.approx(10.0)
+    for symbol, g in baseline.groupby("symbol"):
+        if symbol != "BTC":
+            assert stats[symbol]["price"] == g["close"].iloc[-1]
+            assert stats[symbol]["change_24h"] == pytest.approx(
+                (g["close"].iloc[-1] / g["close"].iloc[-2] - 1) * 100
+            )
+
+
+def test_incremental_ingest_matches_full_history(baseline):
+    write_csv(baseline)
+    ingest_csv(CSV_NAME, DB_NAME)
+
+    more = pd.concat([next_candle(baseline, "ETH"), next_candle(baseline, "SOL")])
+    write_csv(pd.concat([baseline, more]))
+    report = ingest_csv(CSV_NAME, DB_NAME)
+    assert report["rows_inserted"] == 2
+
+    full = pd.concat([baseline, more])
+    snap = snapshot()
+    store = OHLCVStore()
+    assert sorted(snap.index) == sorted(store.symbols) == ["BTC", "ETH", "SOL"]
+    for symbol, g in full.groupby("symbol"):
+        assert snap.loc[symbol, "time"] == g["time"].iloc[-1]
+        assert snap.loc[symbol, "prev_close"] == g["close"].iloc[-2]
+        assert list(store.arrays(symbol)["time"]) == list(g["time"])
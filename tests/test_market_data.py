@@ -0,0 +1,38 @@
+import sqlite3
+
+from market.ohlcv_store import OHLCVStore
+from market.snapshot import build_snapshot, load_snapshot, save_snapshot
+from tests.helpers import DB_NAME
+from web.market_data import MarketData
+
+
+def last_closes(df):
+    return {symbol: g["close"].iloc[-1] for symbol, g in df.groupby("symbol")}
+
+
+def test_load_serves_the_ingested_snapshot(ingested):
+    data = MarketData.load()
+    assert {s: v["price"] for s, v in data.market_stats.items()} == last_closes(ingested)
+
+
+def test_stale_snapshot_is_rebuilt_from_the_store(ingested):
+    # snapshot од друга верзија на store-от, само со еден symbol
+    conn = sqlite3.connect(DB_NAME)
+    with conn:
+        partial = build_snapshot(ingested[ingested["symbol"] == "BTC"].iloc[:-5])
+        save_snapshot(conn, partial, "v0")
+    conn.close()
+
+    data = MarketData.load()
+    assert {s: v["price"] for s, v in data.market_stats.items()} == last_closes(ingested)
+
+
+def test_snapshot_without_version_is_not_trusted(ingested):
+    conn = sqlite3.connect(DB_NAME)
+    with conn:
+        conn.execute("ALTER TABLE market_snapshot DROP COLUMN version")
+        assert load_snapshot(conn, OHLCVStore().version) is None
+        assert load_snapshot(conn) is not None
+    conn.close()
+
+    assert sorted(MarketData.load().market_stats) == ["BTC", "ETH", "SOL"]
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from market.market_index import MarketIndex
+from tests.helpers import scan_query, synthetic_stats
+
+
+@pytest.fixture(scope="module")
+def stats():
+    return synthetic_stats(2000, seed=4)
+
+
+@pytest.fixture(scope="module")
+def index(stats):
+    return MarketIndex(stats)
+
+
+def assert_same(index, stats, **kwargs):
+    symbols, total, mcap, vol = scan_query(stats, **kwargs)
+    result = index.query(**kwargs)
+    assert result.symbols == symbols
+    assert result.total == total
+    assert np.isclose(result.total_market_cap, mcap) and np.isclose(result.total_volume, vol)
+
+
+# стариот view сортираше по volume за сè што не е "price"
+@pytest.mark.parametrize("sort", ["price", "volume", "market_cap", "bogus"])
+@pytest.mark.parametrize("direction", ["asc", "desc"])
+@pytest.mark.parametrize("page", [1, 2, 50])
+def test_sorts_match_the_old_scan(index, stats, sort, direction, page):
+    assert_same(index, stats, sort=sort, direction=direction, page=page)
+
+
+@pytest.mark.parametrize("filters", [
+    dict(query="A"),
+    dict(min_vol=10_000),
+    dict(min_price=1, max_price=1000),
+    dict(query="B", min_vol=1000, max_price=10),
+    dict(query="NOSUCHSYMBOL"),
+])
+def test_filters_match_the_old_scan(index, stats, filters):
+    for sort in ("price", "market_cap"):
+        assert_same(index, stats, sort=sort, page=2, **filters)
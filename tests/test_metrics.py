@@ -0,0 +1,63 @@
+import time
+from functools import wraps
+
+import pytest
+from flask import Flask, Response, abort, request
+
+from web.metrics import Metrics
+
+STREAM_SECONDS = 0.2
+
+
+def token_only(view):
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if request.headers.get("Authorization") != "Bearer t":
+            abort(401)
+        return view(*args, **kwargs)
+    return wrapped
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.metrics = Metrics().init_app(app, guard=token_only)
+
+    @app.route("/stream")
+    def stream():
+        def body():
+            yield "a"
+            time.sleep(STREAM_SECONDS)
+            yield "b"
+        return Response(body())
+
+    @app.route("/plain")
+    def plain():
+        return "ok"
+
+    return app
+
+
+def duration(metrics, route):
+    key = next(k for k in metrics._requests if k[0] == route)
+    return metrics._requests[key].sum
+
+
+def test_streamed_response_is_timed_until_close(app):
+    client = app.test_client()
+    # WSGI серверот го затвора response-от по последниот chunk; test client-от не
+    with client.get("/stream") as resp:
+        assert resp.data == b"ab"
+    assert client.get("/plain").data == b"ok"
+
+    assert duration(app.metrics, "/stream") >= STREAM_SECONDS
+    assert duration(app.metrics, "/plain") < STREAM_SECONDS
+    assert app.metrics._in_flight == 0
+
+
+def test_metrics_endpoint_is_guarded(app):
+    client = app.test_client()
+    assert client.get("/metrics").status_code == 401
+    resp = client.get("/metrics", headers={"Authorization": "Bearer t"})
+    assert resp.status_code == 200
+    assert b"http_request_duration_seconds" in resp.data
@@ -0,0 +1,90 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from analysis import forecast_service, model_registry
+from analysis.forecast_service import ForecastService
+from analysis.model_registry import (
+    KEEP_VERSIONS, SHARED, latest_version, load_meta, registered_models, save_model, scale, unscale,
+)
+
+# Без TensorFlow и sklearn: моделот само запишува фајл, scaler-от ги има
+# атрибутите на fit-нат MinMaxScaler.
+
+
+class FileModel:
+    def save(self, path):
+        with open(path, "w") as f:
+            f.write("weights")
+
+
+def fitted_scaler(low, high):
+    scale_ = 1.0 / (high - low)
+    return SimpleNamespace(
+        min_=np.array([-low * scale_]), scale_=np.array([scale_]),
+        data_min_=np.array([low]), data_max_=np.array([high]),
+    )
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return str(tmp_path / "lstm")
+
+
+def test_saved_model_is_published(registry):
+    version = save_model("BTC", FileModel(), {"BTC": fitted_scaler(100.0, 300.0)}, lookback=30,
+                         metrics={"rmse": 1.5}, path=registry)
+
+    assert registered_models(registry) == ["BTC"]
+    assert latest_version("BTC", registry) == version
+    meta = load_meta("BTC", path=registry)
+    assert (meta["version"], meta["lookback"], meta["metrics"]) == (version, 30, {"rmse": 1.5})
+    assert meta["symbol_ids"] is None
+    assert os.path.exists(os.path.join(registry, "BTC", version, "model.keras"))
+
+
+def test_scaler_round_trip(registry):
+    save_model(SHARED, FileModel(), {"BTC": fitted_scaler(100.0, 300.0), "ETH": fitted_scaler(1.0, 5.0)},
+               lookback=10, symbol_ids={"BTC": 0, "ETH": 1}, path=registry)
+    meta = load_meta(SHARED, path=registry)
+    assert meta["symbol_ids"] == {"BTC": 0, "ETH": 1}
+
+    params = meta["scalers"]["BTC"]
+    np.testing.assert_allclose(scale([100.0, 200.0, 300.0], params), [0.0, 0.5, 1.0])
+    np.testing.assert_allclose(unscale(scale([123.0], params), params), [123.0])
+
+
+def test_old_versions_are_pruned(registry):
+    versions = [save_model("ETH", FileModel(), {}, lookback=5, path=registry) for _ in range(KEEP_VERSIONS + 2)]
+    kept = sorted(v for v in os.listdir(os.path.join(registry, "ETH")) if v.startswith("v"))
+    assert kept == versions[-KEEP_VERSIONS:]
+    assert latest_version("ETH", registry) == versions[-1]
+
+
+def test_unpublished_model_is_invisible(registry):
+    # верзија без LATEST (прекинат save) не е регистриран модел
+    os.makedirs(os.path.join(registry, "SOL", "v1"))
+    assert registered_models(registry) == []
+    assert load_meta("SOL", path=registry) is None
+    assert model_registry.load_model("SOL", path=registry) is None
+    assert registered_models(os.path.join(registry, "missing")) == []
+
+
+def test_forecast_service_picks_up_a_new_version(registry, monkeypatch):
+    # load_model без keras: meta од регистарот, модел што враќа 0.5 (средина на опсегот)
+    model = SimpleNamespace(predict_on_batch=lambda x: np.full((len(x), 1), 0.5))
+    monkeypatch.setattr(forecast_service, "load_model",
+                        lambda name, path=None: (model, load_meta(name, path=path)))
+
+    save_model("BTC", FileModel(), {"BTC": fitted_scaler(100.0, 300.0)}, lookback=3, path=registry)
+    service = ForecastService(lambda symbol: (1, np.arange(1.0, 6.0)), path=registry).start()
+    assert service.ready.wait(5)
+    first = service.forecast("BTC")
+    assert first["forecast"] == pytest.approx(200.0)
+
+    version = save_model("BTC", FileModel(), {"BTC": fitted_scaler(0.0, 100.0)}, lookback=3, path=registry)
+    service.reload("BTC")
+    second = service.forecast("BTC")
+    assert (second["version"], second["forecast"]) == (version, pytest.approx(50.0))
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from market.ohlcv_store import COLUMNS, OHLCVStore, build_store, extend_store
+from tests.helpers import DAY, generate_coins
+
+
+def stored(path):
+    store = OHLCVStore(path)
+    return store.version, {s: {c: list(a) for c, a in store.arrays(s).items()} for s in store.symbols}
+
+
+def expected(df):
+    df = df.drop_duplicates(["symbol", "time"], keep="last").sort_values(["symbol", "time"])
+    return {s: {c: list(g[c]) for c in COLUMNS} for s, g in df.groupby("symbol")}
+
+
+def candles(symbol, times, seed):
+    rng = np.random.default_rng(seed)
+    n = len(times)
+    return pd.DataFrame({
+        "symbol": symbol, "time": times,
+        **{c: rng.random(n) for c in ("open", "high", "low", "close", "volume")},
+    })
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    df = generate_coins(symbols=6, days=20, seed=1)
+    path = str(tmp_path / "store")
+    build_store(df, path)
+    return df, path
+
+
+def test_append_keeps_symbols_grouped_and_sorted(store_path):
+    df, path = store_path
+    last = df.groupby("symbol")["time"].max()
+    new = pd.concat([
+        candles("ETH", [last["ETH"] + DAY, last["ETH"] + 2 * DAY], 1),
+        candles("C1", [last["C1"] + DAY], 2),
+        # нови symbols: пред сите, во средина и после сите
+        candles("AAA", [100, 200], 3),
+        candles("CZ", [300], 4),
+        candles("ZZZ", [400], 5),
+    ])
+    version = extend_store(new, path)
+    assert stored(path) == (version, expected(pd.concat([df, new])))
+
+
+def test_correction_falls_back_to_a_full_merge(store_path):
+    df, path = store_path
+    # постоечка свеќа со нова вредност, плус нова свеќа
+    first = int(df.loc[df["symbol"] == "BTC", "time"].min())
+    new = candles("BTC", [first, int(df["time"].max()) + DAY], 6)
+    extend_store(new, path)
+    assert stored(path)[1] == expected(pd.concat([df, new]))
+
+
+def test_nothing_new_keeps_the_version(store_path):
+    _, path = store_path
+    version = OHLCVStore(path).version
+    assert extend_store(pd.DataFrame(columns=["symbol"] + COLUMNS), path) == version
+
+
+def test_build_groups_symbols_and_maps_the_columns(tmp_path):
+    df = generate_coins(symbols=4, days=15, seed=2)
+    path = str(tmp_path / "store")
+    build_store(df.sample(frac=1, random_state=0), path)
+
+    store = OHLCVStore(path)
+    assert sorted(store.symbols) == sorted(df["symbol"].unique())
+    assert isinstance(store.columns["close"], np.memmap)
+    assert stored(path)[1] == expected(df)
+    assert store.arrays("DOGE") is None
+
+
+def test_window_bounds_are_inclusive(store_path):
+    df, path = store_path
+    times = list(df.loc[df["symbol"] == "ETH", "time"])
+    store = OHLCVStore(path)
+
+    assert list(store.window("ETH", times[3], times[7])["time"]) == times[3:8]
+    assert list(store.window("ETH", start=times[-2])["time"]) == times[-2:]
+    assert list(store.window("ETH", end=times[0] - 1)["time"]) == []
+    assert store.window("DOGE") is None
+
+
+def test_tail_is_the_last_candles_of_every_symbol(store_path):
+    df, path = store_path
+    tail = OHLCVStore(path).tail(3)
+    reference = df.sort_values(["symbol", "time"]).groupby("symbol").tail(3)
+    assert sorted(map(tuple, tail[["symbol", "time", "close"]].to_numpy())) == \
+        sorted(map(tuple, reference[["symbol", "time", "close"]].to_numpy()))
+
+
+def test_open_store_survives_the_next_version(store_path):
+    # worker-от што го мапирал старото го чита и по новата верзија
+    df, path = store_path
+    old = OHLCVStore(path)
+    build_store(df[df["symbol"] == "BTC"], path)
+
+    assert OHLCVStore(path).symbols == ["BTC"]
+    assert list(old.arrays("ETH")["time"]) == list(df.loc[df["symbol"] == "ETH", "time"])
@@ -0,0 +1,36 @@
+import pytest
+
+from analysis.onchain_analysis import RESULT_COLUMNS, OnChainAnalysis
+
+ZEROS = {"active_addresses": 0, "tx_count": 0, "tvl": 0.0}
+
+
+@pytest.fixture
+def offline(ingested, monkeypatch):
+    # без CoinGecko, како analyze_many(fetch_remote=False)
+    monkeypatch.setattr(OnChainAnalysis, "_remote_fields", lambda self: ZEROS)
+    return ingested
+
+
+def test_analyze_many_matches_analyze_per_symbol(offline):
+    many = OnChainAnalysis.analyze_many().set_index("symbol")
+    assert list(many.index) == sorted(offline["symbol"].unique())
+
+    for symbol, row in many.iterrows():
+        one = OnChainAnalysis(symbol).analyze(return_results=True)
+        assert row["price"] == one["price"]
+        assert row["volume"] == one["volume"]
+        assert row["market_cap"] == pytest.approx(one["market_cap"])
+        assert row["whale_movements"] == one["whale_movements"]
+        assert row["exchange_flow"] == pytest.approx(one["exchange_flows"])
+        assert row["nvt"] == pytest.approx(one["nvt"])
+        assert row["sentiment"] == one["sentiment"]
+
+
+def test_requested_symbols_keep_their_order(offline):
+    many = OnChainAnalysis.analyze_many(["SOL", "DOGE", "BTC"])
+    assert list(many.columns) == RESULT_COLUMNS
+    assert list(many["symbol"]) == ["SOL", "DOGE", "BTC"]
+    # непознат symbol е нула, не исчезнува
+    doge = many.iloc[1]
+    assert (doge["price"], doge["volume"], doge["whale_movements"], doge["nvt"]) == (0, 0, 0, 0)
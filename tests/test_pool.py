@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+
+from db.pool import ConnectionPool, PoolTimeout, PooledConnection, get_connection, get_pool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=2, timeout=0.1)
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.commit()
+    yield pool
+    pool.close_all()
+
+
+def test_nested_acquire_shares_one_connection(pool):
+    with pool.connection() as outer:
+        with pool.connection() as inner:
+            assert inner is outer
+        # внатрешниот release не ја враќа додека надворешниот ја држи
+        assert pool.stats()["in_use"] == 1
+    stats = pool.stats()
+    assert stats["in_use"] == 0
+    assert stats["reuses"] == 1
+
+
+def test_threads_get_their_own_connection(pool):
+    seen = []
+    barrier = threading.Barrier(2)
+
+    def work():
+        with pool.connection() as conn:
+            seen.append(conn)
+            barrier.wait(1)
+
+    threads = [threading.Thread(target=work) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert seen[0] is not seen[1]
+    assert pool.stats()["open"] == 2
+
+
+def test_exhausted_pool_times_out(pool):
+    errors = []
+
+    def acquire():
+        try:
+            pool.acquire()
+        except Exception as e:
+            errors.append(e)
+
+    # двата threads ги земаат двете места и не ги враќаат, третиот чека timeout
+    for _ in range(3):
+        t = threading.Thread(target=acquire)
+        t.start()
+        t.join()
+    assert [type(e) for e in errors] == [PoolTimeout]
+
+
+def test_pooled_connection_is_returned_when_the_block_raises(pool):
+    with pytest.raises(ZeroDivisionError):
+        with PooledConnection(pool, pool.acquire()) as conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+            1 / 0
+
+    # некомитираниот insert е вратен назад, конекцијата е пак слободна
+    assert pool.stats()["in_use"] == 0
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+
+def test_expired_connection_is_replaced(pool):
+    with pool.connection() as first:
+        pass
+    pool.max_lifetime = 0
+    with pool.connection() as second:
+        assert second is not first
+    assert pool.stats()["closed"] == 1
+
+
+def test_get_pool_is_shared_per_path(tmp_path, fresh_pools):
+    path = str(tmp_path / "shared.db")
+    assert get_pool(path) is get_pool(path)
+    with get_connection(path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert get_pool(path).stats()["in_use"] == 0
+
+
+def test_onchain_helpers_reuse_the_callers_connection(baseline):
+    from analysis.onchain_analysis import OnChainAnalysis
+
+    onchain = OnChainAnalysis("BTC")
+    with get_pool().connection():
+        assert onchain._whale_movements() >= 0
+        assert onchain._exchange_flows() >= 0
+    stats = get_pool().stats()
+    assert (stats["misses"], stats["reuses"], stats["in_use"]) == (1, 2, 0)
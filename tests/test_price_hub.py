@@ -0,0 +1,65 @@
+import os
+import sqlite3
+
+import pytest
+
+from db.pool import get_pool
+from tests.helpers import ROOT, generate_coins
+from web.price_hub import ReplayFeed
+
+
+class Recorder:
+    """Hub stand-in: keeps every batch and the pool's in_use at publish time."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.batches = []
+        self.in_use = []
+
+    def publish(self, deltas):
+        self.batches.append(deltas)
+        self.in_use.append(self.pool.stats()["in_use"])
+
+
+@pytest.fixture
+def coins_db(tmp_path):
+    df = generate_coins(symbols=4, days=12, seed=2)
+    path = str(tmp_path / "coins.db")
+    conn = sqlite3.connect(path)
+    with open(os.path.join(ROOT, "coins_schema.sql")) as f:
+        conn.executescript(f.read())
+    conn.executemany(
+        "INSERT INTO coins (symbol, time, close, volume) VALUES (?, ?, ?, ?)",
+        df[["symbol", "time", "close", "volume"]].itertuples(index=False),
+    )
+    conn.commit()
+    conn.close()
+    return df, path
+
+
+def expected(df):
+    batches, prev = [], {}
+    for _, g in df.sort_values(["time", "symbol"]).groupby("time"):
+        batch = {}
+        for symbol, close, volume in g[["symbol", "close", "volume"]].itertuples(index=False):
+            change = (close - prev[symbol]) / prev[symbol] * 100.0 if symbol in prev else 0.0
+            prev[symbol] = close
+            batch[symbol] = [close, change, volume, close * volume]
+        batches.append(batch)
+    return batches
+
+
+@pytest.mark.parametrize("symbols", [None, ["C1", "C3"]])
+def test_replay_batches_and_releases_connections(coins_db, symbols):
+    df, path = coins_db
+    if symbols:
+        df = df[df["symbol"].isin(symbols)]
+    hub = Recorder(get_pool(path))
+
+    feed = ReplayFeed(hub, interval=0, symbols=symbols, loop=False, db_path=path)
+    feed._run()
+
+    assert hub.batches == expected(df)
+    assert feed.steps == df["time"].nunique()
+    # конекцијата се враќа по секој batch, не се држи низ целиот replay
+    assert hub.in_use == [0] * len(hub.batches)
@@ -0,0 +1,78 @@
+import pandas as pd
+import pytest
+
+from analysis.resampling import TIMEFRAMES, ResampleCache
+from market.ohlcv_store import STORE_DIR, OHLCVStore
+from tests.helpers import CSV_NAME, DB_NAME, next_candle, write_csv
+from update_coins_from_csv import ingest_csv
+from web import market_data
+from web.reloader import DataReloader
+
+
+@pytest.fixture
+def reloader(ingested):
+    swaps = []
+    market = DataReloader(STORE_DIR, on_swap=lambda previous, data: swaps.append((previous, data)))
+    # check() на овој thread наместо _run во позадина
+    assert market.check()
+    market.ready.set()
+    return market, swaps
+
+
+def publish(df, *symbols):
+    """Ingests one more candle for `symbols`, which publishes a new store version."""
+    full = pd.concat([df] + [next_candle(df, s) for s in symbols])
+    write_csv(full)
+    ingest_csv(CSV_NAME, DB_NAME)
+    return full
+
+
+def test_unchanged_version_does_not_reload(reloader):
+    market, swaps = reloader
+    assert not market.check()
+    assert len(swaps) == 1 and swaps[0][0] is None
+
+
+def test_readers_keep_their_bundle_across_a_swap(reloader, ingested):
+    market, swaps = reloader
+    old = market.current
+    old_price = old.market_stats["BTC"]["price"]
+
+    publish(ingested, "BTC")
+    assert market.check()
+
+    new = market.current
+    assert new.version == OHLCVStore().version != old.version
+    assert new.market_stats["BTC"]["price"] == pytest.approx(old_price * 1.1)
+    # request што го зел стариот bundle го довршува на него
+    assert old.market_stats["BTC"]["price"] == old_price
+    assert len(old.store.arrays("BTC")["time"]) + 1 == len(new.store.arrays("BTC")["time"])
+    assert swaps[-1] == (old, new)
+    assert market.reloads == 1
+
+
+def test_extended_candles_match_a_fresh_resample(reloader, ingested):
+    market, _ = reloader
+    publish(ingested, "ETH", "SOL")
+    market.check()
+
+    fresh = ResampleCache.from_store(OHLCVStore())
+    for symbol in ("BTC", "ETH", "SOL"):
+        for tf in TIMEFRAMES:
+            pd.testing.assert_frame_equal(
+                market.current.candles.get(symbol, tf).reset_index(drop=True),
+                fresh.get(symbol, tf).reset_index(drop=True),
+            )
+
+
+def test_failed_load_keeps_the_current_bundle(reloader, ingested, monkeypatch):
+    market, _ = reloader
+    old = market.current
+    publish(ingested, "BTC")
+
+    def broken(*args, **kwargs):
+        raise OSError("half-deleted version")
+
+    monkeypatch.setattr(market_data.MarketData, "load", broken)
+    assert not market.check()
+    assert market.current is old
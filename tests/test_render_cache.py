@@ -0,0 +1,93 @@
+import pytest
+from flask import Flask, redirect, request, session
+
+from web.render_cache import RenderCache
+
+
+@pytest.fixture
+def setup():
+    app = Flask(__name__)
+    app.secret_key = "test"
+    state = {"version": "v1700000000000000000", "calls": 0}
+    cache = RenderCache(lambda: state["version"], max_entries=3)
+
+    @app.route("/page")
+    @cache.cached
+    def page():
+        state["calls"] += 1
+        return f"{state['version']} {session.get('user')} {sorted(request.args.items())}"
+
+    @app.route("/moved")
+    @cache.cached
+    def moved():
+        state["calls"] += 1
+        return redirect("/page")
+
+    return app.test_client(), cache, state
+
+
+def test_same_page_is_rendered_once(setup):
+    client, cache, state = setup
+    first = client.get("/page?b=2&a=1")
+    # редоследот и празните параметри се исти клуч
+    again = client.get("/page?a=1&b=2&c=")
+    assert again.get_data() == first.get_data()
+    assert state["calls"] == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_matching_etag_is_a_304(setup):
+    client, cache, _ = setup
+    first = client.get("/page")
+    assert first.headers["Cache-Control"] == "private, no-cache"
+    assert first.last_modified is not None
+
+    resp = client.get("/page", headers={"If-None-Match": first.headers["ETag"]})
+    assert resp.status_code == 304
+    assert resp.get_data() == b""
+    assert cache.stats()["not_modified"] == 1
+
+    assert client.get("/page", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_new_version_drops_every_entry(setup):
+    client, cache, state = setup
+    etag = client.get("/page").headers["ETag"]
+    client.get("/page?a=1")
+
+    state["version"] = "v1800000000000000000"
+    resp = client.get("/page", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.get_data(as_text=True).startswith("v1800000000000000000")
+    assert state["calls"] == 3
+    assert cache.stats()["entries"] == 1
+
+
+def test_pages_are_per_user(setup):
+    client, _, state = setup
+    client.get("/page")
+    with client.session_transaction() as s:
+        s["user"] = "ana"
+    assert "ana" in client.get("/page").get_data(as_text=True)
+    assert state["calls"] == 2
+
+
+def test_redirects_are_not_cached(setup):
+    client, cache, state = setup
+    client.get("/moved")
+    client.get("/moved")
+    assert state["calls"] == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_is_evicted(setup):
+    client, cache, state = setup
+    for q in ("a", "b", "c"):
+        client.get(f"/page?q={q}")
+    client.get("/page?q=a")          # a е пак најново
+    client.get("/page?q=d")          # го исфрла b
+    calls = state["calls"]
+    client.get("/page?q=a")
+    client.get("/page?q=b")
+    assert state["calls"] == calls + 1
+    assert cache.stats()["evictions"] >= 1
@@ -0,0 +1,102 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from db import repository
+from db.migrations import MIGRATIONS, migrate
+from tests.helpers import COLUMNS, generate_coins
+
+# coins табелата како пред миграциите: без индекси, со дупликати од reload-ите
+LEGACY_SCHEMA = """
+CREATE TABLE coins (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    symbol TEXT NOT NULL,
+    time INTEGER NOT NULL,
+    open REAL, high REAL, low REAL, close REAL, volume REAL
+);
+"""
+
+
+def insert(conn, df):
+    conn.executemany(
+        f"INSERT INTO coins ({', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        df[COLUMNS].itertuples(index=False),
+    )
+
+
+@pytest.fixture
+def coins():
+    df = generate_coins(symbols=4, days=20, seed=4)
+    # volume околу WHALE_VOLUME, за whale_count да не е 0 или сите
+    df["volume"] = df["volume"] % 2000
+    return df
+
+
+@pytest.fixture
+def legacy(coins):
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(LEGACY_SCHEMA)
+    insert(conn, coins)
+    # повторено вчитување на последните свеќи со нови вредности
+    insert(conn, coins.groupby("symbol").tail(2).assign(close=lambda df: df["close"] + 1))
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def aggregates(conn, **kwargs):
+    return repository.symbol_aggregates(conn, **kwargs).sort_values("symbol").reset_index(drop=True)
+
+
+def test_migrate_dedupes_and_indexes(legacy, coins):
+    assert migrate(legacy) == len(MIGRATIONS)
+    assert legacy.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS)
+    assert legacy.execute("SELECT COUNT(*) FROM coins").fetchone()[0] == len(coins)
+
+    # останува последното вчитување
+    last = coins.groupby("symbol").tail(1).set_index("symbol")
+    for symbol, row in last.iterrows():
+        assert repository.latest_close_volume(legacy, symbol) == (row["close"] + 1, row["volume"])
+
+    # втор migrate не прави ништо
+    migrate(legacy)
+    assert legacy.execute("SELECT COUNT(*) FROM coins").fetchone()[0] == len(coins)
+
+
+def test_latest_candle_reads_only_the_index(legacy):
+    migrate(legacy)
+    plan = " ".join(row[-1] for row in legacy.execute(
+        "EXPLAIN QUERY PLAN SELECT close, volume FROM coins WHERE symbol=? ORDER BY time DESC LIMIT 1",
+        ("BTC",),
+    ))
+    assert "COVERING INDEX" in plan
+
+
+def test_summary_matches_the_grouped_query(legacy, coins):
+    migrate(legacy)
+    from_summary = aggregates(legacy)
+    totals = {s: repository.total_volume(legacy, s) for s in coins["symbol"].unique()}
+    # без coin_summary истото од групираниот query врз индексот
+    legacy.execute("DROP TABLE coin_summary")
+    pd.testing.assert_frame_equal(from_summary, aggregates(legacy), check_dtype=False)
+    assert totals == {s: repository.total_volume(legacy, s) for s in totals}
+
+    for symbol, g in coins.groupby("symbol"):
+        assert repository.whale_count(legacy, symbol) == (g["volume"] >= repository.WHALE_VOLUME).sum()
+        assert repository.total_volume(legacy, symbol) == pytest.approx(g["volume"].sum())
+    # друг праг не може од coin_summary
+    assert repository.whale_count(legacy, "BTC", threshold=0) == len(coins[coins["symbol"] == "BTC"])
+
+
+def test_upsert_and_refresh_summary(legacy, coins):
+    migrate(legacy)
+    btc = coins[coins["symbol"] == "BTC"]
+    new = btc.tail(1).assign(time=btc["time"].max() + 86400, close=123.0)
+    with legacy:
+        repository.upsert_candles(legacy, pd.concat([btc.tail(1).assign(close=7.0), new]))
+        repository.refresh_summary(legacy, ["BTC"])
+
+    assert repository.max_times(legacy)["BTC"] == new["time"].iloc[0]
+    assert repository.latest_close_volume(legacy, "BTC")[0] == 123.0
+    assert repository.load_coins(legacy, ["close"], symbol="BTC")["close"].iloc[-2] == 7.0
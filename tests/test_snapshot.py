@@ -0,0 +1,73 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from market.snapshot import (
+    SNAPSHOT_COLUMNS, build_snapshot, load_snapshot, save_snapshot, snapshot_stats, update_snapshot,
+)
+from tests.helpers import DAY, generate_coins
+
+
+@pytest.fixture
+def coins():
+    df = generate_coins(symbols=5, days=40, seed=2)
+    # coin со само една свеќа нема prev
+    lone = df[df["symbol"] == "BTC"].iloc[[0]].assign(symbol="NEW")
+    return pd.concat([df, lone], ignore_index=True)
+
+
+def reference(df):
+    """Last and previous candle per symbol, one groupby at a time."""
+    rows = {}
+    for symbol, g in df.sort_values("time").groupby("symbol"):
+        last, prev = g.iloc[-1], g.iloc[-2] if len(g) > 1 else None
+        rows[symbol] = (
+            last["time"], last["close"], last["volume"],
+            -1 if prev is None else prev["time"], np.nan if prev is None else prev["close"],
+        )
+    return pd.DataFrame.from_dict(rows, orient="index", columns=SNAPSHOT_COLUMNS).rename_axis("symbol")
+
+
+def test_build_matches_groupby(coins):
+    # редоследот на редовите не е битен
+    shuffled = coins.sample(frac=1, random_state=0)
+    pd.testing.assert_frame_equal(build_snapshot(shuffled), reference(coins), check_dtype=False)
+
+
+def test_update_matches_a_rebuild(coins):
+    cut = coins["time"].max() - 3 * DAY
+    old, new = coins[coins["time"] <= cut], coins[coins["time"] > cut]
+    extra = new.iloc[[0]].assign(symbol="ZZZ", time=coins["time"].max() + DAY)
+    new = pd.concat([new, extra])
+
+    updated = update_snapshot(build_snapshot(old), new)
+    pd.testing.assert_frame_equal(updated, build_snapshot(pd.concat([old, new])), check_dtype=False)
+
+
+def test_save_and_load_round_trip(coins, tmp_path):
+    snapshot = build_snapshot(coins)
+    conn = sqlite3.connect(tmp_path / "snap.db")
+    with conn:
+        save_snapshot(conn, snapshot, "v1")
+    loaded = load_snapshot(conn, "v1")
+    conn.close()
+    pd.testing.assert_frame_equal(loaded, snapshot, check_dtype=False)
+
+
+def test_change_24h(coins):
+    stats = snapshot_stats(build_snapshot(coins))
+    prev_close, close = coins[coins["symbol"] == "ETH"]["close"].iloc[-2:]
+    assert stats["ETH"]["change_24h"] == pytest.approx((close / prev_close - 1) * 100)
+    # без претходна свеќа нема промена
+    assert stats["NEW"]["change_24h"] == 0.0
+
+
+def test_pages_show_the_snapshot_prices(web, ingested):
+    stats = snapshot_stats(build_snapshot(ingested))
+    index = web.get("/").get_data(as_text=True)
+    markets = web.get("/markets").get_data(as_text=True)
+    for symbol, s in stats.items():
+        assert s["price_fmt"] in index
+        assert s["price_fmt"] in markets
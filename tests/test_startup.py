@@ -0,0 +1,55 @@
+import ast
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from werkzeug.exceptions import ServiceUnavailable
+
+import analysis
+from tests.helpers import ROOT
+from web.reloader import DataReloader
+
+# истите што ги проверува benchmarks/bench_startup.py
+HEAVY_MODULES = ["pandas", "ta", "tensorflow", "sklearn", "matplotlib", "aiohttp", "vaderSentiment"]
+
+
+def test_import_analysis_loads_no_heavy_module():
+    # свеж интерпретер, овој процес веќе ги има pandas & co.
+    code = f"import analysis, json, sys; print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert json.loads(out.stdout) == []
+
+
+def test_every_entry_point_is_defined_in_its_module():
+    # преку ast, за lstm_price_prediction да не бара TensorFlow
+    for name, module in analysis._ENTRY_POINTS.items():
+        path = os.path.join(ROOT, *module.split(".")) + ".py"
+        with open(path) as f:
+            tree = ast.parse(f.read())
+        defined = {
+            node.name for node in tree.body
+            if isinstance(node, (ast.FunctionDef, ast.ClassDef))
+        }
+        assert name in defined, f"{module}.{name}"
+
+
+def test_entry_point_resolves_on_first_use():
+    from analysis.resampling import resample_ohlcv
+
+    assert analysis.resample_ohlcv is resample_ohlcv
+    assert "resample_ohlcv" in dir(analysis)
+    with pytest.raises(AttributeError):
+        analysis.not_an_entry_point
+
+
+def test_views_wait_for_the_first_load_then_503():
+    market = DataReloader("unused", warm_timeout=0)
+    with pytest.raises(ServiceUnavailable, match="still loading"):
+        market.current
+
+    # првото вчитување паднало: 503 наместо да чека засекогаш
+    market.ready.set()
+    with pytest.raises(ServiceUnavailable, match="not available"):
+        market.current
@@ -0,0 +1,41 @@
+import gzip
+
+import pytest
+from flask import Flask
+
+from web.streaming import stream_rows
+
+FIELDS = ["symbol", "price"]
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+
+    @app.route("/<fmt>/<int:rows>")
+    def export(fmt, rows):
+        chunks = ([("C%d" % i, float(i))] for i in range(rows))
+        return stream_rows(FIELDS, chunks, fmt, filename="x.csv")
+
+    return app.test_client()
+
+
+def test_empty_csv_is_just_the_header(client):
+    resp = client.get("/csv/0", headers={"Accept-Encoding": "identity"})
+    assert resp.status_code == 200
+    assert resp.data == b"symbol,price\n"
+
+
+def test_empty_gzipped_csv_is_just_the_header(client):
+    resp = client.get("/csv/0", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(resp.data) == b"symbol,price\n"
+
+
+def test_csv_header_once(client):
+    resp = client.get("/csv/3", headers={"Accept-Encoding": "identity"})
+    assert resp.data == b"symbol,price\nC0,0.0\nC1,1.0\nC2,2.0\n"
+
+
+def test_empty_ndjson_is_empty(client):
+    assert client.get("/ndjson/0").data == b""
@@ -1,24 +1,126 @@
-import pandas as pd
+import argparse
 import sqlite3
+import time
+
+import pandas as pd
+
+from db.migrations import migrate
+from db.repository import (
+    COIN_COLUMNS,
+    load_coins,
+    max_times as stored_max_times,
+    refresh_summary,
+    upsert_candles,
+)
+from market.coin_stats import refresh_coin_stats
+from market.coins_dataset import ensure_dataset, extend_dataset, read_csv_chunks
+from market.ohlcv_store import OHLCVStore, build_store, extend_store, store_exists
+from market.snapshot import refresh_snapshot
 
 CSV_PATH = ("data/processed/all_coins.csv")
 DB_PATH = "users.db"
 
-df = pd.read_csv(CSV_PATH)
+CHUNK_ROWS = 50_000
+
+
+def prepare_db(conn):
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    migrate(conn)
+
+
+def ingest_csv(csv_path=CSV_PATH, db_path=DB_PATH, chunk_rows=CHUNK_ROWS, full=False):
+    """
+    Streams the CSV in chunks and upserts only candles newer than the
+    latest stored time of their symbol (every candle with full=True).
+    Each chunk is written in its own transaction, so the coins table
+    stays readable for the whole run.
+    """
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path)
+    prepare_db(conn)
+
+    max_times = {} if full else stored_max_times(conn)
+
+    read = inserted = skipped = 0
+    fresh = []
+    for chunk in read_csv_chunks(csv_path, chunk_rows, COIN_COLUMNS):
+        read += len(chunk)
+
+        latest = chunk["symbol"].map(max_times).fillna(-1)
+        before = len(chunk)
+        chunk = chunk[chunk["time"] > latest]
+        skipped += before - len(chunk)
+        if chunk.empty:
+            continue
+
+        with conn:
+            upsert_candles(conn, chunk)
+        inserted += len(chunk)
+        fresh.append(chunk)
+
+    new_rows = pd.concat(fresh, ignore_index=True) if fresh else pd.DataFrame(columns=COIN_COLUMNS)
+
+    if not new_rows.empty:
+        with conn:
+            refresh_summary(conn, new_rows["symbol"].unique())
+
+        # memory-mapped store за app.py (workers го земаат при следно вчитување)
+        # верзијата на која се додаваат new_rows, None кога се гради одново
+        previous = None if full or not store_exists() else OHLCVStore().version
+        if previous is None:
+            build_store(load_coins(conn))
+            touched = None
+        else:
+            extend_store(new_rows)
+            touched = new_rows["symbol"].unique()
+        store = OHLCVStore()
+
+        # snapshot и статистики за coin_detail за новата верзија на store-от,
+        # само за symbols со нови свеќи
+        with conn:
+            refresh_snapshot(conn, new_rows, store, previous)
+            refresh_coin_stats(conn, store, touched)
+
+    conn.close()
+
+    # Parquet копијата за analysis loaders, да не го парсираат CSV-то секој пат;
+    # инкрементално се додаваат само новите свеќи
+    if full or new_rows.empty:
+        ensure_dataset(csv_path)
+    else:
+        extend_dataset(new_rows, csv_path)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "rows_read": read,
+        "rows_inserted": inserted,
+        "rows_skipped": skipped,
+        "seconds": elapsed,
+        "rows_per_second": read / elapsed if elapsed else 0.0,
+    }
 
-# осигурај се дека time е integer
-df["time"] = df["time"].astype(int)
 
-conn = sqlite3.connect(DB_PATH)
-cur = conn.cursor()
+def main():
+    parser = argparse.ArgumentParser(description="Update the coins table from all_coins.csv")
+    parser.add_argument("--csv", default=CSV_PATH)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument(
+        "--full", action="store_true",
+        help="upsert every row, not only the ones newer than the stored history",
+    )
+    args = parser.parse_args()
 
-# избриши само coins, НЕ users
-cur.execute("DELETE FROM coins")
+    report = ingest_csv(args.csv, args.db, args.chunk_rows, args.full)
 
-# внесе нови податоци
-df.to_sql("coins", conn, if_exists="append", index=False)
+    print("Coins table successfully updated from CSV")
+    print(f"  rows read:     {report['rows_read']}")
+    print(f"  rows inserted: {report['rows_inserted']}")
+    print(f"  rows skipped:  {report['rows_skipped']}")
+    print(f"  throughput:    {report['rows_per_second']:,.0f} rows/s "
+          f"({report['seconds']:.2f}s)")
 
-conn.commit()
-conn.close()
 
-print("Coins table successfully updated from CSV")
+if __name__ == "__main__":
+    main()
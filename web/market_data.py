@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+from analysis.resampling import ResampleCache
+from db.pool import get_pool
+from db.repository import load_coins
+from market.coin_stats import coin_stats_dict, compute_coin_stats, load_coin_stats
+from market.market_index import MarketIndex
+from market.ohlcv_store import COLUMNS, STORE_DIR, OHLCVStore, build_store, store_exists
+from market.snapshot import build_snapshot, load_snapshot, snapshot_stats
+
+# Everything the web app serves from memory, bundled per store version.
+# A MarketData is never modified after it is built: the reloader builds the
+# next one on its own thread and swaps the reference, so a request that
+# grabbed the old bundle finishes on it while new requests see the new one.
+# The reloader itself lives in web/reloader.py and imports this module on
+# its own thread, so pandas is never loaded on the app's import path.
+
+
+def _new_rows(old, new):
+    """Candles in `new` that are newer than the last candle of the same symbol in `old`."""
+    parts = []
+    for symbol, (start, end) in new.index.items():
+        times = new.columns["time"][start:end]
+        old_arrays = old.arrays(symbol)
+        since = 0
+        if old_arrays is not None and len(old_arrays["time"]):
+            since = int(np.searchsorted(times, old_arrays["time"][-1], side="right"))
+        if since < len(times):
+            part = pd.DataFrame({
+                col: np.asarray(arr[start + since:end]) for col, arr in new.columns.items()
+            })
+            part.insert(0, "symbol", symbol)
+            parts.append(part)
+    if not parts:
+        return pd.DataFrame(columns=["symbol"] + COLUMNS)
+    return pd.concat(parts, ignore_index=True)
+
+
+class MarketData:
+    """
+    store + market_stats (+ its MarketIndex) + coin_stats + candles for one
+    store version.
+    """
+
+    def __init__(self, store, market_stats, coin_stats, candles):
+        self.store = store
+        self.market_stats = market_stats
+        self.market_index = MarketIndex(market_stats)
+        self.coin_stats = coin_stats
+        self.candles = candles
+
+    @property
+    def version(self):
+        return self.store.version
+
+    @classmethod
+    def load(cls, path=STORE_DIR, previous=None):
+        if not store_exists(path):
+            # првото стартување го гради store-от од coins табелата
+            with get_pool().connection() as conn:
+                build_store(load_coins(conn), path)
+
+        # OHLCV по coin, memory-mapped и делен меѓу сите workers
+        store = OHLCVStore(path)
+
+        # последна/претходна свеќа по coin; ingest ги запишува за истата верзија,
+        # застарен (или уште незапишан) snapshot се гради од store-от
+        with get_pool().connection() as conn:
+            snapshot = load_snapshot(conn, store.version)
+            coin_stats = load_coin_stats(conn, store.version)
+        if snapshot is None:
+            snapshot = build_snapshot(store.tail(2))
+        market_stats = snapshot_stats(snapshot)
+
+        # ingest ги пресметува за истата верзија; инаку (или пред ingest да стигне) тука
+        if coin_stats is None:
+            coin_stats = compute_coin_stats(store)
+        coin_stats = coin_stats_dict(coin_stats)
+
+        # дневни/неделни/месечни барови; при reload се продолжува само отворениот bar
+        if previous is None or not set(previous.store.index) <= set(store.index):
+            candles = ResampleCache.from_store(store)
+        else:
+            candles = previous.candles.copy()
+            candles.extend(_new_rows(previous.store, store))
+
+        return cls(store, market_stats, coin_stats, candles)
@@ -0,0 +1,293 @@
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import Response, before_render_template, g, has_request_context, request, template_rendered
+
+from db.pool import set_query_observer
+
+# Per-request instrumentation for the Flask app, exposed at /metrics in the
+# Prometheus text format:
+#   - latency histogram per route, method and status; streamed responses
+#     (exports, SSE) are timed until the body is closed, not until headers
+#   - named phases inside a view (data, compute, render) as histograms;
+#     render is timed automatically through Flask's template signals
+#   - number and time of SQLite queries per route, from db.pool's observer
+# With METRICS_PROFILE_SLOW_MS set, a sampling profiler records the stacks
+# of the threads serving requests and, for requests slower than the
+# threshold, appends them in collapsed format (flamegraph.pl / speedscope)
+# to PROFILE_DIR/<route>.folded.
+#
+#   metrics = Metrics().init_app(app, guard=login_or_token)
+#
+#   with metrics.phase("data"):
+#       data = market.current
+
+# секунди, како default buckets на prometheus_client
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROFILE_SLOW_MS = os.environ.get("METRICS_PROFILE_SLOW_MS")
+PROFILE_INTERVAL = float(os.environ.get("METRICS_PROFILE_INTERVAL_MS", 5)) / 1000
+PROFILE_DIR = os.environ.get("METRICS_PROFILE_DIR", "profiles")
+
+# DB повици надвор од request (reloader, forecast warm-up)
+BACKGROUND = "(background)"
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{_labels(labels, le=_float(bound))} {cumulative}'
+        yield f'{name}_bucket{_labels(labels, le="+Inf")} {self.count}'
+        yield f"{name}_sum{_labels(labels)} {_float(self.sum)}"
+        yield f"{name}_count{_labels(labels)} {self.count}"
+
+
+def _float(value):
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels, **extra):
+    items = list(labels.items()) + list(extra.items())
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+class Metrics:
+    def __init__(self, buckets=BUCKETS, profile_slow_ms=PROFILE_SLOW_MS,
+                 profile_interval=PROFILE_INTERVAL, profile_dir=PROFILE_DIR):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._requests = {}   # (route, method, status) -> Histogram
+        self._phases = {}     # (route, phase) -> Histogram
+        self._queries = {}    # route -> [queries, seconds]
+        self._in_flight = 0
+
+        self.profile_slow = None if profile_slow_ms in (None, "") else float(profile_slow_ms) / 1000
+        self.profile_interval = profile_interval
+        self.profile_dir = profile_dir
+        self._active = {}     # thread ident -> Counter of folded stacks
+        self._profiles = 0
+
+    def init_app(self, app, guard=None):
+        """guard: optional view decorator for /metrics (auth)."""
+        app.before_request(self._before)
+        app.after_request(self._after)
+        app.teardown_request(self._teardown)
+        before_render_template.connect(self._render_started, app)
+        template_rendered.connect(self._render_finished, app)
+        app.add_url_rule("/metrics", "metrics", guard(self.endpoint) if guard else self.endpoint)
+        set_query_observer(self._query)
+        if self.profile_slow is not None:
+            threading.Thread(target=self._sample, name="metrics-profiler", daemon=True).start()
+        return self
+
+    # -------- request hooks -------- #
+
+    @staticmethod
+    def _route():
+        rule = request.url_rule
+        return rule.rule if rule is not None else "(unmatched)"
+
+    def _before(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_queries = [0, 0.0]
+        with self._lock:
+            self._in_flight += 1
+            if self.profile_slow is not None:
+                self._active[threading.get_ident()] = Counter()
+
+    def _after(self, response):
+        if response.is_streamed:
+            # view-от враќа генератор: до тука се само headers, телото се
+            # праќа после; се мери до затворањето на response-от, кога
+            # request context-от веќе го нема
+            finish = self._finisher(response.status_code)
+            if finish is not None:
+                response.call_on_close(finish)
+        else:
+            self._finish(response.status_code)
+        return response
+
+    def _teardown(self, exc):
+        # exception без after_request (500); инаку _after веќе го заврши
+        if exc is not None:
+            self._finish(500)
+
+    def _finish(self, status):
+        finish = self._finisher(status)
+        if finish is not None:
+            finish()
+
+    def _finisher(self, status):
+        """Takes the request's state out of g; the returned call records it."""
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return None
+        route = self._route()
+        method = request.method
+        queries = g.metrics_queries
+        ident = threading.get_ident()
+        return lambda: self._record(route, method, status, started, queries, ident)
+
+    def _record(self, route, method, status, started, queries, ident):
+        elapsed = time.perf_counter() - started
+        queries, seconds = queries
+
+        with self._lock:
+            self._in_flight -= 1
+            key = (route, method, str(status))
+            hist = self._requests.get(key)
+            if hist is None:
+                hist = self._requests[key] = Histogram(self.buckets)
+            hist.observe(elapsed)
+            totals = self._queries.setdefault(route, [0, 0.0])
+            totals[0] += queries
+            totals[1] += seconds
+            samples = self._active.pop(ident, None)
+
+        if samples and elapsed >= self.profile_slow:
+            self._dump(route, samples)
+
+    def _observe_phase(self, name, seconds):
+        key = (self._route(), name)
+        with self._lock:
+            hist = self._phases.get(key)
+            if hist is None:
+                hist = self._phases[key] = Histogram(self.buckets)
+            hist.observe(seconds)
+
+    @contextmanager
+    def phase(self, name):
+        """Times a named phase of the current request."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._observe_phase(name, time.perf_counter() - started)
+
+    def _render_started(self, sender, template, context, **extra):
+        g.metrics_render = time.perf_counter()
+
+    def _render_finished(self, sender, template, context, **extra):
+        started = g.pop("metrics_render", None)
+        if started is not None:
+            self._observe_phase("render", time.perf_counter() - started)
+
+    def _query(self, seconds, statement):
+        if has_request_context() and "metrics_queries" in g:
+            counts = g.metrics_queries
+            counts[0] += statement
+            counts[1] += seconds
+            return
+        with self._lock:
+            totals = self._queries.setdefault(BACKGROUND, [0, 0.0])
+            totals[0] += statement
+            totals[1] += seconds
+
+    # -------- profiler -------- #
+
+    @staticmethod
+    def _folded(frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(stack))
+
+    def _sample(self):
+        while True:
+            time.sleep(self.profile_interval)
+            with self._lock:
+                active = list(self._active.items())
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for ident, samples in active:
+                frame = frames.get(ident)
+                if frame is not None:
+                    samples[self._folded(frame)] += 1
+
+    def _dump(self, route, samples):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        name = route.strip("/").replace("/", "_").replace("<", "").replace(">", "") or "index"
+        path = os.path.join(self.profile_dir, f"{name}.folded")
+        with self._lock:
+            self._profiles += 1
+            with open(path, "a") as f:
+                for stack, count in samples.items():
+                    f.write(f"{stack} {count}\n")
+
+    # -------- exposition -------- #
+
+    def render(self):
+        with self._lock:
+            queries = {k: list(v) for k, v in self._queries.items()}
+            in_flight = self._in_flight
+            profiles = self._profiles
+
+            lines = [
+                "# HELP http_request_duration_seconds Request latency by route.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (route, method, status), hist in sorted(self._requests.items()):
+                lines.extend(hist.lines(
+                    "http_request_duration_seconds",
+                    {"route": route, "method": method, "status": status},
+                ))
+
+            lines += [
+                "# HELP http_request_phase_duration_seconds Time spent in named phases of a view.",
+                "# TYPE http_request_phase_duration_seconds histogram",
+            ]
+            for (route, name), hist in sorted(self._phases.items()):
+                lines.extend(hist.lines(
+                    "http_request_phase_duration_seconds", {"route": route, "phase": name}
+                ))
+
+        lines += [
+            "# HELP db_queries_total SQLite statements executed, by route.",
+            "# TYPE db_queries_total counter",
+        ]
+        lines += [f"db_queries_total{_labels({'route': r})} {q}" for r, (q, _) in sorted(queries.items())]
+        lines += [
+            "# HELP db_query_seconds_total Time spent in SQLite execute and fetch, by route.",
+            "# TYPE db_query_seconds_total counter",
+        ]
+        lines += [
+            f"db_query_seconds_total{_labels({'route': r})} {_float(s)}"
+            for r, (_, s) in sorted(queries.items())
+        ]
+        lines += [
+            "# HELP http_requests_in_flight Requests being served right now.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {in_flight}",
+            "# HELP profiler_slow_requests_total Slow requests whose stacks were dumped.",
+            "# TYPE profiler_slow_requests_total counter",
+            f"profiler_slow_requests_total {profiles}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def endpoint(self):
+        return Response(self.render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,283 @@
+import json
+import threading
+import time
+from collections import deque
+
+from db.pool import get_pool
+
+# In-process pub/sub for live prices on /markets, served as
+# Server-Sent Events by app.py (/api/stream/prices).
+#
+# A publish is one batch of per-symbol deltas {symbol: [price, change_24h,
+# volume, market_cap]}. The hub encodes the batch into an SSE frame once per
+# distinct symbol filter (all clients, or the clients of one /markets page)
+# and hands the same frame to every matching subscriber, so fan-out costs
+# one deque append per client. Every client has a bounded queue:
+#   - a client that keeps up gets every batch as it was published
+#   - when its queue is full, new batches are merged into the newest queued
+#     one (latest value per symbol wins), so a slow client gets fewer,
+#     larger updates instead of an ever-growing backlog
+#   - if its oldest undelivered batch is older than max_lag, the client is
+#     dropped with a "reset" event and reconnects to a fresh snapshot
+# publish() never blocks on a client.
+#
+# Each SSE connection holds one server thread, so thousands of clients need
+# a worker that serves them on green threads (gevent/eventlet); the hub
+# itself does not care.
+
+MAX_QUEUE = 32              # batches по клиент пред да почне спојување
+MAX_LAG = 30.0              # секунди, постар batch -> клиентот се исклучува
+MAX_SUBSCRIBERS = 10_000
+# symbols по query во ReplayFeed, под SQLite лимитот за параметри
+REPLAY_SYMBOLS_PER_QUERY = 500
+
+
+class HubFull(Exception):
+    pass
+
+
+def encode(seq, deltas, event="prices"):
+    data = json.dumps({"seq": seq, "ts": int(time.time() * 1000), "d": deltas}, separators=(",", ":"))
+    return f"id: {seq}\nevent: {event}\ndata: {data}\n\n"
+
+
+class Subscription:
+    def __init__(self, symbols=None, max_queue=MAX_QUEUE, max_lag=MAX_LAG):
+        self.symbols = frozenset(symbols) if symbols else None
+        self.max_queue = max_queue
+        self.max_lag = max_lag
+        self.delivered = 0
+        self.coalesced = 0
+        self.closed = False
+        self._queue = deque()     # [seq, deltas, frame или None, објавено во]
+        self._cond = threading.Condition()
+
+    def offer(self, seq, deltas, frame, now):
+        """Called by the publisher with the batch already filtered; never waits for the client."""
+        with self._cond:
+            if self.closed:
+                return
+            if len(self._queue) < self.max_queue:
+                self._queue.append([seq, deltas, frame, now])
+            elif now - self._queue[0][3] > self.max_lag:
+                self.closed = True
+            else:
+                newest = self._queue[-1]
+                merged = dict(newest[1])
+                merged.update(deltas)
+                newest[:3] = [seq, merged, None]
+                self.coalesced += 1
+            self._cond.notify()
+
+    def get(self, timeout):
+        """(frames, closed): everything queued, waiting up to timeout for the first batch."""
+        with self._cond:
+            if not self._queue and not self.closed and timeout:
+                self._cond.wait(timeout)
+            items = list(self._queue)
+            self._queue.clear()
+            closed = self.closed
+        self.delivered += len(items)
+        # споените batches се кодираат тука, во thread-от на клиентот
+        frames = [frame if frame is not None else encode(seq, deltas) for seq, deltas, frame, _ in items]
+        return frames, closed
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+
+class PriceHub:
+    def __init__(self, max_queue=MAX_QUEUE, max_lag=MAX_LAG, max_subscribers=MAX_SUBSCRIBERS):
+        self.max_queue = max_queue
+        self.max_lag = max_lag
+        self.max_subscribers = max_subscribers
+        self.seq = 0
+        self.latest = {}          # symbol -> последна делта, за snapshot при поврзување
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._stats = {"published": 0, "subscribed": 0, "dropped": 0, "publish_seconds": 0.0}
+
+    def subscribe(self, symbols=None):
+        sub = Subscription(symbols, self.max_queue, self.max_lag)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise HubFull(f"{self.max_subscribers} subscribers already connected")
+            self._subscribers.add(sub)
+            self._stats["subscribed"] += 1
+        return sub
+
+    def unsubscribe(self, sub):
+        sub.close()
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def publish(self, deltas):
+        """Fans one batch of {symbol: [price, change_24h, volume, market_cap]} out to every client."""
+        if not deltas:
+            return
+        with self._publish_lock:
+            started = time.perf_counter()
+            self.seq += 1
+            self.latest.update(deltas)
+            frame = encode(self.seq, deltas)
+            now = time.monotonic()
+            with self._lock:
+                subscribers = list(self._subscribers)
+
+            # клиентите на иста страна имаат ист филтер: филтрирање и frame еднаш по филтер
+            filtered = {None: (deltas, frame)}
+            dropped = []
+            for sub in subscribers:
+                batch = filtered.get(sub.symbols)
+                if batch is None:
+                    batch = filtered[sub.symbols] = self._filter(deltas, sub.symbols)
+                if batch[0]:
+                    sub.offer(self.seq, batch[0], batch[1], now)
+                if sub.closed:
+                    dropped.append(sub)
+
+            with self._lock:
+                for sub in dropped:
+                    if sub in self._subscribers:
+                        self._subscribers.discard(sub)
+                        self._stats["dropped"] += 1
+                self._stats["published"] += 1
+                self._stats["publish_seconds"] += time.perf_counter() - started
+
+    def _filter(self, deltas, symbols):
+        if len(symbols) < len(deltas):
+            part = {s: deltas[s] for s in symbols if s in deltas}
+        else:
+            part = {s: d for s, d in deltas.items() if s in symbols}
+        return part, encode(self.seq, part) if part else None
+
+    def snapshot(self, symbols=None):
+        """Latest values as one "snapshot" frame, sent when a client connects."""
+        with self._publish_lock:
+            latest = dict(self.latest)
+            seq = self.seq
+        if symbols:
+            latest = {s: d for s, d in latest.items() if s in symbols}
+        return encode(seq, latest, event="snapshot")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            subscribers = list(self._subscribers)
+        stats["subscribers"] = len(subscribers)
+        stats["seq"] = self.seq
+        stats["symbols"] = len(self.latest)
+        stats["coalesced"] = sum(s.coalesced for s in subscribers)
+        stats["queued"] = sum(len(s._queue) for s in subscribers)
+        stats["publish_seconds_avg"] = (
+            stats["publish_seconds"] / stats["published"] if stats["published"] else 0.0
+        )
+        return stats
+
+
+# -------- SOURCES -------- #
+
+def market_deltas(previous, current):
+    """
+    Deltas between two MarketData bundles (reloader swap): symbols that are
+    new or whose price or volume changed. previous=None gives every symbol.
+    """
+    old = previous.market_stats if previous is not None else {}
+    deltas = {}
+    for symbol, s in current.market_stats.items():
+        before = old.get(symbol)
+        if before is None or before["price"] != s["price"] or before["volume"] != s["volume"]:
+            deltas[symbol] = [s["price"], s["change_24h"], s["volume"], s["market_cap"]]
+    return deltas
+
+
+class ReplayFeed:
+    """
+    Replays the coins table through a hub, one candle timestamp per
+    `interval` seconds, oldest first (and again from the start with
+    loop=True). For testing the stream and the clients offline.
+    A pooled connection is held only while one batch is read, never
+    across the wait between batches.
+
+        ReplayFeed(price_hub, interval=0.5).start()
+    """
+
+    def __init__(self, hub, interval=1.0, symbols=None, loop=True, db_path=None):
+        self.hub = hub
+        self.interval = interval
+        self.symbols = symbols
+        self.loop = loop
+        self.db_path = db_path
+        self.steps = 0
+        self._stop = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, name="price-replay", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _pool(self):
+        return get_pool(self.db_path) if self.db_path else get_pool()
+
+    def _timeline(self):
+        """(symbols, candle timestamps), both sorted; read once per pass."""
+        with self._pool().connection() as conn:
+            if self.symbols:
+                symbols = sorted(set(self.symbols))
+            else:
+                symbols = [row[0] for row in conn.execute("SELECT DISTINCT symbol FROM coins")]
+            times = []
+            for part in _chunks(symbols, REPLAY_SYMBOLS_PER_QUERY):
+                times += (row[0] for row in conn.execute(
+                    f"SELECT DISTINCT time FROM coins WHERE symbol IN ({_marks(part)})", part
+                ))
+        return symbols, sorted(set(times))
+
+    def _batch(self, symbols, ts):
+        # (symbol, time) index, по еден lookup по symbol наместо скен по time
+        with self._pool().connection() as conn:
+            rows = []
+            for part in _chunks(symbols, REPLAY_SYMBOLS_PER_QUERY):
+                rows += conn.execute(
+                    f"SELECT symbol, close, volume FROM coins WHERE symbol IN ({_marks(part)}) AND time = ?",
+                    (*part, ts),
+                ).fetchall()
+        return rows
+
+    def _run(self):
+        while not self._stop.is_set():
+            symbols, times = self._timeline()
+            if not times and self._stop.wait(self.interval):
+                return
+            prev_close = {}
+            for i, ts in enumerate(times):
+                if i and self._stop.wait(self.interval):
+                    return
+                batch = {}
+                for symbol, close, volume in self._batch(symbols, ts):
+                    prev = prev_close.get(symbol)
+                    change = (close - prev) / prev * 100.0 if prev else 0.0
+                    prev_close[symbol] = close
+                    batch[symbol] = [close, change, volume, close * volume]
+                self._publish(batch)
+            if not self.loop:
+                return
+
+    def _publish(self, batch):
+        if batch:
+            self.hub.publish(batch)
+            self.steps += 1
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _marks(items):
+    return ", ".join("?" for _ in items)
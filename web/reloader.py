@@ -0,0 +1,137 @@
+import logging
+import os
+import threading
+import time
+
+from werkzeug.exceptions import ServiceUnavailable
+
+# Background loader for web/market_data.MarketData. The first load (and
+# the imports of pandas & co. it needs) runs on the reloader thread too, so
+# the app is importable and answers /help, /login etc. right away; views
+# that need market data wait for the first load through `current`.
+
+log = logging.getLogger(__name__)
+
+# колку често (секунди) се проверува CURRENT во store-от
+RELOAD_INTERVAL = float(os.environ.get("MARKET_RELOAD_INTERVAL", 5))
+# колку најмногу чека request додека првото вчитување не заврши
+WARM_TIMEOUT = 30.0
+
+
+def current_version(path):
+    try:
+        with open(os.path.join(path, "CURRENT")) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class DataReloader:
+    """
+    Holds the current MarketData and swaps in a new one when the store's
+    CURRENT pointer changes.
+
+        market = DataReloader().start()
+        data = market.current    # once per request
+
+    on_swap(previous, data) runs on the reloader thread after every swap
+    (previous is None for the first load), e.g. to push price deltas.
+    """
+
+    def __init__(self, path=None, interval=RELOAD_INTERVAL, warm_timeout=WARM_TIMEOUT, on_swap=None):
+        self.path = path
+        self.on_swap = on_swap
+        self.interval = interval
+        self.warm_timeout = warm_timeout
+        self.ready = threading.Event()
+        self.reloads = 0
+        self.last_reload_seconds = 0.0
+        self.started_at = time.perf_counter()
+        self.warm_seconds = None
+        self._current = None
+        self._stop = threading.Event()
+
+    @property
+    def current(self):
+        if not self.ready.wait(self.warm_timeout):
+            raise ServiceUnavailable("Market data is still loading.")
+        if self._current is None:
+            raise ServiceUnavailable("Market data is not available.")
+        return self._current
+
+    def _timed_load(self, previous):
+        from web.market_data import MarketData
+
+        started = time.perf_counter()
+        rss_before = _rss_bytes()
+        data = MarketData.load(self.path, previous)
+        seconds = time.perf_counter() - started
+        rss_after = _rss_bytes()
+        log.info(
+            "Loaded market data %s in %.3fs, RSS %.1f MB (%+.1f MB)",
+            data.version, seconds, rss_after / 2**20, (rss_after - rss_before) / 2**20,
+        )
+        self.last_reload_seconds = seconds
+        return data
+
+    def start(self):
+        threading.Thread(target=self._run, name="market-reloader", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def check(self):
+        """Loads if nothing is loaded yet or a new version was published. True if it swapped."""
+        if self._current is not None:
+            version = current_version(self.path)
+            if version is None or version == self._current.version:
+                return False
+        try:
+            data = self._timed_load(self._current)
+        except Exception:
+            # полу-избришана верзија или заклучена база, пробај пак следниот пат
+            log.exception("Market data load failed")
+            return False
+
+        if self._current is None:
+            self.warm_seconds = time.perf_counter() - self.started_at
+        else:
+            self.reloads += 1
+        previous, self._current = self._current, data
+
+        if self.on_swap is not None:
+            try:
+                self.on_swap(previous, data)
+            except Exception:
+                log.exception("on_swap failed")
+        return True
+
+    def _run(self):
+        if self.path is None:
+            from market.ohlcv_store import STORE_DIR
+            self.path = STORE_DIR
+        self.check()
+        self.ready.set()
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def stats(self):
+        data = self._current
+        return {
+            "version": data.version if data else None,
+            "ready": self.ready.is_set(),
+            "warm_seconds": self.warm_seconds,
+            "reloads": self.reloads,
+            "last_reload_seconds": self.last_reload_seconds,
+            "rss_bytes": _rss_bytes(),
+        }
@@ -0,0 +1,157 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import make_response, request, session
+
+# Render cache for the read-only pages. A cached page is keyed on the
+# endpoint, its URL arguments, the normalized query string, the logged-in
+# user (the nav bar shows it) and the data version. When ingestion publishes
+# a new store version, every entry from the old one is dropped at once.
+# Responses carry ETag/Last-Modified, so browsers revalidate and get a 304.
+
+
+class RenderCache:
+    """
+    version() -> current data version string, e.g. OHLCVStore.version
+    ("v<unix ns>"), which also becomes the Last-Modified time.
+
+        render_cache = RenderCache(lambda: store.version)
+
+        @app.route("/")
+        @render_cache.cached
+        def index(): ...
+    """
+
+    def __init__(self, version, max_entries=512, max_bytes=32 * 1024 * 1024):
+        self.version = version
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries = OrderedDict()     # key -> (body, mimetype, etag)
+        self._bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "not_modified": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    # -------- keys -------- #
+
+    @staticmethod
+    def _normalized_args():
+        # редоследот и празните параметри не менуваат ништо во страната
+        return tuple(sorted(
+            (k, v) for k, values in request.args.lists() for v in values if v != ""
+        ))
+
+    def _key(self, version):
+        return (
+            request.endpoint,
+            tuple(sorted((request.view_args or {}).items())),
+            self._normalized_args(),
+            session.get("user"),
+            version,
+        )
+
+    # -------- storage -------- #
+
+    def _get(self, key, version):
+        with self._lock:
+            if version != self._version:
+                if self._entries:
+                    self._stats["invalidations"] += 1
+                self._entries.clear()
+                self._bytes = 0
+                self._version = version
+
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry
+
+    def _put(self, key, entry):
+        size = len(entry[0])
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key[-1] != self._version:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[0])
+            self._entries[key] = entry
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted[0])
+                self._stats["evictions"] += 1
+
+    # -------- decorator -------- #
+
+    @staticmethod
+    def _last_modified(version):
+        try:
+            return datetime.fromtimestamp(int(version.lstrip("v")) // 1_000_000_000, timezone.utc)
+        except (AttributeError, ValueError):
+            return None
+
+    def cached(self, view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version = self.version()
+            key = self._key(version)
+            entry = self._get(key, version)
+
+            if entry is None:
+                resp = make_response(view(*args, **kwargs))
+                # redirect-и, грешки и streaming не се кешираат
+                if resp.status_code != 200 or resp.is_streamed:
+                    return resp
+                body = resp.get_data()
+                entry = (body, resp.mimetype, hashlib.sha1(body).hexdigest())
+                self._put(key, entry)
+
+            body, mimetype, etag = entry
+            resp = make_response(body)
+            resp.mimetype = mimetype
+            resp.set_etag(etag)
+            resp.last_modified = self._last_modified(version)
+            resp.cache_control.private = True
+            resp.cache_control.no_cache = True
+            resp.vary.add("Cookie")
+            if resp.make_conditional(request).status_code == 304:
+                with self._lock:
+                    self._stats["not_modified"] += 1
+            return resp
+
+        return wrapper
+
+    # -------- stats -------- #
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+            stats["version"] = self._version
+        stats["max_entries"] = self.max_entries
+        stats["max_bytes"] = self.max_bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
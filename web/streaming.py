@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+import zlib
+
+from flask import Response, request
+
+# Streaming exports for the JSON API. Producers yield chunks of row tuples,
+# every chunk is encoded (NDJSON or CSV) and optionally gzipped on its own,
+# so a full-history export never sits in memory as a whole.
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _ndjson(fields, chunks):
+    for rows in chunks:
+        yield "".join(
+            json.dumps(dict(zip(fields, row)), separators=(",", ":")) + "\n" for row in rows
+        ).encode()
+
+
+def _csv(fields, chunks):
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    # header-от оди сам, па празен резултат е сепак валиден CSV
+    writer.writerow(fields)
+    yield buf.getvalue().encode()
+    buf.seek(0)
+    buf.truncate()
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+
+
+def _gzip(parts):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for part in parts:
+        out = compressor.compress(part)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def wants_gzip():
+    """gzip if the client accepts it, unless ?gzip=0."""
+    if request.args.get("gzip") in ("0", "false"):
+        return False
+    return "gzip" in request.headers.get("Accept-Encoding", "")
+
+
+def stream_rows(fields, chunks, fmt, next_url=None, filename=None):
+    """Streamed NDJSON/CSV response; next_url becomes a Link: rel="next" header."""
+    parts = _ndjson(fields, chunks) if fmt == "ndjson" else _csv(fields, chunks)
+    headers = {}
+    if wants_gzip():
+        parts = _gzip(parts)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    if next_url:
+        headers["Link"] = f'<{next_url}>; rel="next"'
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return Response(parts, mimetype=FORMATS[fmt], headers=headers)